@@ -40,6 +40,7 @@ Technical Highlights
     },
     'data': [
         'security/ir.model.access.csv',
+        'data/ir_cron_data.xml',
         # Load actions first before using them
         'views/task_checklist_views.xml',
         'views/task_smart_report_views.xml',
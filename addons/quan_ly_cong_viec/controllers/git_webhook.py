@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+
+import logging
+
+from odoo import http
+from odoo.http import request
+from werkzeug.exceptions import NotFound
+
+from ..models.git_webhook import event_headers, repository_name, verify_signature
+
+_logger = logging.getLogger(__name__)
+
+
+class GitWebhookController(http.Controller):
+    """
+    Nhận webhook GitHub (push, pull_request, issues, create/delete) và GitLab
+    (Push / Merge Request / Issue Hook). Chỉ xác thực rồi đưa vào hàng đợi,
+    việc ghi dữ liệu do cron task.git.webhook.event thực hiện.
+
+    Webhook phải gửi với content type application/json: Odoo chuyển các request
+    JSON thành JsonRequest nên route khai báo type='json'. Chữ ký được tính trên
+    body gốc, payload đã parse lấy từ request.jsonrequest. Kết quả trả về trong
+    `result` của phản hồi JSON-RPC (HTTP 200), chỉ integration không tồn tại trả 404.
+    """
+
+    @http.route('/quan_ly_cong_viec/git/webhook/<int:integration_id>', type='json', auth='public',
+                methods=['POST'], csrf=False)
+    def receive(self, integration_id, **kwargs):
+        integration = request.env['task.git.integration'].sudo().browse(integration_id).exists()
+        if not integration or integration.platform not in ('github', 'gitlab'):
+            raise NotFound()
+
+        body = request.httprequest.get_data()
+        headers = request.httprequest.headers
+        if not verify_signature(integration.platform, integration.webhook_secret, headers, body):
+            _logger.warning('Rejected git webhook for integration %s: invalid signature', integration_id)
+            return {'status': 'invalid signature'}
+
+        event, delivery_id = event_headers(integration.platform, headers)
+        if event == 'ping':
+            return {'status': 'pong'}
+        payload = request.jsonrequest
+        name = repository_name(integration.platform, payload)
+        if name and name.lower() != integration.name.lower():
+            return {'status': 'repository mismatch'}
+
+        event_id = request.env['task.git.webhook.event'].sudo()._enqueue(
+            integration, event, delivery_id, body.decode('utf-8', 'replace'),
+        )
+        return {'status': 'queued' if event_id else 'duplicate'}
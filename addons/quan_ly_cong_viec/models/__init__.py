@@ -3,12 +3,21 @@
 from . import task_checklist
 from . import project_task
 from . import task_smart_report
+from . import task_smart_report_job
 from . import task_score_card
 from . import task_api_connector
 from . import task_git_integration
 from . import task_ai_assistant
+from . import task_ai_response_cache
 from . import task_unified_dashboard
 from . import task_analytics_report
+from . import task_user_workload
+from . import task_dependency_graph
+from . import task_search_index
+from . import task_duration_index
+from . import task_effort_model
 from . import task_sentiment_analyzer
 # Import task_hr_integration LAST to ensure nhan_vien model is available
 from . import task_hr_integration
+from . import task_git_linker
+from . import task_git_webhook
@@ -0,0 +1,305 @@
+# -*- coding: utf-8 -*-
+"""
+Lớp HTTP dùng chung cho các lời gọi Chat Completions (OpenAI hoặc server tương thích).
+
+Không phụ thuộc Odoo (chỉ cần `requests`) để có thể chạy thử với stub server
+(scripts/stub_openai_server.py, scripts/bench_ai_client.py).
+
+- Session keep-alive dùng chung trong process, một connection pool cho mỗi base URL
+- Token bucket giới hạn tốc độ + semaphore giới hạn số lời gọi đồng thời, theo từng assistant
+- Retry lũy thừa có jitter cho 429 / 5xx / lỗi mạng (tôn trọng header Retry-After)
+- Circuit breaker: lỗi liên tiếp → ngắt mạch, từ chối ngay trong thời gian hồi phục
+- Metrics theo assistant: số lời gọi, retry, latency, token
+"""
+
+import logging
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = 'https://api.openai.com/v1'
+
+# Mã HTTP được phép thử lại
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class AIClientError(Exception):
+    """Lỗi khi gọi API (status=None nếu lỗi mạng/timeout)"""
+
+    def __init__(self, message, status=None, timeout=False):
+        super().__init__(message)
+        self.status = status
+        self.timeout = timeout
+
+
+class CircuitOpenError(AIClientError):
+    """Mạch đang ngắt, lời gọi bị từ chối mà không gửi request"""
+
+
+class TokenBucket:
+    """Token bucket thread-safe: `rate` token/giây, tối đa `capacity` token"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(rate, 1))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout=None):
+        """Lấy 1 token, chờ nếu cần. Trả về False nếu quá `timeout` giây"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if deadline is not None and now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """
+    closed → open sau `failure_threshold` lời gọi lỗi liên tiếp; open → half_open
+    sau `reset_timeout` giây, cho đúng một lời gọi thử; thử thành công → closed.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == 'open':
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self.state = 'half_open'
+                self._probing = False
+            if self.state == 'half_open':
+                if self._probing:
+                    return False
+                self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == 'half_open' or self._failures >= self.failure_threshold:
+                if self.state != 'open':
+                    _logger.warning('AI client circuit opened after %d failures', self._failures)
+                self.state = 'open'
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+
+class ClientMetrics:
+    """Bộ đếm thread-safe cho một assistant trong process hiện tại"""
+
+    FIELDS = ('calls', 'successes', 'failures', 'retries', 'throttled', 'rejected',
+              'prompt_tokens', 'completion_tokens')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = dict.fromkeys(self.FIELDS, 0)
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+
+    def incr(self, name, value=1):
+        with self._lock:
+            self._values[name] += value
+
+    def observe_latency(self, seconds):
+        with self._lock:
+            self._latency_total += seconds
+            self._latency_max = max(self._latency_max, seconds)
+
+    def snapshot(self):
+        with self._lock:
+            data = dict(self._values)
+            finished = data['successes'] + data['failures']
+            data['avg_latency_ms'] = self._latency_total / finished * 1000 if finished else 0.0
+            data['max_latency_ms'] = self._latency_max * 1000
+            return data
+
+
+class ChatClient:
+    """
+    Client Chat Completions cho một assistant.
+
+    Trạng thái (bucket, semaphore, breaker, metrics) sống trong process; lấy qua
+    `ChatClient.get(key, ...)` để mọi request của cùng assistant dùng chung.
+    """
+
+    _sessions = {}
+    _clients = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, base_url=DEFAULT_BASE_URL, requests_per_minute=60, max_concurrency=4,
+                 timeout=30.0, max_retries=3, backoff_base=0.5, backoff_max=8.0,
+                 failure_threshold=5, reset_timeout=30.0):
+        self.base_url = (base_url or DEFAULT_BASE_URL).rstrip('/')
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.bucket = TokenBucket(requests_per_minute / 60.0, capacity=max(1, min(requests_per_minute, max_concurrency)))
+        self.semaphore = threading.BoundedSemaphore(max(1, max_concurrency))
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.metrics = ClientMetrics()
+        self.config = self._config(base_url, requests_per_minute, max_concurrency, timeout, max_retries,
+                                   backoff_base, backoff_max, failure_threshold, reset_timeout)
+
+    @staticmethod
+    def _config(base_url=DEFAULT_BASE_URL, requests_per_minute=60, max_concurrency=4,
+                timeout=30.0, max_retries=3, backoff_base=0.5, backoff_max=8.0,
+                failure_threshold=5, reset_timeout=30.0):
+        """Mọi tham số khởi tạo (cùng mặc định với __init__), dùng để so cấu hình client"""
+        return ((base_url or DEFAULT_BASE_URL).rstrip('/'), requests_per_minute, max_concurrency,
+                timeout, max_retries, backoff_base, backoff_max, failure_threshold, reset_timeout)
+
+    @classmethod
+    def get(cls, key, **kwargs):
+        """Client dùng chung cho `key`; tạo lại nếu bất kỳ tham số nào thay đổi (metrics được giữ)"""
+        config = cls._config(**kwargs)
+        with cls._registry_lock:
+            client = cls._clients.get(key)
+            if client is None or client.config != config:
+                new_client = cls(**kwargs)
+                if client is not None:
+                    new_client.metrics = client.metrics
+                client = cls._clients[key] = new_client
+            return client
+
+    @classmethod
+    def session(cls, base_url):
+        """Session keep-alive dùng chung trong process cho `base_url`"""
+        with cls._registry_lock:
+            session = cls._sessions.get(base_url)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32, max_retries=0)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                cls._sessions[base_url] = session
+            return session
+
+    def _backoff(self, attempt, retry_after=None):
+        """Thời gian chờ trước lần thử `attempt` (full jitter, không ngắn hơn Retry-After)"""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        if retry_after:
+            try:
+                delay = max(delay, min(float(retry_after), self.backoff_max))
+            except ValueError:
+                pass
+        return delay
+
+    def chat(self, api_key, payload):
+        """
+        Gửi một request chat completions.
+
+        Returns:
+            (content, usage) với usage = {'prompt_tokens', 'completion_tokens', 'latency_ms'}
+        Raises:
+            CircuitOpenError, AIClientError
+        """
+        metrics = self.metrics
+        metrics.incr('calls')
+        if not self.breaker.allow():
+            metrics.incr('rejected')
+            raise CircuitOpenError('AI service temporarily unavailable (circuit open)')
+
+        url = self.base_url + '/chat/completions'
+        headers = {
+            'Authorization': f'Bearer {api_key}',
+            'Content-Type': 'application/json',
+        }
+        session = self.session(self.base_url)
+        started = time.perf_counter()
+
+        with self.semaphore:
+            attempt = 0
+            while True:
+                self.bucket.acquire()
+                error = None
+                retry_after = None
+                try:
+                    response = session.post(url, headers=headers, json=payload, timeout=self.timeout)
+                except requests.exceptions.Timeout:
+                    error = AIClientError('request timed out', timeout=True)
+                except requests.exceptions.RequestException as e:
+                    error = AIClientError(str(e))
+                else:
+                    if response.status_code == 200:
+                        break
+                    if response.status_code == 429:
+                        metrics.incr('throttled')
+                    retry_after = response.headers.get('Retry-After')
+                    error = AIClientError(self._error_message(response), status=response.status_code)
+                    if response.status_code not in RETRY_STATUSES:
+                        # Lỗi phía request (4xx): service vẫn hoạt động, không tính vào breaker
+                        self._finish(started, success=False, service_ok=True)
+                        raise error
+
+                if attempt >= self.max_retries:
+                    self._finish(started, success=False)
+                    raise error
+                metrics.incr('retries')
+                time.sleep(self._backoff(attempt, retry_after))
+                attempt += 1
+
+        try:
+            result = response.json()
+            content = result['choices'][0]['message']['content']
+        except (ValueError, KeyError, IndexError, TypeError):
+            # 200 nhưng body không đúng định dạng: tính là lỗi service để breaker
+            # (kể cả lời gọi thử ở trạng thái half_open) không bị kẹt
+            self._finish(started, success=False)
+            raise AIClientError('invalid response: %s' % response.text[:300], status=response.status_code)
+        usage = result.get('usage') or {}
+        metrics.incr('prompt_tokens', usage.get('prompt_tokens', 0))
+        metrics.incr('completion_tokens', usage.get('completion_tokens', 0))
+        latency = self._finish(started, success=True)
+        return content, {
+            'prompt_tokens': usage.get('prompt_tokens', 0),
+            'completion_tokens': usage.get('completion_tokens', 0),
+            'latency_ms': latency * 1000,
+        }
+
+    def _finish(self, started, success, service_ok=None):
+        """Ghi metrics + trạng thái breaker cho một lời gọi đã kết thúc, trả về latency (giây)"""
+        latency = time.perf_counter() - started
+        self.metrics.observe_latency(latency)
+        self.metrics.incr('successes' if success else 'failures')
+        if success if service_ok is None else service_ok:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+        return latency
+
+    @staticmethod
+    def _error_message(response):
+        try:
+            return response.json().get('error', {}).get('message') or response.text
+        except ValueError:
+            return response.text
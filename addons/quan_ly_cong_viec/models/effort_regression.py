@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+Hồi quy thời gian thực hiện task (giờ) từ dữ liệu task đã đóng.
+
+Không phụ thuộc Odoo để chạy được đánh giá offline (scripts/eval_effort_model.py).
+
+- Đặc trưng: planned_hours, complexity, skill_level_required và lịch sử của
+  người được giao (số task đã đóng, tỷ lệ thực tế/dự kiến, giờ trung bình)
+- Mục tiêu: log(1 + actual_hours), dự đoán bằng expm1 (thời gian lệch phải)
+- Ridge regression giải bằng phương trình chuẩn; dùng NumPy nếu có, nếu không
+  thì khử Gauss thuần Python (số đặc trưng nhỏ)
+"""
+
+import math
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+COMPLEXITIES = ('easy', 'medium', 'hard', 'epic')
+
+FEATURE_NAMES = (
+    ['bias', 'log_planned', 'no_planned']
+    + ['complexity_%s' % c for c in COMPLEXITIES]
+    + ['skill_level', 'user_log_tasks', 'user_log_ratio', 'user_log_hours', 'no_history']
+)
+
+# Số task tối thiểu của người được giao để dùng lịch sử (ít hơn thì co về trung bình chung)
+HISTORY_PRIOR = 3.0
+
+
+def _log_ratio(planned_hours, actual_hours):
+    if planned_hours > 0 and actual_hours > 0:
+        return math.log(actual_hours / planned_hours)
+    return None
+
+
+def user_history(rows):
+    """
+    Thống kê theo người được giao từ task đã đóng.
+
+    rows: [(planned_hours, complexity, skill_level_required, user_ids, actual_hours)]
+    Returns: {user_id: [số task, tổng log(thực tế/dự kiến), số task có tỷ lệ, tổng log1p(thực tế)]}
+    """
+    history = {}
+    for planned, _complexity, _level, user_ids, actual in rows:
+        ratio = _log_ratio(planned or 0.0, actual or 0.0)
+        for user_id in user_ids or ():
+            stats = history.setdefault(user_id, [0, 0.0, 0, 0.0])
+            stats[0] += 1
+            stats[3] += math.log1p(actual or 0.0)
+            if ratio is not None:
+                stats[1] += ratio
+                stats[2] += 1
+    return history
+
+
+def featurize(rows, history, leave_one_out=False):
+    """
+    Ma trận đặc trưng (list các list, hoặc ndarray nếu có NumPy).
+
+    leave_one_out: khi huấn luyện, trừ đóng góp của chính task khỏi lịch sử
+    người được giao (tránh rò rỉ nhãn).
+    """
+    features = []
+    for planned, complexity, level, user_ids, actual in rows:
+        planned = planned or 0.0
+        own_ratio = _log_ratio(planned, actual or 0.0) if leave_one_out else None
+        own_log_hours = math.log1p(actual or 0.0) if leave_one_out else 0.0
+
+        tasks = ratio_sum = ratio_count = hours_sum = 0.0
+        for user_id in user_ids or ():
+            stats = history.get(user_id)
+            if not stats:
+                continue
+            tasks += stats[0] - (1 if leave_one_out else 0)
+            hours_sum += stats[3] - own_log_hours
+            ratio_sum += stats[1] - (own_ratio or 0.0)
+            ratio_count += stats[2] - (1 if own_ratio is not None else 0)
+
+        # Co về 0 (trung bình chung) khi lịch sử ít
+        shrink = tasks / (tasks + HISTORY_PRIOR) if tasks > 0 else 0.0
+        row = [
+            1.0,
+            math.log1p(planned),
+            0.0 if planned > 0 else 1.0,
+        ]
+        row += [1.0 if complexity == c else 0.0 for c in COMPLEXITIES]
+        row += [
+            float(level or 1) / 5.0,
+            math.log1p(max(tasks, 0.0)),
+            shrink * (ratio_sum / ratio_count) if ratio_count > 0 else 0.0,
+            shrink * (hours_sum / tasks) if tasks > 0 else 0.0,
+            0.0 if tasks > 0 else 1.0,
+        ]
+        features.append(row)
+    if np is not None:
+        return np.asarray(features, dtype=np.float64).reshape(len(features), len(FEATURE_NAMES))
+    return features
+
+
+def _solve(matrix, vector):
+    """Giải hệ tuyến tính nhỏ bằng khử Gauss có chọn phần tử trụ"""
+    n = len(vector)
+    a = [list(matrix[i]) + [vector[i]] for i in range(n)]
+    for col in range(n):
+        pivot = max(range(col, n), key=lambda r: abs(a[r][col]))
+        a[col], a[pivot] = a[pivot], a[col]
+        if abs(a[col][col]) < 1e-12:
+            continue
+        for r in range(col + 1, n):
+            factor = a[r][col] / a[col][col]
+            if factor:
+                for c in range(col, n + 1):
+                    a[r][c] -= factor * a[col][c]
+    x = [0.0] * n
+    for r in range(n - 1, -1, -1):
+        if abs(a[r][r]) < 1e-12:
+            continue
+        x[r] = (a[r][n] - sum(a[r][c] * x[c] for c in range(r + 1, n))) / a[r][r]
+    return x
+
+
+class EffortRegressor(object):
+    """Ridge regression trên log1p(giờ); hệ số bias không bị phạt"""
+
+    def __init__(self, coefficients=None, l2=1.0):
+        self.coefficients = list(coefficients) if coefficients is not None else None
+        self.l2 = l2
+
+    def fit(self, features, actual_hours):
+        targets = [math.log1p(max(h or 0.0, 0.0)) for h in actual_hours]
+        dim = len(FEATURE_NAMES)
+        if np is not None:
+            x = np.asarray(features, dtype=np.float64).reshape(len(targets), dim)
+            y = np.asarray(targets, dtype=np.float64)
+            penalty = np.eye(dim) * self.l2
+            penalty[0, 0] = 0.0
+            self.coefficients = np.linalg.solve(x.T @ x + penalty, x.T @ y).tolist()
+            return self
+
+        gram = [[0.0] * dim for _ in range(dim)]
+        rhs = [0.0] * dim
+        for row, target in zip(features, targets):
+            for i in range(dim):
+                if row[i]:
+                    rhs[i] += row[i] * target
+                    gram_i = gram[i]
+                    for j in range(dim):
+                        gram_i[j] += row[i] * row[j]
+        for i in range(1, dim):
+            gram[i][i] += self.l2
+        self.coefficients = _solve(gram, rhs)
+        return self
+
+    def predict(self, features):
+        """Số giờ dự đoán cho từng dòng (>= 0)"""
+        if self.coefficients is None:
+            raise ValueError('EffortRegressor chưa được huấn luyện')
+        if np is not None:
+            x = np.asarray(features, dtype=np.float64).reshape(-1, len(self.coefficients))
+            return np.expm1(np.clip(x @ np.asarray(self.coefficients), 0.0, 10.0)).tolist()
+        coefficients = self.coefficients
+        return [
+            math.expm1(min(max(sum(c * v for c, v in zip(coefficients, row)), 0.0), 10.0))
+            for row in features
+        ]
+
+
+def mean_absolute_error(predicted, actual):
+    if not actual:
+        return 0.0
+    return sum(abs(p - a) for p, a in zip(predicted, actual)) / len(actual)
@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+"""
+Client tải hàng loạt issue Jira / GitHub cho task.api.connector.sync_tasks.
+
+Không phụ thuộc Odoo: chỉ gọi HTTP và chuẩn hóa dữ liệu, việc ghi task do
+connector thực hiện trong transaction của nó.
+
+- Jira: POST search với JQL `key in (...)`, tối đa BATCH_SIZE key mỗi request
+- GitHub: GraphQL, mỗi request hỏi tối đa BATCH_SIZE issue/PR bằng alias
+  `issueOrPullRequest(number: n)` (task chỉ lưu URL nên không có node id để dùng `nodes`)
+- Các batch chạy song song trong thread pool giới hạn. Khi không có endpoint hàng loạt
+  (bulk=False, hoặc server trả 404/410 cho search / graphql) thì tải từng item qua REST
+  trong cùng thread pool
+"""
+
+import json
+import logging
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .git_sync_client import parse_datetime
+
+_logger = logging.getLogger(__name__)
+
+JIRA_KEY_RE = re.compile(r'^[A-Z][A-Z0-9_]*-\d+$')
+# .../owner/repo/issues/123 hoặc .../owner/repo/pull/123
+GITHUB_LINK_RE = re.compile(r'([^/\s]+)/([^/\s]+)/(?:issues|pull)/(\d+)')
+
+
+class ExternalSyncError(Exception):
+    """Lỗi khi gọi API ngoài (status=None nếu lỗi mạng/timeout)"""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class BulkUnsupported(ExternalSyncError):
+    """Server không có endpoint hàng loạt"""
+
+
+def jira_ref(ticket):
+    """Mã ticket Jira đã chuẩn hóa (chữ hoa, phần cuối URL), None nếu không hợp lệ"""
+    if not ticket:
+        return None
+    key = ticket.strip().rstrip('/').rsplit('/', 1)[-1].upper()
+    return key if JIRA_KEY_RE.match(key) else None
+
+
+def github_ref(link):
+    """(owner, repo, number) từ link issue / PR GitHub, None nếu không nhận ra"""
+    match = GITHUB_LINK_RE.search(link or '')
+    if not match:
+        return None
+    return match.group(1), match.group(2), int(match.group(3))
+
+
+class ExternalTaskClient(object):
+    """
+    Tải issue theo danh sách tham chiếu (mã Jira hoặc (owner, repo, number) GitHub).
+    Mỗi item trả về: {'name': ..., 'updated': datetime naive UTC, ['description': ...]}.
+    """
+
+    BATCH_SIZE = 100
+    # GraphQL của GitHub giới hạn độ phức tạp mỗi query
+    GRAPHQL_BATCH_SIZE = 50
+
+    def __init__(self, api_type, base_url, headers, max_workers=8, timeout=30, bulk=True):
+        if api_type not in ('jira', 'github'):
+            raise ExternalSyncError('Unsupported API type: %s' % api_type)
+        self.api_type = api_type
+        self.base_url = base_url.rstrip('/')
+        self.headers = headers
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self.bulk = bulk
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._lock = threading.Lock()
+        self.requests_made = 0
+        self.failed_requests = 0
+
+    def close(self):
+        self.session.close()
+
+    # ------------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------------
+
+    def _request(self, method, url, payload=None, params=None):
+        with self._lock:
+            self.requests_made += 1
+        try:
+            response = self.session.request(method, url, headers=self.headers, json=payload, params=params,
+                                            timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            with self._lock:
+                self.failed_requests += 1
+            raise ExternalSyncError('%s: %s' % (url, e))
+        if response.status_code >= 400:
+            with self._lock:
+                self.failed_requests += 1
+            raise ExternalSyncError('%s: %s - %s' % (url, response.status_code, response.text[:300]),
+                                    response.status_code)
+        return response.json() if response.text else {}
+
+    def _graphql_url(self):
+        # GitHub Enterprise: /api/v3 (REST) ↔ /api/graphql
+        if self.base_url.endswith('/api/v3'):
+            return self.base_url[:-len('/v3')] + '/graphql'
+        return self.base_url + '/graphql'
+
+    # ------------------------------------------------------------------
+    # Điều phối
+    # ------------------------------------------------------------------
+
+    def fetch(self, refs):
+        """
+        Tải các `refs` (trùng lặp được bỏ).
+
+        Returns:
+            (found, errors): {ref: item}, {ref: thông báo lỗi}. Ref không tồn tại trên
+            server (hoặc không có quyền) không có trong cả hai.
+        """
+        refs = list(dict.fromkeys(refs))
+        if self.bulk:
+            size = self.BATCH_SIZE if self.api_type == 'jira' else self.GRAPHQL_BATCH_SIZE
+            try:
+                return self._run(self._fetch_batch, [refs[i:i + size] for i in range(0, len(refs), size)])
+            except BulkUnsupported as e:
+                _logger.info('Bulk endpoint unavailable (%s), fetching items one by one', e)
+                self.bulk = False
+        return self._run(self._fetch_single, [[ref] for ref in refs])
+
+    def _run(self, fetch, batches):
+        found, errors = {}, {}
+        if not batches:
+            return found, errors
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(batches))) as pool:
+            futures = [(batch, pool.submit(fetch, batch)) for batch in batches]
+        for batch, future in futures:
+            try:
+                found.update(future.result())
+            except BulkUnsupported:
+                raise
+            except ExternalSyncError as e:
+                errors.update(dict.fromkeys(batch, str(e)))
+        return found, errors
+
+    def _fetch_batch(self, refs):
+        if self.api_type == 'jira':
+            return self._fetch_jira_batch(refs)
+        return self._fetch_github_batch(refs)
+
+    def _fetch_single(self, refs):
+        ref = refs[0]
+        try:
+            if self.api_type == 'jira':
+                raw = self._request('GET', '%s/issue/%s' % (self.base_url, ref),
+                                    params={'fields': 'summary,description,updated'})
+                return {ref: self._normalize_jira(raw)}
+            owner, repo, number = ref
+            raw = self._request('GET', '%s/repos/%s/%s/issues/%d' % (self.base_url, owner, repo, number))
+            return {ref: {'name': raw.get('title') or '', 'updated': parse_datetime(raw.get('updated_at'))}}
+        except ExternalSyncError as e:
+            if e.status == 404:
+                return {}
+            raise
+
+    # ------------------------------------------------------------------
+    # Jira
+    # ------------------------------------------------------------------
+
+    def _fetch_jira_batch(self, keys):
+        """JQL key in (...), phân trang theo startAt nếu server giới hạn maxResults thấp hơn"""
+        payload = {
+            'jql': 'key in (%s)' % ', '.join('"%s"' % key for key in keys),
+            'fields': ['summary', 'description', 'updated'],
+            'maxResults': len(keys),
+            # Key không tồn tại chỉ sinh cảnh báo thay vì làm lỗi cả query
+            'validateQuery': 'warn',
+            'startAt': 0,
+        }
+        found = {}
+        while True:
+            try:
+                data = self._request('POST', '%s/search' % self.base_url, payload)
+            except ExternalSyncError as e:
+                if e.status in (404, 405, 410):
+                    raise BulkUnsupported(str(e), e.status)
+                raise
+            issues = data.get('issues') or []
+            for raw in issues:
+                found[(raw.get('key') or '').upper()] = self._normalize_jira(raw)
+            payload['startAt'] += len(issues)
+            if not issues or payload['startAt'] >= (data.get('total') or 0):
+                return found
+
+    @staticmethod
+    def _normalize_jira(raw):
+        fields = raw.get('fields') or {}
+        item = {'name': fields.get('summary') or '', 'updated': parse_datetime(fields.get('updated'))}
+        if fields.get('description'):
+            item['description'] = fields['description']
+        return item
+
+    # ------------------------------------------------------------------
+    # GitHub
+    # ------------------------------------------------------------------
+
+    def _fetch_github_batch(self, refs):
+        """Một query GraphQL cho cả batch: mỗi repository một alias rN, mỗi issue một alias iN"""
+        by_repo = {}
+        for ref in refs:
+            by_repo.setdefault(ref[:2], []).append(ref[2])
+        parts, aliases = [], {}
+        for r, ((owner, repo), numbers) in enumerate(by_repo.items()):
+            fields = []
+            for number in sorted(set(numbers)):
+                aliases[('r%d' % r, 'i%d' % number)] = (owner, repo, number)
+                fields.append('i%d: issueOrPullRequest(number: %d) '
+                              '{ ... on Issue { title updatedAt } ... on PullRequest { title updatedAt } }'
+                              % (number, number))
+            parts.append('r%d: repository(owner: %s, name: %s) { %s }' % (
+                r, json.dumps(owner), json.dumps(repo), ' '.join(fields)))
+
+        try:
+            data = self._request('POST', self._graphql_url(), {'query': 'query { %s }' % ' '.join(parts)})
+        except ExternalSyncError as e:
+            if e.status in (404, 410):
+                raise BulkUnsupported(str(e), e.status)
+            raise
+        result = data.get('data')
+        if result is None:
+            # Lỗi toàn query (cú pháp, quyền...); lỗi từng item (NOT_FOUND) vẫn có data
+            raise ExternalSyncError('GraphQL: %s' % json.dumps(data.get('errors'))[:300])
+
+        found = {}
+        for (repo_alias, issue_alias), ref in aliases.items():
+            node = (result.get(repo_alias) or {}).get(issue_alias)
+            if node:
+                found[ref] = {'name': node.get('title') or '', 'updated': parse_datetime(node.get('updatedAt'))}
+        return found
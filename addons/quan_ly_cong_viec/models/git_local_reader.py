@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+Đọc lịch sử commit từ một bản clone trên đĩa bằng `git log --numstat` dạng stream.
+
+Không phụ thuộc Odoo và không cần mạng. Output của git được đọc từng dòng và
+mỗi commit được trả về ngay khi đọc xong, nên bộ nhớ không tăng theo số commit.
+Commit được trả theo thứ tự cũ → mới để có thể tiếp tục từ sha cuối đã nhập.
+"""
+
+import logging
+import os
+import subprocess
+
+from .git_sync_client import GitSyncError, parse_datetime
+
+_logger = logging.getLogger(__name__)
+
+# Ký tự phân cách không xuất hiện trong nội dung commit
+_RECORD = '\x1e'
+_FIELD = '\x1f'
+_END_MESSAGE = '\x1d'
+
+LOG_FORMAT = '%x1e%H%x1f%an%x1f%ae%x1f%aI%x1f%B%x1d'
+
+
+class LocalGitReader(object):
+    """Đọc commit / branch từ repository tại `path`"""
+
+    def __init__(self, path, git_bin='git'):
+        self.path = path
+        self.git_bin = git_bin
+
+    def _git(self, *args):
+        # Không chạy hook / textconv / diff ngoài do cấu hình của repository khai báo
+        return [self.git_bin, '-C', self.path, '-c', 'core.quotepath=off', '-c', 'core.hooksPath=/dev/null',
+                '-c', 'core.fsmonitor=false'] + list(args)
+
+    def _run(self, *args):
+        try:
+            return subprocess.run(
+                self._git(*args), check=True, capture_output=True, text=True, encoding='utf-8', errors='replace',
+            ).stdout
+        except (OSError, subprocess.CalledProcessError) as e:
+            raise GitSyncError('git %s: %s' % (' '.join(args), getattr(e, 'stderr', None) or e))
+
+    def check(self):
+        """Ném GitSyncError nếu `path` không phải repository git"""
+        if not self.path or not os.path.isdir(self.path):
+            raise GitSyncError('Local repository not found: %s' % self.path)
+        self._run('rev-parse', '--git-dir')
+
+    def has_commit(self, sha):
+        try:
+            self._run('cat-file', '-e', '%s^{commit}' % sha)
+        except GitSyncError:
+            return False
+        return True
+
+    def branches(self):
+        """[{'name', 'protected'}] của các branch local"""
+        return [
+            {'name': name, 'protected': False}
+            for name in self._run('for-each-ref', '--format=%(refname:short)', 'refs/heads').split('\n') if name
+        ]
+
+    def iter_commits(self, since_sha=None, rev='HEAD'):
+        """
+        Commit chưa nhập (since_sha..rev, cũ → mới), mỗi commit là dict theo field của
+        task.git.commit kèm files_changed / additions / deletions từ --numstat.
+
+        Nếu since_sha không còn trong repository (rewrite history) thì đọc lại toàn bộ.
+        """
+        if not self.has_commit(rev):
+            # Repository chưa có commit nào
+            return
+        if since_sha and not self.has_commit(since_sha):
+            _logger.warning('Commit %s not found in %s, reading full history', since_sha, self.path)
+            since_sha = None
+        revision = '%s..%s' % (since_sha, rev) if since_sha else rev
+        try:
+            process = subprocess.Popen(
+                self._git('log', '--reverse', '--numstat', '--no-renames', '--no-textconv', '--no-ext-diff',
+                          '--format=' + LOG_FORMAT, revision),
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                text=True, encoding='utf-8', errors='replace', bufsize=1 << 16,
+            )
+        except OSError as e:
+            raise GitSyncError('git log: %s' % e)
+
+        try:
+            for commit in self._parse(process.stdout):
+                yield commit
+        finally:
+            process.stdout.close()
+            stderr = process.stderr.read()
+            process.stderr.close()
+            returncode = process.wait()
+        if returncode:
+            raise GitSyncError('git log: %s' % stderr.strip())
+
+    @staticmethod
+    def _parse(lines):
+        """Máy trạng thái trên từng dòng output của git log (xem LOG_FORMAT)"""
+        commit = None
+        message = None
+        for line in lines:
+            if message is not None:
+                # Đang đọc thân commit (nhiều dòng) tới ký tự kết thúc
+                end = line.find(_END_MESSAGE)
+                if end < 0:
+                    message.append(line)
+                    continue
+                message.append(line[:end])
+                commit['message'] = ''.join(message).strip()
+                message = None
+                continue
+
+            if line.startswith(_RECORD):
+                if commit is not None:
+                    yield commit
+                sha, name, email, date, body = line[1:].split(_FIELD, 4)
+                commit = {
+                    'sha': sha,
+                    'author_name': name,
+                    'author_email': email,
+                    'commit_date': parse_datetime(date),
+                    'url': None,
+                    'files_changed': 0,
+                    'additions': 0,
+                    'deletions': 0,
+                }
+                end = body.find(_END_MESSAGE)
+                if end < 0:
+                    message = [body]
+                else:
+                    commit['message'] = body[:end].strip()
+                continue
+
+            # Dòng numstat: "<thêm>\t<xóa>\t<đường dẫn>" ('-' với file nhị phân)
+            parts = line.split('\t', 2)
+            if commit is not None and len(parts) == 3:
+                commit['files_changed'] += 1
+                if parts[0] != '-':
+                    commit['additions'] += int(parts[0])
+                if parts[1] != '-':
+                    commit['deletions'] += int(parts[1])
+        if commit is not None:
+            yield commit
@@ -0,0 +1,323 @@
+# -*- coding: utf-8 -*-
+"""
+Client REST đồng bộ tăng dần cho GitHub / GitLab (commits, branches, PR/MR, issues).
+
+Không phụ thuộc Odoo: chỉ gọi HTTP và chuẩn hóa dữ liệu, việc ghi vào database
+do task.git.integration thực hiện trong transaction của nó.
+
+- Phân trang theo header Link (rel="next"), GitHub và GitLab đều trả về
+- Request có điều kiện: If-None-Match với ETag của trang đầu lần trước → 304
+  không tốn dữ liệu (và không tính vào rate limit của GitHub)
+- Lọc theo mốc thời gian (`since` / `updated_after`) từ con trỏ của lần trước
+- Các loại tài nguyên được tải song song trong thread pool
+"""
+
+import logging
+import re
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+_logger = logging.getLogger(__name__)
+
+SYNC_RESOURCES = ('commits', 'branches', 'pulls', 'issues')
+
+API_BASE_URLS = {
+    'github': 'https://api.github.com',
+    'gitlab': 'https://gitlab.com/api/v4',
+}
+
+
+# Múi giờ dạng +0700 (không có dấu hai chấm)
+_OFFSET_RE = re.compile(r'([+-]\d{2})(\d{2})$')
+
+
+class GitSyncError(Exception):
+    """Lỗi khi gọi API Git (status=None nếu lỗi mạng/timeout)"""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_datetime(value):
+    """
+    '2026-01-13T15:44:27Z' / '2026-01-13T15:44:27.000+00:00' / '2026-01-13 15:44:27 UTC' /
+    '2026-01-13T15:44:27.000+0700' (Jira) → datetime naive UTC (None nếu lỗi)
+    """
+    if not value:
+        return None
+    value = _OFFSET_RE.sub(r'\1:\2', value.replace('Z', '+00:00').replace(' UTC', '+00:00'))
+    try:
+        dt = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if dt.tzinfo is not None:
+        dt = (dt - dt.utcoffset()).replace(tzinfo=None)
+    return dt.replace(microsecond=0)
+
+
+def _format_cursor(dt):
+    return dt.strftime('%Y-%m-%dT%H:%M:%SZ') if dt else None
+
+
+class FetchResult(object):
+    """Kết quả tải một loại tài nguyên"""
+
+    def __init__(self, resource, items=None, etag=None, cursor=None,
+                 not_modified=False, complete=False, truncated=False, requests_made=0, received=None):
+        self.resource = resource
+        self.items = items or []
+        # Số item đã nhận (khác len(items) khi item được ghi theo từng chunk rồi bỏ)
+        self._received = received
+        self.etag = etag
+        # Mốc thời gian lớn nhất đã thấy (ISO, dùng làm since lần sau)
+        self.cursor = cursor
+        self.not_modified = not_modified
+        # True nếu items là toàn bộ danh sách (cho phép xóa dòng không còn trên server)
+        self.complete = complete
+        # True nếu dừng vì max_pages (chưa tải hết phần thay đổi)
+        self.truncated = truncated
+        self.requests_made = requests_made
+
+    @property
+    def received(self):
+        return len(self.items) if self._received is None else self._received
+
+
+class GitRestClient(object):
+    """Tải tài nguyên của một repository theo trạng thái đồng bộ lần trước"""
+
+    _sessions = {}
+    _sessions_lock = threading.Lock()
+
+    def __init__(self, platform, repository, token, base_url=None, per_page=100,
+                 timeout=30, max_pages=None):
+        if platform not in API_BASE_URLS:
+            raise GitSyncError('Unsupported platform: %s' % platform)
+        self.platform = platform
+        self.repository = repository
+        self.token = token
+        self.base_url = (base_url or API_BASE_URLS[platform]).rstrip('/')
+        self.per_page = per_page
+        self.timeout = timeout
+        self.max_pages = max_pages
+
+    @classmethod
+    def session(cls, base_url):
+        """Session keep-alive dùng chung trong process cho `base_url`"""
+        with cls._sessions_lock:
+            session = cls._sessions.get(base_url)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=0)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                cls._sessions[base_url] = session
+            return session
+
+    # ------------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------------
+
+    def _headers(self):
+        if self.platform == 'github':
+            return {'Authorization': 'token %s' % self.token, 'Accept': 'application/vnd.github.v3+json'}
+        return {'PRIVATE-TOKEN': self.token}
+
+    def _url(self, endpoint):
+        if self.platform == 'github':
+            return '%s/repos/%s%s' % (self.base_url, self.repository, endpoint)
+        return '%s/projects/%s%s' % (self.base_url, urllib.parse.quote(self.repository, safe=''), endpoint)
+
+    def _get(self, url, params=None, etag=None):
+        headers = self._headers()
+        if etag:
+            headers['If-None-Match'] = etag
+        try:
+            response = self.session(self.base_url).get(url, headers=headers, params=params, timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            raise GitSyncError('%s: %s' % (url, e))
+        if response.status_code == 304:
+            return response
+        if response.status_code == 403 and response.headers.get('X-RateLimit-Remaining') == '0':
+            reset = int(response.headers.get('X-RateLimit-Reset') or 0)
+            raise GitSyncError('Rate limit exceeded, resets in %ds' % max(0, reset - int(time.time())), 403)
+        if response.status_code != 200:
+            raise GitSyncError('%s: %s - %s' % (url, response.status_code, response.text[:300]),
+                               response.status_code)
+        return response
+
+    def _paginate(self, resource, endpoint, params, etag=None, stop=None):
+        """
+        Tải lần lượt các trang theo Link rel="next".
+
+        Args:
+            etag: ETag trang đầu lần trước; server trả 304 → FetchResult.not_modified
+            stop: hàm(item thô) → True thì dừng (danh sách sắp theo thời gian giảm dần)
+        """
+        url = self._url(endpoint)
+        params = dict(params, per_page=self.per_page)
+        response = self._get(url, params, etag)
+        if response.status_code == 304:
+            return FetchResult(resource, etag=etag, not_modified=True, requests_made=1)
+
+        result = FetchResult(resource, etag=response.headers.get('ETag'), complete=True)
+        pages = 0
+        while True:
+            pages += 1
+            stopped = False
+            for raw in response.json():
+                if stop and stop(raw):
+                    stopped = True
+                    break
+                result.items.append(raw)
+            next_url = response.links.get('next', {}).get('url')
+            if stopped or not next_url:
+                result.complete = not stopped and result.complete
+                break
+            if self.max_pages and pages >= self.max_pages:
+                result.complete = False
+                result.truncated = True
+                break
+            # URL của rel="next" đã chứa sẵn query string
+            response = self._get(next_url)
+        result.requests_made = pages
+        return result
+
+    # ------------------------------------------------------------------
+    # Tài nguyên
+    # ------------------------------------------------------------------
+
+    def fetch(self, resource, state=None):
+        """
+        Tải `resource` ('commits', 'branches', 'pulls', 'issues') kể từ `state`
+        ({'etag': ..., 'cursor': ...} của lần trước). Items đã chuẩn hóa theo field của model.
+        """
+        state = state or {}
+        etag, cursor = state.get('etag'), state.get('cursor')
+        github = self.platform == 'github'
+        since = parse_datetime(cursor)
+
+        if resource == 'commits':
+            params = {'since': cursor} if cursor else {}
+            if not github:
+                # Số dòng thêm / xóa của từng commit (GitHub chỉ có ở API chi tiết từng commit)
+                params['with_stats'] = 'true'
+            result = self._paginate(resource, '/commits' if github else '/repository/commits', params, etag)
+            # `since` lọc theo ngày commit (committer), không theo ngày tác giả (commit_date)
+            normalize, stamp = self._normalize_commit, 'committed_at'
+        elif resource == 'branches':
+            # Không có bộ lọc thời gian: luôn lấy toàn bộ, ETag tránh tải lại khi không đổi
+            result = self._paginate(resource, '/branches' if github else '/repository/branches', {}, etag)
+            normalize, stamp = self._normalize_branch, None
+        elif resource == 'pulls':
+            if github:
+                # /pulls không có since: sắp theo updated giảm dần và dừng khi cũ hơn con trỏ
+                params = {'state': 'all', 'sort': 'updated', 'direction': 'desc'}
+                stop = (lambda raw: (parse_datetime(raw.get('updated_at')) or since) < since) if since else None
+                result = self._paginate(resource, '/pulls', params, etag, stop)
+            else:
+                params = {'state': 'all', 'order_by': 'updated_at'}
+                if cursor:
+                    params['updated_after'] = cursor
+                result = self._paginate(resource, '/merge_requests', params, etag)
+            normalize, stamp = self._normalize_pull, 'updated_at'
+        elif resource == 'issues':
+            params = {'state': 'all'}
+            if cursor:
+                params['since' if github else 'updated_after'] = cursor
+            result = self._paginate(resource, '/issues', params, etag)
+            normalize, stamp = self._normalize_issue, 'updated_at'
+        else:
+            raise GitSyncError('Unknown resource: %s' % resource)
+
+        if result.not_modified:
+            result.cursor = cursor
+            return result
+
+        items = [normalize(raw) for raw in result.items]
+        result.items = [item for item in items if item]
+        if result.truncated:
+            # Chưa tải hết: giữ con trỏ cũ để lần sau tải lại phần còn thiếu
+            result.etag, result.cursor = None, cursor
+            return result
+        stamps = [item[stamp] for item in result.items if stamp and item.get(stamp)]
+        latest = max(stamps) if stamps else None
+        result.cursor = _format_cursor(max(latest, since) if latest and since else latest or since)
+        return result
+
+    def fetch_many(self, resources, states, max_workers=4):
+        """
+        Tải nhiều loại tài nguyên song song. Chỉ gọi HTTP trong thread, không chạm ORM.
+
+        Returns:
+            {resource: FetchResult}; lỗi của một loại được ném lại sau khi các loại khác xong
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {resource: pool.submit(self.fetch, resource, states.get(resource)) for resource in resources}
+        return {resource: future.result() for resource, future in futures.items()}
+
+    # ------------------------------------------------------------------
+    # Chuẩn hóa theo field của task.git.*
+    # ------------------------------------------------------------------
+
+    def _normalize_commit(self, raw):
+        if self.platform == 'github':
+            info = raw.get('commit') or {}
+            author = info.get('author') or {}
+            return {
+                'sha': raw.get('sha') or '',
+                'message': info.get('message') or '',
+                'author_name': author.get('name') or '',
+                'author_email': author.get('email') or '',
+                # Tài khoản GitHub của tác giả (None nếu email không gắn với tài khoản nào)
+                'author_login': (raw.get('author') or {}).get('login'),
+                'commit_date': parse_datetime(author.get('date')),
+                # Chỉ dùng cho con trỏ đồng bộ (không phải cột của task.git.commit)
+                'committed_at': parse_datetime((info.get('committer') or {}).get('date')),
+                'url': raw.get('html_url') or '',
+            }
+        item = {
+            'sha': raw.get('id') or '',
+            'message': raw.get('message') or '',
+            'author_name': raw.get('author_name') or '',
+            'author_email': raw.get('author_email') or '',
+            'commit_date': parse_datetime(raw.get('created_at')),
+            'committed_at': parse_datetime(raw.get('committed_date')),
+            'url': raw.get('web_url') or '',
+        }
+        stats = raw.get('stats')
+        if stats:
+            item['additions'] = stats.get('additions') or 0
+            item['deletions'] = stats.get('deletions') or 0
+        return item
+
+    def _normalize_branch(self, raw):
+        return {'name': raw.get('name') or '', 'protected': bool(raw.get('protected'))}
+
+    def _normalize_pull(self, raw):
+        github = self.platform == 'github'
+        author = raw.get('user' if github else 'author') or {}
+        return {
+            'number': raw.get('number' if github else 'iid') or 0,
+            'title': raw.get('title') or '',
+            'state': raw.get('state') or ('open' if github else 'opened'),
+            'author': author.get('login' if github else 'username') or '',
+            'created_at': parse_datetime(raw.get('created_at')),
+            'updated_at': parse_datetime(raw.get('updated_at')),
+            'merged_at': parse_datetime(raw.get('merged_at')),
+            'closed_at': parse_datetime(raw.get('closed_at')),
+            'url': raw.get('html_url' if github else 'web_url') or '',
+        }
+
+    def _normalize_issue(self, raw):
+        # GitHub trả cả pull request trong /issues
+        if self.platform == 'github' and 'pull_request' in raw:
+            return None
+        return self._normalize_pull(raw)
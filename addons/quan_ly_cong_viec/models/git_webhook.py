@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+Xác thực và chuyển đổi webhook GitHub / GitLab thành thay đổi của task.git.*.
+
+Không phụ thuộc Odoo: controller chỉ xác thực chữ ký và đưa sự kiện vào hàng đợi,
+task.git.webhook.event dùng `parse_event` để lấy các FetchResult rồi upsert như
+khi đồng bộ qua REST. Payload mẫu để phát lại nằm trong scripts/fixtures/git_webhooks.
+
+Push event chỉ mang tối đa PUSH_COMMIT_LIMIT commit và không có số dòng thay đổi. Khi
+push có thể bị cắt (và với GitLab, khi có commit mới, vì REST trả được số dòng qua
+with_stats) sự kiện đánh dấu needs_commit_sync để integration chạy đồng bộ commit tăng
+dần bằng REST. GitHub REST liệt kê commit cũng không có số dòng thay đổi, nên commit
+GitHub nhập qua webhook / REST có additions = deletions = 0 (chỉ bản clone local có đủ).
+"""
+
+import hashlib
+import hmac
+
+from .git_sync_client import FetchResult, GitRestClient, parse_datetime
+
+# Sha "rỗng" của GitLab khi branch bị xóa
+NULL_SHA = '0' * 40
+# Số commit tối đa trong payload push của GitHub / GitLab
+PUSH_COMMIT_LIMIT = 20
+BRANCH_REF_PREFIX = 'refs/heads/'
+
+
+class WebhookEvent(object):
+    """Thay đổi suy ra từ một sự kiện webhook"""
+
+    def __init__(self, results=None, deleted_branches=None, needs_commit_sync=False):
+        # [FetchResult] để upsert (mỗi result chỉ chứa các cột biết chắc từ payload)
+        self.results = results or []
+        self.deleted_branches = deleted_branches or []
+        # Commit trong payload chưa đủ (push bị cắt / thiếu số dòng): cần đồng bộ commit qua REST
+        self.needs_commit_sync = needs_commit_sync
+
+    def __bool__(self):
+        return bool(self.results or self.deleted_branches)
+
+
+def event_headers(platform, headers):
+    """(tên sự kiện, delivery id) từ header của request; delivery id dùng để bỏ bản trùng"""
+    if platform == 'github':
+        return headers.get('X-GitHub-Event'), headers.get('X-GitHub-Delivery')
+    return headers.get('X-Gitlab-Event'), headers.get('X-Gitlab-Event-UUID')
+
+
+def verify_signature(platform, secret, headers, body):
+    """
+    GitHub: X-Hub-Signature-256 = 'sha256=' + HMAC-SHA256(secret, body).
+    GitLab: X-Gitlab-Token = secret. So sánh thời gian hằng.
+    """
+    if not secret:
+        return False
+    if platform == 'github':
+        expected = 'sha256=' + hmac.new(secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+        return hmac.compare_digest(expected, headers.get('X-Hub-Signature-256') or '')
+    return hmac.compare_digest(secret, headers.get('X-Gitlab-Token') or '')
+
+
+def sign(secret, body):
+    """Header chữ ký GitHub cho `body` (dùng khi phát lại fixture)"""
+    return 'sha256=' + hmac.new(secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+
+
+def repository_name(platform, payload):
+    """owner/repo của payload (so với task.git.integration.name)"""
+    if platform == 'github':
+        return (payload.get('repository') or {}).get('full_name')
+    return (payload.get('project') or {}).get('path_with_namespace')
+
+
+def parse_event(platform, event, payload):
+    """
+    Chuyển payload thành WebhookEvent. Sự kiện không liên quan (ping, tag, comment...)
+    trả về WebhookEvent rỗng.
+    """
+    if platform == 'github':
+        if event == 'push':
+            return _parse_push(platform, payload, deleted=bool(payload.get('deleted')))
+        if event == 'pull_request':
+            item = GitRestClient(platform, None, None)._normalize_pull(payload.get('pull_request') or {})
+            return WebhookEvent([FetchResult('pulls', [item])])
+        if event == 'issues':
+            # GitHub không gửi issues event cho pull request, nhưng vẫn lọc như REST
+            item = GitRestClient(platform, None, None)._normalize_issue(payload.get('issue') or {})
+            return WebhookEvent([FetchResult('issues', [item])] if item else [])
+        if event in ('create', 'delete') and payload.get('ref_type') == 'branch':
+            if event == 'delete':
+                return WebhookEvent(deleted_branches=[payload.get('ref')])
+            return WebhookEvent([FetchResult('branches', [{'name': payload.get('ref')}])])
+        return WebhookEvent()
+
+    if event == 'Push Hook':
+        return _parse_push(platform, payload, deleted=payload.get('after') == NULL_SHA)
+    if event == 'Merge Request Hook':
+        return WebhookEvent([FetchResult('pulls', [_gitlab_object(payload)])])
+    if event == 'Issue Hook':
+        return WebhookEvent([FetchResult('issues', [_gitlab_object(payload)])])
+    return WebhookEvent()
+
+
+def _parse_push(platform, payload, deleted):
+    ref = payload.get('ref') or ''
+    if not ref.startswith(BRANCH_REF_PREFIX):
+        # Push tag
+        return WebhookEvent()
+    branch = ref[len(BRANCH_REF_PREFIX):]
+    if deleted:
+        return WebhookEvent(deleted_branches=[branch])
+
+    commits = [_normalize_push_commit(platform, raw) for raw in payload.get('commits') or []]
+    if platform == 'github':
+        truncated = len(commits) >= PUSH_COMMIT_LIMIT
+    else:
+        truncated = (payload.get('total_commits_count') or 0) > len(commits)
+    # Branch mới được thêm nếu chưa có, giữ nguyên cờ protected nếu đã có
+    results = [FetchResult('branches', [{'name': branch}])]
+    if commits:
+        results.append(FetchResult('commits', commits))
+    return WebhookEvent(results, needs_commit_sync=truncated or (platform == 'gitlab' and bool(commits)))
+
+
+def _normalize_push_commit(platform, raw):
+    """Commit trong push event (không có số dòng thay đổi, các cột đó được giữ nguyên)"""
+    author = raw.get('author') or {}
+    item = {
+        'sha': raw.get('id') or '',
+        'message': raw.get('message') or '',
+        'author_name': author.get('name') or '',
+        'author_email': author.get('email') or '',
+        'commit_date': parse_datetime(raw.get('timestamp')),
+        'url': raw.get('url') or '',
+    }
+    if platform == 'github':
+        item['author_login'] = author.get('username')
+    return item
+
+
+def _gitlab_object(payload):
+    """object_attributes của Merge Request Hook / Issue Hook theo field của task.git.*"""
+    attrs = payload.get('object_attributes') or {}
+    action = attrs.get('action')
+    item = {
+        'number': attrs.get('iid') or 0,
+        'title': attrs.get('title') or '',
+        'state': attrs.get('state') or 'opened',
+        'created_at': parse_datetime(attrs.get('created_at')),
+        'updated_at': parse_datetime(attrs.get('updated_at')),
+        'url': attrs.get('url') or '',
+    }
+    # payload['user'] là người thực hiện hành động, chỉ là tác giả khi mở mới
+    if action == 'open':
+        item['author'] = (payload.get('user') or {}).get('username') or ''
+    if payload.get('object_kind') == 'merge_request':
+        if action == 'merge':
+            item['merged_at'] = parse_datetime(attrs.get('merged_at')) or item['updated_at']
+        if action == 'close':
+            item['closed_at'] = parse_datetime(attrs.get('closed_at')) or item['updated_at']
+    return item
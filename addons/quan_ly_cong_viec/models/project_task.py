@@ -1,11 +1,81 @@
 # -*- coding: utf-8 -*-
 
-from odoo import models, fields, api, _
+from odoo import models, fields, api, tools, _
 from odoo.exceptions import UserError, ValidationError
+from psycopg2.extras import execute_values
+from collections import defaultdict
 import logging
+import threading
+
+from .task_user_workload import WORKLOAD_FIELDS
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 _logger = logging.getLogger(__name__)
 
+# Các field của task ảnh hưởng tới bảng rollup task_analytics_report
+ANALYTICS_ROLLUP_FIELDS = {'stage_id', 'project_id', 'user_ids', 'priority', 'date_deadline', 'active'}
+
+# Cột đầu vào của điểm rủi ro, theo thứ tự tham số của _risk_score
+RISK_INPUT_FIELDS = ['bug_count', 'rework_count', 'planned_hours', 'actual_hours', 'blocker_flag', 'sentiment_score']
+
+
+def _risk_score(bug_count, rework_count, planned_hours, actual_hours, blocker_flag, sentiment_score):
+    """Điểm rủi ro (0-100) của một task"""
+    risk_score = 0.0
+    
+    # Bug nhiều = rủi ro cao
+    if bug_count > 5:
+        risk_score += 30
+    elif bug_count > 2:
+        risk_score += 15
+    
+    # Rework nhiều = rủi ro cao
+    if rework_count > 3:
+        risk_score += 25
+    elif rework_count > 1:
+        risk_score += 10
+    
+    # Vượt deadline = rủi ro
+    if planned_hours > 0 and actual_hours > planned_hours * 1.5:
+        risk_score += 20
+    
+    # Blocker = rủi ro
+    if blocker_flag:
+        risk_score += 15
+    
+    # Sentiment tiêu cực
+    if sentiment_score and sentiment_score < -0.3:
+        risk_score += 10
+    
+    return min(risk_score, 100)
+
+
+def _risk_scores(rows):
+    """
+    Điểm rủi ro cho nhiều task: rows = [(bug_count, rework_count, planned_hours,
+    actual_hours, blocker_flag, sentiment_score)]. Dùng NumPy nếu có, cùng quy tắc với _risk_score.
+    """
+    if np is None:
+        return [_risk_score(*(value or 0 for value in row)) for row in rows]
+    if not rows:
+        return []
+    
+    data = np.array(rows, dtype=float)  # NULL (None) -> nan
+    data = np.nan_to_num(data)
+    bug, rework, planned, actual, blocker, sentiment = data.T
+    
+    score = np.where(bug > 5, 30, np.where(bug > 2, 15, 0)).astype(float)
+    score += np.where(rework > 3, 25, np.where(rework > 1, 10, 0))
+    score += np.where((planned > 0) & (actual > planned * 1.5), 20, 0)
+    score += np.where(blocker != 0, 15, 0)
+    score += np.where(sentiment < -0.3, 10, 0)
+    return np.minimum(score, 100).tolist()
+
+
 
 class ProjectTask(models.Model):
     _inherit = 'project.task'
@@ -18,6 +88,21 @@ class ProjectTask(models.Model):
         help='Lịch sử các lần nhân viên báo cáo công việc'
     )
     
+    latest_report_id = fields.Many2one(
+        'task.smart.report',
+        string='Báo cáo Mới nhất',
+        compute='_compute_latest_report',
+        store=True,
+        help='Báo cáo tiến độ gần nhất của task'
+    )
+    
+    latest_report_progress = fields.Integer(
+        string='% Hoàn thành (Báo cáo mới nhất)',
+        compute='_compute_latest_report',
+        store=True,
+        help='SNAPSHOT % hoàn thành của báo cáo gần nhất'
+    )
+    
     checklist_ids = fields.One2many(
         'task.checklist',
         'task_id',
@@ -160,10 +245,19 @@ class ProjectTask(models.Model):
         help='ID task từ hệ thống bên ngoài'
     )
     
+    external_updated_at = fields.Datetime(
+        string='Cập nhật ngoài lúc',
+        readonly=True,
+        copy=False,
+        help='Thời điểm cập nhật của issue Jira / GitHub ở lần sync trước (bỏ qua nếu không đổi)'
+    )
+    
     # === AI FEATURES ===
     ai_risk_score = fields.Float(
         string='AI Risk Score',
         compute='_compute_ai_risk_score',
+        store=True,
+        index=True,
         help='Điểm rủi ro do AI tính (0-100)'
     )
     
@@ -199,6 +293,15 @@ class ProjectTask(models.Model):
         help='Cột mốc dự án mà task này thuộc về'
     )
     
+    # === COMPLETION TRACKING ===
+    date_completed = fields.Datetime(
+        string='Ngày hoàn thành',
+        readonly=True,
+        copy=False,
+        index=True,
+        help='Thời điểm task chuyển sang stage đóng (is_closed). Xóa khi task được mở lại.'
+    )
+    
     # === HELPERS FOR VIEW ===
     is_task_closed = fields.Boolean(
         string='Task đã đóng',
@@ -239,53 +342,72 @@ class ProjectTask(models.Model):
     @api.depends('required_skill_ids', 'user_ids')
     def _compute_skill_match(self):
         """Kiểm tra kỹ năng nhân viên vs yêu cầu công việc"""
+        # Check if quan_ly_nhan_su module is installed
+        if 'nhan_vien' not in self.env:
+            self.skill_match_warning = False
+            return
+        
+        skill_gaps = self._collect_skill_gaps()
         for task in self:
-            if not task.required_skill_ids or not task.user_ids:
-                task.skill_match_warning = False
-                continue
-            
-            # Check if quan_ly_nhan_su module is installed
-            if 'nhan_vien' not in self.env:
-                task.skill_match_warning = False
-                continue
-            
             warnings = []
-            for user in task.user_ids:
-                # Tìm nhan_vien tương ứng
-                nhan_vien = self.env['nhan_vien'].search([
-                    '|',
-                    ('email', '=', user.login),
-                    ('name', '=', user.name)
-                ], limit=1)
-                
-                if not nhan_vien:
-                    continue
-                
-                # Kiểm tra từng skill yêu cầu
-                for required_skill in task.required_skill_ids:
-                    # Tìm trong ky_nang_ids của nhan_vien
-                    emp_skill = nhan_vien.ky_nang_ids.filtered(
-                        lambda s: s.ky_nang_id.name == required_skill.name
+            for gap in skill_gaps.get(task.id, []):
+                if not gap['trinh_do']:
+                    warnings.append(f"⚠️ {gap['nhan_vien'].name} chưa có kỹ năng '{gap['skill'].name}'")
+                else:
+                    warnings.append(
+                        f"⚠️ {gap['nhan_vien'].name} có '{gap['skill'].name}' "
+                        f"ở mức {gap['trinh_do']}, task yêu cầu level {task.skill_level_required}"
                     )
-                    
-                    if not emp_skill:
-                        warnings.append(f"⚠️ {nhan_vien.name} chưa có kỹ năng '{required_skill.name}'")
-                    else:
-                        # Kiểm tra trình độ
-                        level_map = {
-                            'moi_hoc': 1, 'co_ban': 2, 'trung_binh': 3,
-                            'kha': 4, 'gioi': 5, 'chuyen_gia': 6
-                        }
-                        emp_level = level_map.get(emp_skill[0].trinh_do, 0)
-                        
-                        if emp_level < task.skill_level_required:
-                            warnings.append(
-                                f"⚠️ {nhan_vien.name} có '{required_skill.name}' "
-                                f"ở mức {emp_skill[0].trinh_do}, task yêu cầu level {task.skill_level_required}"
-                            )
             
             task.skill_match_warning = '\n'.join(warnings) if warnings else False
 
+    def _collect_skill_gaps(self, users_by_task=None):
+        """
+        Tìm kỹ năng thiếu / chưa đủ trình độ cho cả recordset.
+
+        Nhân viên, kỹ năng nhân viên và ánh xạ hr.skill → ky.nang được đọc
+        một lần cho toàn bộ task (không duyệt ky_nang_ids theo từng task).
+
+        Args:
+            users_by_task: dict {task_id: res.users} giới hạn user cần kiểm tra,
+                           mặc định là toàn bộ user_ids của task
+
+        Returns:
+            dict {task_id: [{'user', 'nhan_vien', 'skill', 'trinh_do'}]}
+            trinh_do = False nghĩa là nhân viên chưa có kỹ năng
+        """
+        if users_by_task is None:
+            users_by_task = {task.id: task.user_ids for task in self}
+        tasks = self.filtered(lambda t: t.required_skill_ids and users_by_task.get(t.id))
+        if not tasks:
+            return {}
+        
+        all_users = self.env['res.users'].union(*[users_by_task[task.id] for task in tasks])
+        employees = self.env['nhan_vien.resolver'].resolve_many(all_users)
+        SkillIndex = self.env['ky.nang.index']
+        skill_index = SkillIndex.build(self.env['nhan_vien'].union(*employees.values()))
+        skill_map = SkillIndex.map_skills(tasks.mapped('required_skill_ids'))
+        
+        gaps = {}
+        for task in tasks:
+            for user in users_by_task[task.id]:
+                nhan_vien = employees.get(user.id)
+                if not nhan_vien:
+                    continue
+                
+                employee_skills = skill_index.get(nhan_vien.id, {})
+                for skill in task.required_skill_ids:
+                    trinh_do = employee_skills.get(skill_map.get(skill.id), False)
+                    if trinh_do and SkillIndex.level_of(trinh_do) >= task.skill_level_required:
+                        continue
+                    gaps.setdefault(task.id, []).append({
+                        'user': user,
+                        'nhan_vien': nhan_vien,
+                        'skill': skill,
+                        'trinh_do': trinh_do,
+                    })
+        return gaps
+
     @api.depends('stage_id.fold')
     def _compute_is_task_closed(self):
         """Computed field thay thế cho stage_id.fold trong attrs"""
@@ -296,33 +418,27 @@ class ProjectTask(models.Model):
     def _compute_ai_risk_score(self):
         """AI tính điểm rủi ro dựa trên các chỉ số"""
         for task in self:
-            risk_score = 0.0
-            
-            # Bug nhiều = rủi ro cao
-            if task.bug_count > 5:
-                risk_score += 30
-            elif task.bug_count > 2:
-                risk_score += 15
-            
-            # Rework nhiều = rủi ro cao
-            if task.rework_count > 3:
-                risk_score += 25
-            elif task.rework_count > 1:
-                risk_score += 10
-            
-            # Vượt deadline = rủi ro
-            if task.planned_hours > 0 and task.actual_hours > task.planned_hours * 1.5:
-                risk_score += 20
-            
-            # Blocker = rủi ro
-            if task.blocker_flag:
-                risk_score += 15
-            
-            # Sentiment tiêu cực
-            if task.sentiment_score and task.sentiment_score < -0.3:
-                risk_score += 10
-            
-            task.ai_risk_score = min(risk_score, 100)
+            task.ai_risk_score = _risk_score(*(task[name] for name in RISK_INPUT_FIELDS))
+    
+    @api.depends('smart_report_ids', 'smart_report_ids.progress_percentage')
+    def _compute_latest_report(self):
+        """Báo cáo mới nhất của mỗi task: một câu DISTINCT ON cho cả recordset"""
+        task_ids = [task_id for task_id in self._origin.ids if task_id]
+        latest = {}
+        if task_ids:
+            self.env['task.smart.report'].flush(['task_id', 'progress_percentage'])
+            self.env.cr.execute("""
+                SELECT DISTINCT ON (task_id) task_id, id, progress_percentage
+                  FROM task_smart_report
+                 WHERE task_id IN %s
+                 ORDER BY task_id, create_date DESC, id DESC
+            """, [tuple(task_ids)])
+            latest = {task_id: (report_id, progress) for task_id, report_id, progress in self.env.cr.fetchall()}
+        
+        for task in self:
+            report_id, progress = latest.get(task._origin.id, (False, 0))
+            task.latest_report_id = report_id
+            task.latest_report_progress = progress or 0
     
     @api.depends('smart_report_ids.time_spent')
     def _compute_actual_hours(self):
@@ -344,9 +460,9 @@ class ProjectTask(models.Model):
         """Bắt đầu công việc - Kiểm tra điều kiện"""
         self.ensure_one()
         
-        # Check: Dependencies
+        # Check: Dependencies (bắc cầu, không chỉ phụ thuộc trực tiếp)
         if self.dependent_task_ids:
-            unfinished = self.dependent_task_ids.filtered(lambda t: not t.is_task_closed)
+            unfinished = self.env['task.dependency.graph'].get_upstream(self, only_open=True)
             if unfinished:
                 raise UserError(_(
                     'Không thể bắt đầu! Task này phụ thuộc vào:\n%s'
@@ -394,45 +510,24 @@ class ProjectTask(models.Model):
         user = self.user_ids[0]
         
         # Tìm nhan_vien tương ứng với user
-        nhan_vien = self.env['nhan_vien'].search([
-            '|',
-            ('email', '=', user.login),
-            ('name', '=', user.name)
-        ], limit=1)
+        nhan_vien = self.env['nhan_vien.resolver'].resolve(user)
         
         if not nhan_vien:
             _logger.warning(f'Không tìm thấy nhân viên cho user {user.name}')
             return
         
         # Kiểm tra từng kỹ năng yêu cầu
-        for skill in self.required_skill_ids:
-            # Tìm trong ky_nang_ids của nhan_vien
-            employee_skill = nhan_vien.ky_nang_ids.filtered(
-                lambda s: s.ky_nang_id.name == skill.name
-            )
-            
-            if not employee_skill:
+        for gap in self._collect_skill_gaps({self.id: user}).get(self.id, []):
+            if not gap['trinh_do']:
                 _logger.warning(
-                    f'Skill Gap: {nhan_vien.name} chưa có kỹ năng {skill.name}'
+                    f'Skill Gap: {nhan_vien.name} chưa có kỹ năng {gap["skill"].name}'
                 )
             else:
-                # Kiểm tra trình độ
-                level_map = {
-                    'moi_hoc': 1, 
-                    'co_ban': 2, 
-                    'trung_binh': 3, 
-                    'kha': 4, 
-                    'gioi': 5, 
-                    'chuyen_gia': 6
-                }
-                emp_level = level_map.get(employee_skill[0].trinh_do, 0)
-                
-                if emp_level < self.skill_level_required:
-                    _logger.warning(
-                        f'Skill Gap: {nhan_vien.name} có {skill.name} '
-                        f'trình độ {employee_skill[0].trinh_do} '
-                        f'nhưng task yêu cầu level {self.skill_level_required}'
-                    )
+                _logger.warning(
+                    f'Skill Gap: {nhan_vien.name} có {gap["skill"].name} '
+                    f'trình độ {gap["trinh_do"]} '
+                    f'nhưng task yêu cầu level {self.skill_level_required}'
+                )
 
     def _check_workload(self):
         """Kiểm tra khối lượng công việc hiện tại"""
@@ -441,18 +536,19 @@ class ProjectTask(models.Model):
         if not self.user_ids:
             return
         
-        # Đếm số task đang làm
-        active_tasks = self.search([
-            ('user_ids', 'in', self.user_ids.ids),
-            ('is_task_closed', '=', False),
-            ('id', '!=', self.id),
-        ])
+        # Đếm số task đang làm (bộ đếm task.user.workload, không tính task hiện tại)
+        counters = self.env['task.user.workload']._get_counters(self.user_ids)
+        self_is_open = self.active and not self.is_task_closed
+        active_count = max(
+            count - (1 if self_is_open else 0)
+            for count, _hours in counters.values()
+        )
         
-        if len(active_tasks) >= 3:
+        if active_count >= 3:
             raise UserError(_(
                 'Cảnh báo: Bạn đang có %d task chưa hoàn thành.\n'
                 'Hãy hoàn thành bớt công việc trước khi nhận thêm!'
-            ) % len(active_tasks))
+            ) % active_count)
 
     def action_open_smart_report_wizard(self):
         """Mở popup Smart Report Wizard"""
@@ -470,55 +566,200 @@ class ProjectTask(models.Model):
             }
         }
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Override: Cập nhật rollup Analytics cho task mới"""
+        tasks = super(ProjectTask, self).create(vals_list)
+        tasks._update_date_completed()
+        self.env['task.analytics.report']._refresh_for_tasks(tasks)
+        self.env['task.user.workload']._refresh_workload(tasks.mapped('user_ids').ids)
+        return tasks
+
     def write(self, vals):
         """Override: Tự động chấm điểm khi chuyển sang Done"""
+        # Khóa rollup cũ (trước khi đổi dự án)
+        old_rollup_keys = self._get_analytics_rollup_keys() if 'project_id' in vals else set()
+        # Người được giao cũ (trước khi đổi user_ids) cũng cần cập nhật workload
+        old_users = self.mapped('user_ids') if 'user_ids' in vals else self.env['res.users']
+        
         res = super(ProjectTask, self).write(vals)
         
+        if 'stage_id' in vals:
+            self._update_date_completed()
+        
         # Trigger scoring when task is marked as done
         if vals.get('stage_id'):
             new_stage = self.env['project.task.type'].browse(vals['stage_id'])
             if new_stage.fold:  # Stage is "Done"
-                for task in self:
-                    if not task.score_card_id:
-                        task._auto_generate_score_card()
+                self.filtered(lambda t: not t.score_card_id)._auto_generate_score_cards()
         
-        return res
-
-    def _auto_generate_score_card(self):
-        """Tự động tạo Phiếu điểm khi hoàn thành"""
-        self.ensure_one()
-        
-        ScoreCard = self.env['task.score.card']
-        
-        # Calculate scores
-        timeliness_score = self._calculate_timeliness_score()
-        efficiency_score = self._calculate_efficiency_score()
-        quality_score = self._calculate_quality_score()
+        if ANALYTICS_ROLLUP_FIELDS.intersection(vals):
+            self.env['task.analytics.report']._refresh_for_tasks(self, old_rollup_keys)
         
-        # Weighted average
-        final_score = (
-            timeliness_score * 0.4 +
-            efficiency_score * 0.3 +
-            quality_score * 0.3
-        )
+        if WORKLOAD_FIELDS.intersection(vals):
+            self.env['task.user.workload']._refresh_workload((old_users | self.mapped('user_ids')).ids)
         
-        # Create score card
-        score_card = ScoreCard.create({
-            'task_id': self.id,
-            'timeliness_score': timeliness_score,
-            'efficiency_score': efficiency_score,
-            'quality_score': quality_score,
-            'final_score': final_score,
-            'ai_feedback': self._generate_ai_feedback(final_score),
-        })
+        return res
+
+    def unlink(self):
+        """Override: Xóa task khỏi rollup Analytics"""
+        rollup_keys = self._get_analytics_rollup_keys()
+        users = self.mapped('user_ids')
+        res = super(ProjectTask, self).unlink()
+        self.env['task.analytics.report']._refresh_rollup(rollup_keys)
+        self.env['task.user.workload']._refresh_workload(users.ids)
+        return res
+
+    def _update_date_completed(self):
+        """Ghi nhận / xóa thời điểm hoàn thành theo is_closed của stage hiện tại"""
+        closed = self.filtered(lambda t: t.stage_id.is_closed)
+        closed.filtered(lambda t: not t.date_completed).write({'date_completed': fields.Datetime.now()})
+        (self - closed).filtered('date_completed').write({'date_completed': False})
+
+    def _auto_init(self):
+        """
+        Tạo sẵn cột ai_risk_score và tính bằng đường vector hóa, để ORM không
+        phải tính lại từng task khi field chuyển sang lưu trữ.
+        """
+        new_risk_column = not tools.column_exists(self.env.cr, self._table, 'ai_risk_score')
+        if new_risk_column:
+            tools.create_column(self.env.cr, self._table, 'ai_risk_score', 'double precision')
+        res = super(ProjectTask, self)._auto_init()
+        if new_risk_column:
+            self._rescore_risk(open_only=False, auto_commit=False)
+        return res
+
+    @api.model
+    def _rescore_risk(self, chunk_size=5000, open_only=True, auto_commit=True):
+        """
+        Tính lại ai_risk_score theo từng chunk id (keyset), chỉ UPDATE dòng thay đổi.
+
+        Args:
+            chunk_size: số task mỗi chunk
+            open_only: chỉ các task đang mở (active, stage chưa fold)
+            auto_commit: commit sau mỗi chunk
+
+        Returns:
+            số task được cập nhật điểm
+        """
+        auto_commit = auto_commit and not getattr(threading.current_thread(), 'testing', False)
+        self.flush(RISK_INPUT_FIELDS + ['ai_risk_score', 'stage_id', 'active'])
+        cr = self.env.cr
+        
+        where_open = ''
+        if open_only:
+            where_open = 'AND t.active AND NOT COALESCE(s.fold, FALSE)'
+        
+        last_id = 0
+        updated = 0
+        while True:
+            cr.execute("""
+                SELECT t.id, t.bug_count, t.rework_count, t.planned_hours,
+                       t.actual_hours, t.blocker_flag, t.sentiment_score, t.ai_risk_score
+                  FROM project_task t
+                  LEFT JOIN project_task_type s ON s.id = t.stage_id
+                 WHERE t.id > %s {where_open}
+                 ORDER BY t.id
+                 LIMIT %s
+            """.format(where_open=where_open), [last_id, chunk_size])
+            rows = cr.fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            
+            scores = _risk_scores([row[1:7] for row in rows])
+            changed = [
+                (row[0], score) for row, score in zip(rows, scores)
+                if row[7] is None or abs(row[7] - score) > 1e-9
+            ]
+            if changed:
+                execute_values(cr._obj, """
+                    UPDATE project_task t
+                       SET ai_risk_score = v.score
+                      FROM (VALUES %s) AS v(id, score)
+                     WHERE t.id = v.id
+                """, changed, page_size=len(changed))
+                updated += len(changed)
+            if auto_commit:
+                cr.commit()
+        
+        self.invalidate_cache(['ai_risk_score'])
+        return updated
+
+    @api.model
+    def _cron_rescore_risk(self):
+        """Cron hằng đêm: tính lại điểm rủi ro các task đang mở (sửa sai lệch do ghi SQL trực tiếp)"""
+        updated = self._rescore_risk()
+        _logger.info('Rescored risk for %d open tasks', updated)
+
+    def init(self):
+        """Backfill date_completed cho các task đã đóng trước khi có field này"""
+        super(ProjectTask, self).init()
+        self.env.cr.execute("""
+            UPDATE project_task t
+               SET date_completed = COALESCE(t.date_last_stage_update, t.write_date)
+              FROM project_task_type s
+             WHERE s.id = t.stage_id
+               AND s.is_closed = true
+               AND t.date_completed IS NULL
+        """)
+
+    def _get_analytics_rollup_keys(self):
+        """Các khóa (ngày tạo, dự án) của task trong bảng task_analytics_report"""
+        return {
+            (task.create_date.date(), task.project_id.id)
+            for task in self if task.create_date
+        }
+
+    def _auto_generate_score_cards(self):
+        """
+        Tự động tạo Phiếu điểm khi hoàn thành, cho nhiều task cùng lúc: một lần create hàng loạt,
+        gắn score_card_id bằng một câu UPDATE và cộng XP theo nhóm điểm.
+        """
+        if not self:
+            return self.env['task.score.card']
         
-        self.score_card_id = score_card
+        vals_list = []
+        for task in self:
+            # Calculate scores
+            timeliness_score = task._calculate_timeliness_score()
+            efficiency_score = task._calculate_efficiency_score()
+            quality_score = task._calculate_quality_score()
+            
+            # Weighted average
+            final_score = (
+                timeliness_score * 0.4 +
+                efficiency_score * 0.3 +
+                quality_score * 0.3
+            )
+            
+            vals_list.append({
+                'task_id': task.id,
+                'timeliness_score': timeliness_score,
+                'efficiency_score': efficiency_score,
+                'quality_score': quality_score,
+                'final_score': final_score,
+                'ai_feedback': task._generate_ai_feedback(final_score),
+            })
+        
+        # Create score cards
+        score_cards = self.env['task.score.card'].create(vals_list)
+        
+        score_cards.flush(['task_id'])
+        self.env.cr.execute("""
+            UPDATE project_task t
+               SET score_card_id = sc.id
+              FROM task_score_card sc
+             WHERE sc.id IN %s
+               AND t.id = sc.task_id
+        """, [tuple(score_cards.ids)])
+        self.invalidate_cache(['score_card_id'], self.ids)
         
         # Award XP to employee
-        if self.user_ids and self.user_ids[0].employee_id:
-            self._award_xp_to_employee(final_score)
+        rewarded = self.filtered(lambda t: t.user_ids and t.user_ids[0].employee_id)
+        rewarded._award_xp_to_employee({vals['task_id']: vals['final_score'] for vals in vals_list})
         
-        return score_card
+        return score_cards
 
     def _calculate_timeliness_score(self):
         """Tính điểm Đúng hạn"""
@@ -572,15 +813,19 @@ class ProjectTask(models.Model):
         else:
             return "Cần cải thiện. Hãy ước lượng thời gian chính xác hơn."
 
-    def _award_xp_to_employee(self, score):
-        """Cộng XP cho nhân viên"""
-        # Calculate XP based on score
-        xp = int(score)  # 1 point = 1 XP
+    def _award_xp_to_employee(self, scores):
+        """Cộng XP cho nhân viên (`scores` = {task_id: điểm}), một write cho mỗi mức XP"""
+        task_ids_by_xp = defaultdict(list)
+        for task in self:
+            # Calculate XP based on score
+            xp = int(scores[task.id])  # 1 point = 1 XP
+            task_ids_by_xp[xp].append(task.id)
         
         # Placeholder: Thực tế sẽ cập nhật vào hr.employee hoặc gamification
-        _logger.info(f'Award {xp} XP to employee for task {self.name}')
-        
-        self.xp_reward = xp
+        for xp, task_ids in task_ids_by_xp.items():
+            self.browse(task_ids).write({'xp_reward': xp})
+        if self:
+            _logger.info('Awarded XP to employees for %d tasks', len(self))
 
     # ==================
     # CHECKLIST ACTIONS
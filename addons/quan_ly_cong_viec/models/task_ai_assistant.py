@@ -1,9 +1,13 @@
 # -*- coding: utf-8 -*-
 
-from odoo import models, fields, api, _
+from odoo import models, fields, api, tools, _
 from odoo.exceptions import UserError
-import requests
 import json
+import logging
+
+from .ai_http_client import ChatClient, AIClientError, CircuitOpenError, DEFAULT_BASE_URL
+
+_logger = logging.getLogger(__name__)
 
 class TaskAIAssistant(models.Model):
     _name = 'task.ai.assistant'
@@ -22,26 +26,116 @@ class TaskAIAssistant(models.Model):
     temperature = fields.Float('Temperature', default=0.7, help='Controls randomness (0-1)')
     max_tokens = fields.Integer('Max Tokens', default=1000, help='Maximum response length')
     
+    # Connection
+    api_base_url = fields.Char('API Base URL', default=DEFAULT_BASE_URL,
+                               help='OpenAI-compatible endpoint (e.g. a local stub server for testing)')
+    requests_per_minute = fields.Integer('Requests / Minute', default=60,
+                                         help='Rate limit applied per assistant in each Odoo worker')
+    max_concurrent_requests = fields.Integer('Max Concurrent Requests', default=4)
+    max_retries = fields.Integer('Max Retries', default=3, help='Retries on 429, 5xx and network errors')
+    request_timeout = fields.Float('Timeout (s)', default=30.0)
+    
     # Statistics
     total_requests = fields.Integer('Total Requests', readonly=True, default=0)
     successful_requests = fields.Integer('Successful Requests', readonly=True, default=0)
     failed_requests = fields.Integer('Failed Requests', readonly=True, default=0)
+    total_prompt_tokens = fields.Integer('Prompt Tokens', readonly=True, default=0)
+    total_completion_tokens = fields.Integer('Completion Tokens', readonly=True, default=0)
+    total_latency_ms = fields.Float('Total Latency (ms)', readonly=True, default=0.0)
+    avg_latency_ms = fields.Float('Avg Latency (ms)', compute='_compute_avg_latency')
+    
+    # Response cache
+    cache_ttl_hours = fields.Integer('Cache TTL (hours)', default=24,
+                                     help='How long identical prompts reuse a cached answer (0 = no cache)')
+    cache_hits = fields.Integer('Cache Hits', readonly=True, default=0)
+    cache_misses = fields.Integer('Cache Misses', readonly=True, default=0)
+    cache_hit_rate = fields.Float('Cache Hit Rate (%)', compute='_compute_cache_hit_rate')
+    circuit_state = fields.Char('Circuit State', compute='_compute_client_state',
+                                help='Circuit breaker state in the current worker')
+    
+    # Search
+    search_rerank = fields.Boolean('AI Re-rank Search', default=False,
+                                   help='Let the AI re-rank the top local full-text search results')
     
     active = fields.Boolean('Active', default=True)
     
-    def _call_openai_api(self, messages, temperature=None, max_tokens=None):
-        """Call OpenAI API with given messages"""
+    SEARCH_RERANK_TOP_K = 30
+    
+    @api.depends('total_latency_ms', 'successful_requests')
+    def _compute_avg_latency(self):
+        for assistant in self:
+            assistant.avg_latency_ms = (
+                assistant.total_latency_ms / assistant.successful_requests
+                if assistant.successful_requests else 0.0
+            )
+    
+    @api.depends('cache_hits', 'cache_misses')
+    def _compute_cache_hit_rate(self):
+        for assistant in self:
+            total = assistant.cache_hits + assistant.cache_misses
+            assistant.cache_hit_rate = assistant.cache_hits / total * 100 if total else 0.0
+    
+    def _compute_client_state(self):
+        for assistant in self:
+            assistant.circuit_state = assistant._get_client().breaker.state if assistant.id else 'closed'
+    
+    def _get_client(self):
+        """Shared HTTP client (session pool, rate limit, circuit breaker) of this assistant"""
+        self.ensure_one()
+        return ChatClient.get(
+            (self.env.cr.dbname, self.id),
+            base_url=self.api_base_url or DEFAULT_BASE_URL,
+            requests_per_minute=max(1, self.requests_per_minute or 60),
+            max_concurrency=max(1, self.max_concurrent_requests or 1),
+            timeout=self.request_timeout or 30.0,
+            max_retries=max(0, self.max_retries),
+        )
+    
+    def _record_call(self, success, usage=None):
+        """Update persistent statistics with one atomic UPDATE (no lost increments)"""
+        usage = usage or {}
+        self.env.cr.execute("""
+            UPDATE task_ai_assistant
+               SET total_requests = COALESCE(total_requests, 0) + 1,
+                   successful_requests = COALESCE(successful_requests, 0) + %s,
+                   failed_requests = COALESCE(failed_requests, 0) + %s,
+                   total_prompt_tokens = COALESCE(total_prompt_tokens, 0) + %s,
+                   total_completion_tokens = COALESCE(total_completion_tokens, 0) + %s,
+                   total_latency_ms = COALESCE(total_latency_ms, 0) + %s
+             WHERE id = %s
+        """, [
+            1 if success else 0,
+            0 if success else 1,
+            usage.get('prompt_tokens', 0),
+            usage.get('completion_tokens', 0),
+            usage.get('latency_ms', 0.0),
+            self.id,
+        ])
+        self.invalidate_cache([
+            'total_requests', 'successful_requests', 'failed_requests',
+            'total_prompt_tokens', 'total_completion_tokens', 'total_latency_ms',
+        ], self.ids)
+    
+    def _record_cache_lookup(self, hit):
+        """Count one cache hit or miss with an atomic UPDATE"""
+        column = 'cache_hits' if hit else 'cache_misses'
+        self.env.cr.execute(
+            "UPDATE task_ai_assistant SET {col} = COALESCE({col}, 0) + 1 WHERE id = %s".format(col=column),
+            [self.id]
+        )
+        self.invalidate_cache([column], self.ids)
+    
+    def _call_openai_api(self, messages, temperature=None, max_tokens=None, use_cache=False):
+        """Call OpenAI API with given messages
+        
+        use_cache: reuse the answer of an identical (model, temperature, max_tokens, messages)
+        call made within cache_ttl_hours
+        """
         self.ensure_one()
         
         if not self.api_key:
             raise UserError(_('OpenAI API Key is not configured'))
         
-        url = 'https://api.openai.com/v1/chat/completions'
-        headers = {
-            'Authorization': f'Bearer {self.api_key}',
-            'Content-Type': 'application/json'
-        }
-        
         data = {
             'model': self.model,
             'messages': messages,
@@ -49,25 +143,52 @@ class TaskAIAssistant(models.Model):
             'max_tokens': max_tokens or self.max_tokens,
         }
         
+        cache_key = None
+        if use_cache and self.cache_ttl_hours > 0:
+            Cache = self.env['task.ai.response.cache'].sudo()
+            cache_key = Cache.make_key(data['model'], data['temperature'], data['max_tokens'], messages)
+            cached = Cache.lookup(cache_key)
+            self._record_cache_lookup(cached is not None)
+            if cached is not None:
+                return cached
+        
         try:
-            self.total_requests += 1
-            response = requests.post(url, headers=headers, json=data, timeout=30)
-            
-            if response.status_code == 200:
-                result = response.json()
-                self.successful_requests += 1
-                return result['choices'][0]['message']['content']
-            else:
-                self.failed_requests += 1
-                error_msg = response.json().get('error', {}).get('message', response.text)
-                raise UserError(_('OpenAI API Error: %s') % error_msg)
-                
-        except requests.exceptions.Timeout:
-            self.failed_requests += 1
-            raise UserError(_('OpenAI API request timed out'))
-        except requests.exceptions.RequestException as e:
-            self.failed_requests += 1
+            content, usage = self._get_client().chat(self.api_key, data)
+        except CircuitOpenError:
+            self._record_call(False)
+            raise UserError(_('OpenAI API is temporarily unavailable after repeated failures, please retry later'))
+        except AIClientError as e:
+            self._record_call(False)
+            if e.timeout:
+                raise UserError(_('OpenAI API request timed out'))
+            if e.status:
+                raise UserError(_('OpenAI API Error: %s') % str(e))
             raise UserError(_('OpenAI API request failed: %s') % str(e))
+        
+        self._record_call(True, usage)
+        if cache_key:
+            Cache.store(cache_key, data['model'], content, self.cache_ttl_hours * 3600)
+        return content
+    
+    def action_clear_response_cache(self):
+        """Drop all cached AI responses"""
+        self.env['task.ai.response.cache'].sudo().clear()
+        self.write({'cache_hits': 0, 'cache_misses': 0})
+    
+    def action_view_client_metrics(self):
+        """Show in-process client metrics (current worker)"""
+        self.ensure_one()
+        metrics = self._get_client().metrics.snapshot()
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Client Metrics (%s)') % self._get_client().breaker.state,
+                'message': ', '.join('%s: %s' % (key, round(value, 1)) for key, value in metrics.items()),
+                'type': 'info',
+                'sticky': True,
+            }
+        }
     
     def action_chat(self):
         """Open chat interface with AI"""
@@ -105,7 +226,7 @@ Be specific and practical."""
             {'role': 'user', 'content': prompt}
         ]
         
-        response = self._call_openai_api(messages)
+        response = self._call_openai_api(messages, use_cache=True)
         
         return {
             'type': 'ir.actions.client',
@@ -158,7 +279,7 @@ Be concise and practical."""
             {'role': 'user', 'content': prompt}
         ]
         
-        response = self._call_openai_api(messages)
+        response = self._call_openai_api(messages, use_cache=True)
         
         return {
             'type': 'ir.actions.client',
@@ -171,20 +292,42 @@ Be concise and practical."""
             }
         }
     
-    def smart_task_search(self, query):
-        """Intelligent task search using AI to understand intent"""
+    def smart_task_search(self, query, rerank=None, limit=20):
+        """Search tasks with the local full-text index, optionally re-ranked by AI
+        
+        rerank: ask the LLM to pick the 5 most relevant of the top-k local hits
+        (defaults to the assistant's search_rerank setting)
+        """
         self.ensure_one()
         
-        # Get all tasks
-        tasks = self.env['project.task'].search([])
+        if rerank is None:
+            rerank = self.search_rerank
+        
+        index = self.env['task.search.index']
+        tasks = index.search_tasks(query, limit=max(limit, self.SEARCH_RERANK_TOP_K if rerank else 0))
+        task_ids = tasks.ids[:limit]
+        
+        if rerank and self.api_key and len(tasks) > 5:
+            task_ids = self._rerank_search_results(query, tasks[:self.SEARCH_RERANK_TOP_K]) or task_ids
         
-        # Create task summary for AI
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _('Search Results: %s') % query,
+            'res_model': 'project.task',
+            'view_mode': 'tree,form',
+            'domain': [('id', 'in', task_ids)],
+            # Giữ thứ tự liên quan (ts_rank_cd / AI) trong list view, xem project.task.search
+            'context': {'task_search_rank': task_ids},
+        }
+    
+    def _rerank_search_results(self, query, tasks):
+        """Let the LLM pick the 5 most relevant tasks among local search hits"""
         task_list = []
-        for task in tasks[:50]:  # Limit to 50 for token efficiency
+        for task in tasks:
             task_list.append({
                 'id': task.id,
                 'name': task.name,
-                'description': task.description or '',
+                'description': tools.html2plaintext(task.description or '')[:300],
                 'stage': task.stage_id.name if task.stage_id else '',
                 'priority': task.priority,
             })
@@ -201,21 +344,15 @@ Return only the IDs of the 5 most relevant tasks as a JSON array, e.g., [1, 5, 1
             {'role': 'user', 'content': prompt}
         ]
         
-        response = self._call_openai_api(messages, temperature=0.3)
+        response = self._call_openai_api(messages, temperature=0.3, use_cache=True)
         
         try:
-            # Parse task IDs from response
-            task_ids = json.loads(response)
-            
-            return {
-                'type': 'ir.actions.act_window',
-                'name': _('Search Results: %s') % query,
-                'res_model': 'project.task',
-                'view_mode': 'tree,form',
-                'domain': [('id', 'in', task_ids)],
-            }
-        except:
-            raise UserError(_('Failed to parse AI response: %s') % response)
+            # Parse task IDs from response, keep only local candidates
+            candidate_ids = set(tasks.ids)
+            return [tid for tid in json.loads(response) if tid in candidate_ids]
+        except (ValueError, TypeError):
+            _logger.warning('Failed to parse AI re-ranking response: %s', response)
+            return []
     
     def generate_task_report_summary(self, task_ids):
         """Generate a summary report for multiple tasks"""
@@ -253,7 +390,7 @@ Keep it professional and actionable."""
             {'role': 'user', 'content': prompt}
         ]
         
-        response = self._call_openai_api(messages, max_tokens=1500)
+        response = self._call_openai_api(messages, max_tokens=1500, use_cache=True)
         
         return {
             'type': 'ir.actions.client',
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api
+from collections import OrderedDict
+import hashlib
+import json
+import logging
+import threading
+import time
+
+_logger = logging.getLogger(__name__)
+
+
+class _FrontCache:
+    """
+    LRU nhỏ trong process đặt trước bảng cache (khóa: (dbname, key)).
+
+    Entry sống tối đa `max_age` giây (không theo TTL còn lại của dòng trong bảng):
+    clear() / xóa dòng chỉ dọn front cache của worker gọi, worker khác ngừng trả
+    phản hồi đã xóa sau tối đa `max_age` giây.
+    """
+
+    def __init__(self, max_entries=256, max_age=60):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, response = entry
+            if expires_at < time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return response
+
+    def put(self, key, response, expires_at):
+        expires_at = min(expires_at, time.time() + self.max_age)
+        with self._lock:
+            self._data[key] = (expires_at, response)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+FRONT_CACHE = _FrontCache()
+
+
+class TaskAIResponseCache(models.Model):
+    """
+    Cache câu trả lời LLM theo nội dung: khóa = sha256(model, temperature, max_tokens, messages).
+
+    Entry hết hạn theo TTL; khi bảng vượt CACHE_MAX_ENTRIES thì xóa các entry
+    lâu không dùng nhất (LRU theo last_hit). Phía trước có FRONT_CACHE trong process
+    (entry giữ tối đa 60 giây, xem _FrontCache).
+    """
+    _name = 'task.ai.response.cache'
+    _description = 'Cache Phản hồi AI'
+    _order = 'last_hit desc'
+    _rec_name = 'key'
+
+    CACHE_MAX_ENTRIES = 5000
+    # Số lần ghi entry mới (trong process) giữa hai lần dọn cache
+    EVICT_EVERY = 100
+
+    key = fields.Char(string='Khóa', required=True, readonly=True, index=True)
+    model_name = fields.Char(string='Model', readonly=True)
+    response = fields.Text(string='Phản hồi', readonly=True)
+    expires_at = fields.Datetime(string='Hết hạn', readonly=True, index=True)
+    last_hit = fields.Datetime(string='Dùng lần cuối', readonly=True, index=True)
+    hit_count = fields.Integer(string='Số lần dùng', readonly=True, default=0)
+
+    _sql_constraints = [
+        ('key_unique', 'UNIQUE(key)', 'Khóa cache phải là duy nhất!'),
+    ]
+
+    _stores_since_evict = 0
+
+    @api.model
+    def make_key(self, model_name, temperature, max_tokens, messages):
+        """Khóa nội dung của một lời gọi"""
+        payload = json.dumps({
+            'model': model_name,
+            'temperature': round(float(temperature or 0), 4),
+            'max_tokens': max_tokens,
+            'messages': messages,
+        }, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    @api.model
+    def lookup(self, key):
+        """Phản hồi còn hạn cho `key` (None nếu không có): front cache, rồi tới bảng"""
+        front_key = (self.env.cr.dbname, key)
+        response = FRONT_CACHE.get(front_key)
+        if response is not None:
+            return response
+
+        self.env.cr.execute("""
+            UPDATE task_ai_response_cache
+               SET last_hit = now() at time zone 'UTC',
+                   hit_count = hit_count + 1
+             WHERE key = %s
+               AND expires_at > now() at time zone 'UTC'
+         RETURNING response, EXTRACT(EPOCH FROM expires_at - now() at time zone 'UTC')
+        """, [key])
+        row = self.env.cr.fetchone()
+        if not row:
+            return None
+        response, ttl_left = row
+        FRONT_CACHE.put(front_key, response, time.time() + float(ttl_left))
+        return response
+
+    @api.model
+    def store(self, key, model_name, response, ttl_seconds):
+        """Lưu (hoặc làm mới) phản hồi cho `key` trong `ttl_seconds` giây"""
+        if not ttl_seconds or response is None:
+            return
+        self.env.cr.execute("""
+            INSERT INTO task_ai_response_cache
+                   (key, model_name, response, expires_at, last_hit, hit_count,
+                    create_uid, create_date, write_uid, write_date)
+            VALUES (%(key)s, %(model)s, %(response)s,
+                    now() at time zone 'UTC' + %(ttl)s * interval '1 second',
+                    now() at time zone 'UTC', 0,
+                    %(uid)s, now() at time zone 'UTC', %(uid)s, now() at time zone 'UTC')
+            ON CONFLICT (key) DO UPDATE
+               SET response = EXCLUDED.response,
+                   expires_at = EXCLUDED.expires_at,
+                   last_hit = EXCLUDED.last_hit,
+                   write_uid = EXCLUDED.write_uid,
+                   write_date = EXCLUDED.write_date
+        """, {'key': key, 'model': model_name, 'response': response, 'ttl': ttl_seconds, 'uid': self.env.uid})
+        FRONT_CACHE.put((self.env.cr.dbname, key), response, time.time() + ttl_seconds)
+
+        cls = type(self)
+        cls._stores_since_evict += 1
+        if cls._stores_since_evict >= self.EVICT_EVERY:
+            cls._stores_since_evict = 0
+            self._evict()
+
+    @api.model
+    def _evict(self, max_entries=None):
+        """Xóa entry hết hạn, rồi xóa entry ít dùng gần đây nhất vượt quá `max_entries`"""
+        max_entries = self.CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        cr = self.env.cr
+        cr.execute("DELETE FROM task_ai_response_cache WHERE expires_at <= now() at time zone 'UTC'")
+        expired = cr.rowcount
+        cr.execute("""
+            DELETE FROM task_ai_response_cache
+             WHERE id IN (
+                    SELECT id FROM task_ai_response_cache
+                     ORDER BY last_hit DESC NULLS LAST, id DESC
+                    OFFSET %s
+                   )
+        """, [max_entries])
+        evicted = cr.rowcount
+        if expired or evicted:
+            _logger.info('AI response cache: removed %d expired, %d LRU entries', expired, evicted)
+            self.invalidate_cache()
+        return expired + evicted
+
+    @api.model
+    def _cron_evict(self):
+        """Cron: dọn cache theo TTL và giới hạn kích thước"""
+        self._evict()
+
+    @api.model
+    def clear(self):
+        """Xóa toàn bộ cache (bảng + front cache của process hiện tại; worker khác sau tối đa max_age)"""
+        self.env.cr.execute("DELETE FROM task_ai_response_cache")
+        self.invalidate_cache()
+        FRONT_CACHE.clear()
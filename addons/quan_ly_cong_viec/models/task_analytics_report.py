@@ -1,6 +1,10 @@
 # -*- coding: utf-8 -*-
 
-from odoo import models, fields, tools
+from odoo import models, fields, api, tools
+import logging
+
+_logger = logging.getLogger(__name__)
+
 
 class TaskAnalyticsReport(models.Model):
     _name = 'task.analytics.report'
@@ -14,7 +18,7 @@ class TaskAnalyticsReport(models.Model):
     month = fields.Char('Month', readonly=True)
     quarter = fields.Char('Quarter', readonly=True)
     year = fields.Char('Year', readonly=True)
-    
+
     project_id = fields.Many2one('project.project', string='Project', readonly=True)
     user_id = fields.Many2one('res.users', string='Assigned To', readonly=True)
     stage_id = fields.Many2one('project.task.type', string='Stage', readonly=True)
@@ -24,7 +28,7 @@ class TaskAnalyticsReport(models.Model):
         ('2', 'High'),
         ('3', 'Urgent')
     ], string='Priority', readonly=True)
-    
+
     # Metrics
     task_count = fields.Integer('# Tasks', readonly=True)
     completed_count = fields.Integer('# Completed', readonly=True)
@@ -32,52 +36,172 @@ class TaskAnalyticsReport(models.Model):
     avg_completion_days = fields.Float('Avg Completion Days', readonly=True)
     total_score = fields.Float('Total Score', readonly=True)
     avg_score = fields.Float('Average Score', readonly=True)
-    
+
+    # Khóa của một dòng rollup (NULL được chuẩn hóa để dùng cho unique index / ON CONFLICT)
+    _ROLLUP_KEY = "date, COALESCE(project_id, 0), COALESCE(user_id, 0), COALESCE(stage_id, 0), COALESCE(priority, '')"
+
+    _ROLLUP_SELECT = """
+        SELECT
+            DATE(t.create_date) AS date,
+            TO_CHAR(t.create_date, 'IYYY-IW') AS week,
+            TO_CHAR(t.create_date, 'YYYY-MM') AS month,
+            TO_CHAR(t.create_date, 'YYYY-Q') AS quarter,
+            TO_CHAR(t.create_date, 'YYYY') AS year,
+            t.project_id,
+            tu.user_id,
+            t.stage_id,
+            t.priority,
+            COUNT(DISTINCT t.id) AS task_count,
+            COUNT(DISTINCT CASE WHEN pts.is_closed = true THEN t.id END) AS completed_count,
+            COUNT(DISTINCT CASE WHEN t.date_deadline < CURRENT_DATE AND pts.is_closed = false THEN t.id END) AS overdue_count,
+            AVG(CASE
+                WHEN pts.is_closed = true AND t.date_deadline IS NOT NULL THEN
+                    EXTRACT(EPOCH FROM (t.date_deadline::timestamp - t.create_date)) / 86400
+                ELSE NULL
+            END) AS avg_completion_days,
+            SUM(COALESCE(sc.final_score, 0)) AS total_score,
+            AVG(COALESCE(sc.final_score, 0)) AS avg_score
+        FROM
+            project_task t
+            LEFT JOIN project_task_user_rel tu ON tu.task_id = t.id
+            LEFT JOIN project_task_type pts ON pts.id = t.stage_id
+            LEFT JOIN task_score_card sc ON sc.task_id = t.id
+        {where}
+        GROUP BY
+            DATE(t.create_date),
+            TO_CHAR(t.create_date, 'IYYY-IW'),
+            TO_CHAR(t.create_date, 'YYYY-MM'),
+            TO_CHAR(t.create_date, 'YYYY-Q'),
+            TO_CHAR(t.create_date, 'YYYY'),
+            t.project_id,
+            tu.user_id,
+            t.stage_id,
+            t.priority
+    """
+
+    _ROLLUP_COLUMNS = [
+        'date', 'week', 'month', 'quarter', 'year',
+        'project_id', 'user_id', 'stage_id', 'priority',
+        'task_count', 'completed_count', 'overdue_count',
+        'avg_completion_days', 'total_score', 'avg_score',
+    ]
+
     def init(self):
-        """Create SQL view for analytics"""
-        tools.drop_view_if_exists(self.env.cr, self._table)
-        
-        # Drop table if exists (for migration)
-        self.env.cr.execute(f"DROP TABLE IF EXISTS {self._table} CASCADE")
-        
-        query = """
-            CREATE OR REPLACE VIEW task_analytics_report AS (
-                SELECT
-                    ROW_NUMBER() OVER (ORDER BY DATE(t.create_date), t.project_id, tu.user_id, t.stage_id, t.priority) AS id,
-                    DATE(t.create_date) AS date,
-                    TO_CHAR(t.create_date, 'IYYY-IW') AS week,
-                    TO_CHAR(t.create_date, 'YYYY-MM') AS month,
-                    TO_CHAR(t.create_date, 'YYYY-Q') AS quarter,
-                    TO_CHAR(t.create_date, 'YYYY') AS year,
-                    t.project_id,
-                    tu.user_id,
-                    t.stage_id,
-                    t.priority,
-                    COUNT(DISTINCT t.id) AS task_count,
-                    COUNT(DISTINCT CASE WHEN pts.is_closed = true THEN t.id END) AS completed_count,
-                    COUNT(DISTINCT CASE WHEN t.date_deadline < CURRENT_DATE AND pts.is_closed = false THEN t.id END) AS overdue_count,
-                    AVG(CASE 
-                        WHEN pts.is_closed = true AND t.date_deadline IS NOT NULL THEN 
-                            EXTRACT(EPOCH FROM (t.date_deadline::timestamp - t.create_date)) / 86400
-                        ELSE NULL 
-                    END) AS avg_completion_days,
-                    SUM(COALESCE(sc.final_score, 0)) AS total_score,
-                    AVG(COALESCE(sc.final_score, 0)) AS avg_score
-                FROM
-                    project_task t
-                    LEFT JOIN project_task_user_rel tu ON tu.task_id = t.id
-                    LEFT JOIN project_task_type pts ON pts.id = t.stage_id
-                    LEFT JOIN task_score_card sc ON sc.task_id = t.id
-                GROUP BY
-                    DATE(t.create_date),
-                    TO_CHAR(t.create_date, 'IYYY-IW'),
-                    TO_CHAR(t.create_date, 'YYYY-MM'),
-                    TO_CHAR(t.create_date, 'YYYY-Q'),
-                    TO_CHAR(t.create_date, 'YYYY'),
-                    t.project_id,
-                    tu.user_id,
-                    t.stage_id,
-                    t.priority
+        """
+        Tạo bảng rollup (thay cho SQL view cũ).
+        Bảng được cập nhật tăng dần từ write của task/score card và
+        được cron dựng lại toàn bộ mỗi ngày để sửa sai lệch.
+        """
+        cr = self.env.cr
+        # Migration: phiên bản cũ là VIEW
+        tools.drop_view_if_exists(cr, self._table)
+
+        if tools.table_exists(cr, self._table):
+            return
+
+        cr.execute("""
+            CREATE TABLE task_analytics_report (
+                id SERIAL PRIMARY KEY,
+                date DATE,
+                week VARCHAR,
+                month VARCHAR,
+                quarter VARCHAR,
+                year VARCHAR,
+                project_id INTEGER,
+                user_id INTEGER,
+                stage_id INTEGER,
+                priority VARCHAR,
+                task_count INTEGER,
+                completed_count INTEGER,
+                overdue_count INTEGER,
+                avg_completion_days DOUBLE PRECISION,
+                total_score DOUBLE PRECISION,
+                avg_score DOUBLE PRECISION
             )
+        """)
+        cr.execute(
+            "CREATE UNIQUE INDEX task_analytics_report_key_uniq ON task_analytics_report (%s)"
+            % self._ROLLUP_KEY
+        )
+        cr.execute("CREATE INDEX task_analytics_report_date_idx ON task_analytics_report (date)")
+        cr.execute("CREATE INDEX task_analytics_report_project_idx ON task_analytics_report (project_id, date)")
+
+        self._refresh_rollup()
+
+    @api.model
+    def _refresh_rollup(self, keys=None):
+        """
+        Đồng bộ bảng rollup với dữ liệu task.
+
+        Args:
+            keys: set các cặp (ngày tạo task, project_id) cần tính lại.
+                  None = dựng lại toàn bộ bảng.
+
+        Chạy dạng diff trong một câu SQL (DELETE dòng thừa + UPSERT dòng mới)
+        nên người đang mở pivot không bị khóa như khi DROP/CREATE.
         """
-        self.env.cr.execute(query)
+        if keys is not None:
+            keys = {(day, project_id or 0) for day, project_id in keys if day}
+            if not keys:
+                return
+
+        # SQL đọc trực tiếp bảng task/score card → đẩy các thay đổi đang chờ xuống DB
+        self.flush()
+
+        params = []
+        if keys is None:
+            where = ''
+            scope = 'TRUE'
+        else:
+            where = 'WHERE (DATE(t.create_date), COALESCE(t.project_id, 0)) IN %s'
+            scope = '(r.date, COALESCE(r.project_id, 0)) IN %s'
+            params = [tuple(keys), tuple(keys)]
+
+        columns = ', '.join(self._ROLLUP_COLUMNS)
+        updates = ', '.join('%s = EXCLUDED.%s' % (col, col) for col in self._ROLLUP_COLUMNS[9:])
+        changed = ' OR '.join(
+            'task_analytics_report.%s IS DISTINCT FROM EXCLUDED.%s' % (col, col)
+            for col in self._ROLLUP_COLUMNS[9:]
+        )
+
+        self.env.cr.execute("""
+            WITH fresh AS ({select}),
+            stale AS (
+                DELETE FROM task_analytics_report r
+                 WHERE {scope}
+                   AND NOT EXISTS (
+                        SELECT 1 FROM fresh f
+                         WHERE f.date = r.date
+                           AND f.project_id IS NOT DISTINCT FROM r.project_id
+                           AND f.user_id IS NOT DISTINCT FROM r.user_id
+                           AND f.stage_id IS NOT DISTINCT FROM r.stage_id
+                           AND f.priority IS NOT DISTINCT FROM r.priority
+                   )
+            )
+            INSERT INTO task_analytics_report ({columns})
+            SELECT {columns} FROM fresh
+            ON CONFLICT ({key}) DO UPDATE SET {updates}
+             WHERE {changed}
+        """.format(
+            select=self._ROLLUP_SELECT.format(where=where),
+            scope=scope,
+            columns=columns,
+            key=self._ROLLUP_KEY,
+            updates=updates,
+            changed=changed,
+        ), params)
+
+        self.invalidate_cache()
+
+    @api.model
+    def _refresh_for_tasks(self, tasks, extra_keys=None):
+        """Tính lại các dòng rollup chứa `tasks` (và các khóa cũ `extra_keys`)"""
+        keys = set(extra_keys or ())
+        keys |= tasks._get_analytics_rollup_keys()
+        self._refresh_rollup(keys)
+
+    @api.model
+    def _cron_rebuild_rollup(self):
+        """Cron: dựng lại toàn bộ rollup (sửa sai lệch + cập nhật overdue theo ngày)"""
+        _logger.info('Rebuilding task analytics rollup')
+        self._refresh_rollup()
@@ -1,11 +1,14 @@
 # -*- coding: utf-8 -*-
 
-from odoo import models, fields, api, _
+from odoo import models, fields, api, tools, _
 from odoo.exceptions import UserError
+from psycopg2.extras import execute_values
 import requests
 import json
 import logging
 
+from .external_task_client import ExternalTaskClient, github_ref, jira_ref
+
 _logger = logging.getLogger(__name__)
 
 
@@ -93,6 +96,11 @@ class TaskAPIConnector(models.Model):
         readonly=True
     )
 
+    # Số thread tải song song khi sync task (config_json: sync_workers)
+    SYNC_WORKERS = 8
+    # Số task mỗi câu UPDATE external_updated_at hàng loạt
+    SYNC_WRITE_CHUNK = 500
+
     def action_test_connection(self):
         """Test kết nối API"""
         self.ensure_one()
@@ -176,66 +184,155 @@ class TaskAPIConnector(models.Model):
             _logger.error(f'API request failed: {str(e)}')
             raise UserError(_('Request failed: %s') % str(e))
 
+    def _get_config(self):
+        """config_json dạng dict ({} nếu trống hoặc sai cú pháp)"""
+        self.ensure_one()
+        try:
+            config = json.loads(self.config_json or '{}')
+        except ValueError:
+            _logger.warning('Invalid config JSON on connector %s', self.name)
+            return {}
+        return config if isinstance(config, dict) else {}
+
+    def _get_task_client(self):
+        """
+        Client tải hàng loạt cho sync_tasks. config_json có thể đặt:
+        {"sync_workers": 8, "bulk": false} (false = luôn tải từng item qua REST)
+        """
+        self.ensure_one()
+        config = self._get_config()
+        return ExternalTaskClient(
+            self.api_type, self.base_url, self._get_headers(),
+            max_workers=int(config.get('sync_workers') or self.SYNC_WORKERS),
+            bulk=config.get('bulk', True),
+        )
+
+    def _collect_task_refs(self):
+        """
+        {tham chiếu ngoài: [(task_id, external_updated_at)]} của các task có external_task_id.
+        Nhiều task có thể trỏ tới cùng một issue.
+        """
+        self.ensure_one()
+        Task = self.env['project.task']
+        Task.flush(['external_task_id', 'jira_ticket', 'github_link', 'external_updated_at'])
+        self.env.cr.execute("""
+            SELECT id, jira_ticket, github_link, external_updated_at
+              FROM project_task
+             WHERE external_task_id IS NOT NULL
+               AND external_task_id <> ''
+        """)
+        refs = {}
+        for task_id, jira_ticket, github_link, updated_at in self.env.cr.fetchall():
+            if self.api_type == 'jira':
+                ref = jira_ref(jira_ticket)
+            elif self.api_type == 'github':
+                ref = github_ref(github_link)
+            else:
+                ref = None
+            if ref:
+                refs.setdefault(ref, []).append((task_id, updated_at))
+        return refs
+
     def sync_tasks(self):
-        """Đồng bộ tasks với hệ thống ngoài"""
+        """
+        Đồng bộ tasks với hệ thống ngoài: tải hàng loạt và song song (ngoài transaction
+        ORM), bỏ qua issue chưa đổi theo thời điểm cập nhật, rồi ghi theo nhóm.
+        """
         self.ensure_one()
-        
-        tasks = self.env['project.task'].search([
-            ('external_task_id', '!=', False)
-        ])
-        
-        synced_count = 0
-        for task in tasks:
+        if not self.is_active:
+            raise UserError(_('Connector chưa được kích hoạt'))
+
+        refs = self._collect_task_refs()
+        found, errors = {}, {}
+        requests_made = failed = 0
+        if refs:
+            client = self._get_task_client()
             try:
-                if self.api_type == 'jira' and task.jira_ticket:
-                    self._sync_jira_task(task)
-                    synced_count += 1
-                elif self.api_type == 'github' and task.github_link:
-                    self._sync_github_task(task)
-                    synced_count += 1
-            except Exception as e:
-                _logger.error(f'Failed to sync task {task.id}: {str(e)}')
-        
-        self.last_sync = fields.Datetime.now()
-        
+                found, errors = client.fetch(list(refs))
+            finally:
+                client.close()
+            requests_made, failed = client.requests_made, client.failed_requests
+
+        updates, skipped = self._prepare_task_updates(refs, found)
+        self._write_task_updates(updates)
+
+        for ref, message in list(errors.items())[:10]:
+            _logger.error('Failed to sync %s: %s', ref, message)
+        _logger.info('Connector %s synced %d tasks: %d updated, %d unchanged, %d errors, %d requests',
+                     self.name, len(updates) + skipped, len(updates), skipped, len(errors), requests_made)
+
+        self.write({
+            'last_sync': fields.Datetime.now(),
+            'total_requests': self.total_requests + requests_made,
+            'failed_requests': self.failed_requests + failed,
+        })
+
         return {
             'type': 'ir.actions.client',
             'tag': 'display_notification',
             'params': {
                 'title': _('Sync hoàn tất'),
-                'message': _('Đã sync %d tasks') % synced_count,
-                'type': 'success',
+                'message': _('Đã sync %d tasks (%d cập nhật, %d không đổi, %d lỗi, %d request)') % (
+                    len(updates) + skipped, len(updates), skipped, len(errors), requests_made),
+                'type': 'warning' if errors else 'success',
             }
         }
 
-    def _sync_jira_task(self, task):
-        """Sync với Jira"""
-        # Lấy thông tin từ Jira
-        response = self.send_request(f'issue/{task.jira_ticket}')
-        
-        # Update task từ Jira data
-        if response:
-            task.write({
-                'name': response.get('fields', {}).get('summary', task.name),
-                'description': response.get('fields', {}).get('description', task.description),
-            })
+    def _prepare_task_updates(self, refs, found):
+        """
+        Giá trị cần ghi cho từng task từ các issue đã tải.
 
-    def _sync_github_task(self, task):
-        """Sync với GitHub"""
-        # Parse GitHub link to get owner/repo/issue_number
-        # VD: https://github.com/owner/repo/issues/123
-        if '/issues/' in task.github_link or '/pull/' in task.github_link:
-            parts = task.github_link.split('/')
-            issue_num = parts[-1]
-            repo = f"{parts[-4]}/{parts[-3]}"
-            
-            endpoint = f'repos/{repo}/issues/{issue_num}'
-            response = self.send_request(endpoint)
-            
-            if response:
-                task.write({
-                    'name': response.get('title', task.name),
-                })
+        Returns:
+            ({task_id: vals}, số task bỏ qua vì issue chưa đổi kể từ lần sync trước)
+        """
+        candidates = {
+            task_id: (item, updated_at)
+            for ref, item in found.items() for task_id, updated_at in refs.get(ref, ())
+        }
+        tasks = self.env['project.task'].browse(list(candidates))
+        updates, skipped = {}, 0
+        for task in tasks:
+            item, updated_at = candidates[task.id]
+            if updated_at and item['updated'] and item['updated'] <= updated_at:
+                skipped += 1
+                continue
+            vals = {'external_updated_at': item['updated'] or fields.Datetime.now()}
+            if item.get('name') and item['name'] != task.name:
+                vals['name'] = item['name']
+            if item.get('description') and item['description'] != task.description:
+                vals['description'] = item['description']
+            updates[task.id] = vals
+        return updates, skipped
+
+    def _write_task_updates(self, updates):
+        """
+        external_updated_at (giá trị riêng từng task, chỉ là dấu mốc đồng bộ) được ghi bằng
+        một UPDATE ... FROM (VALUES ...) mỗi SYNC_WRITE_CHUNK task. Các task thật sự đổi
+        name / description (thường ít) đi qua write của ORM, gom theo nhóm cùng giá trị,
+        để giữ tracking và các override write của project.task.
+        """
+        Task = self.env['project.task']
+        Task.flush(['external_updated_at'])
+        for chunk in tools.split_every(self.SYNC_WRITE_CHUNK, list(updates.items())):
+            execute_values(self.env.cr._obj, """
+                UPDATE project_task t
+                   SET external_updated_at = v.external_updated_at
+                  FROM (VALUES %s) AS v(id, external_updated_at)
+                 WHERE t.id = v.id
+            """, [(task_id, vals['external_updated_at']) for task_id, vals in chunk],
+                template='(%s, %s::timestamp)', page_size=len(chunk))
+            tasks = Task.browse([task_id for task_id, _vals in chunk])
+            tasks.invalidate_cache(['external_updated_at'], tasks.ids)
+            tasks.modified(['external_updated_at'])
+
+        groups = {}
+        for task_id, vals in updates.items():
+            content = tuple(sorted((k, v) for k, v in vals.items() if k != 'external_updated_at'))
+            if content:
+                groups.setdefault(content, []).append(task_id)
+        for content, task_ids in groups.items():
+            Task.browse(task_ids).write(dict(content))
+        Task.flush()
 
 
 class TaskAIAssistant(models.Model):
@@ -315,18 +412,12 @@ class TaskAIAssistant(models.Model):
     def predict_task_duration(self, task):
         """AI dự đoán thời gian hoàn thành"""
         self.ensure_one()
-        
-        # Lấy historical data
-        similar_tasks = self.env['project.task'].search([
-            ('complexity', '=', task.complexity),
-            ('actual_hours', '>', 0),
-        ], limit=10)
-        
-        if similar_tasks:
-            avg_hours = sum(similar_tasks.mapped('actual_hours')) / len(similar_tasks)
-            return avg_hours
-        
-        return task.planned_hours or 8.0
+        return self.predict_task_durations(task)[task.id]
+
+    def predict_task_durations(self, tasks):
+        """Dự đoán thời gian cho nhiều task (VD: cả backlog dự án) trong một lần gọi k-NN"""
+        self.ensure_one()
+        return self.env['task.duration.index'].predict(tasks)
 
     def analyze_sentiment(self, text):
         """Phân tích cảm xúc từ text"""
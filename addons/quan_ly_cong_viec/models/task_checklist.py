@@ -3,9 +3,66 @@
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
 import logging
+import re
+import unicodedata
 
 _logger = logging.getLogger(__name__)
 
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def normalize_tokens(text):
+    """Tách token + bỏ dấu tiếng Việt ('Hoàn thành' → ['hoan', 'thanh'])"""
+    text = unicodedata.normalize('NFD', (text or '').lower()).replace('đ', 'd')
+    text = ''.join(ch for ch in text if unicodedata.category(ch) != 'Mn')
+    return _TOKEN_RE.findall(text)
+
+
+class ChecklistMatcher(object):
+    """
+    So khớp nội dung báo cáo với các checklist item.
+
+    Item được lập chỉ mục ngược theo token đã chuẩn hóa (trọng số = độ dài token,
+    token dài mang nhiều thông tin hơn). Điểm của một item là tỷ lệ trọng số token
+    của item xuất hiện trong báo cáo (tích vô hướng thưa giữa vector item và tập
+    token báo cáo). Báo cáo chỉ được tách token một lần: O(số token + số lần khớp).
+    """
+
+    MATCH_THRESHOLD = 0.5
+
+    def __init__(self, items):
+        """items: iterable (key, name)"""
+        self.keys = []
+        self.totals = []
+        self.index = {}
+        for key, name in items:
+            weights = {token: len(token) for token in normalize_tokens(name) if len(token) > 1}
+            total = sum(weights.values())
+            if not total:
+                continue
+            position = len(self.keys)
+            self.keys.append(key)
+            self.totals.append(total)
+            for token, weight in weights.items():
+                self.index.setdefault(token, []).append((position, weight))
+
+    def score(self, text):
+        """{key: điểm 0..1} cho các item có ít nhất một token xuất hiện trong `text`"""
+        hits = [0] * len(self.keys)
+        for token in set(normalize_tokens(text)):
+            for position, weight in self.index.get(token, ()):
+                hits[position] += weight
+        return {
+            self.keys[position]: hit / self.totals[position]
+            for position, hit in enumerate(hits) if hit
+        }
+
+    def match(self, text, threshold=None):
+        """Danh sách key đạt ngưỡng, giữ thứ tự item ban đầu"""
+        threshold = self.MATCH_THRESHOLD if threshold is None else threshold
+        scores = self.score(text)
+        return [key for key in self.keys if scores.get(key, 0.0) >= threshold]
+
 
 class TaskChecklist(models.Model):
     _name = 'task.checklist'
@@ -123,11 +180,13 @@ class TaskChecklist(models.Model):
             vals['done_date'] = fields.Datetime.now()
             vals['done_by'] = self.env.user.id
             
-            # Notify user khi complete
-            self.task_id.message_post(
-                body=f"✅ Checklist item hoàn thành: <b>{self.name}</b>",
-                message_type='notification',
-            )
+            # Notify user khi complete (một tin nhắn cho mỗi task)
+            for task in self.task_id:
+                items = self.filtered(lambda c: c.task_id == task)
+                task.message_post(
+                    body=f"✅ Checklist item hoàn thành: <b>{', '.join(items.mapped('name'))}</b>",
+                    message_type='notification',
+                )
         
         result = super(TaskChecklist, self).write(vals)
         
@@ -172,9 +231,10 @@ Trả về JSON format:
 ]
 """
             
-            response = ai_assistant._call_openai(
+            response = ai_assistant._call_openai_api(
                 messages=[{'role': 'user', 'content': prompt}],
-                temperature=0.7
+                temperature=0.7,
+                use_cache=True,
             )
             
             # Parse JSON response
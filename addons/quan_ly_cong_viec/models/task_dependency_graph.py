@@ -0,0 +1,352 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, tools, _
+from odoo.exceptions import UserError, ValidationError
+from collections import defaultdict, deque
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+class TaskDependencyGraph(models.AbstractModel):
+    """
+    Đồ thị phụ thuộc task (bảng task_dependency_rel: task_id phụ thuộc vào depends_on_id).
+
+    - Truy vấn bắc cầu (upstream / downstream) bằng một câu WITH RECURSIVE ... UNION,
+      mỗi đỉnh chỉ được thăm một lần nên chi phí tỉ lệ với phần đồ thị đi qua.
+    - Lịch CPM (earliest start, latest finish, slack, critical path) của cả dự án tính
+      trong O(V+E): một câu SQL tải đỉnh + cạnh, sắp xếp topo (Kahn), duyệt xuôi rồi ngược.
+    """
+    _name = 'task.dependency.graph'
+    _description = 'Đồ thị Phụ thuộc Task'
+
+    # Ngưỡng so sánh slack (giờ) để coi là 0
+    SLACK_EPSILON = 1e-6
+
+    # ==================
+    # TRUY VẤN BẮC CẦU
+    # ==================
+    @api.model
+    def _walk(self, task_ids, upstream=True):
+        """
+        Tập id các task đi tới được từ `task_ids` (không gồm chính chúng trừ khi có vòng).
+
+        upstream=True: các task mà `task_ids` phụ thuộc vào (trực tiếp hoặc gián tiếp)
+        upstream=False: các task bị `task_ids` chặn
+        """
+        task_ids = tuple(tid for tid in task_ids if isinstance(tid, int))
+        if not task_ids:
+            return set()
+
+        src, dst = ('task_id', 'depends_on_id') if upstream else ('depends_on_id', 'task_id')
+        self.env['project.task'].flush(['dependent_task_ids'])
+        self.env.cr.execute("""
+            WITH RECURSIVE reach(node_id) AS (
+                SELECT {dst} FROM task_dependency_rel WHERE {src} IN %s
+                UNION
+                SELECT d.{dst}
+                  FROM reach r
+                  JOIN task_dependency_rel d ON d.{src} = r.node_id
+            )
+            SELECT node_id FROM reach
+        """.format(src=src, dst=dst), [task_ids])
+        return {row[0] for row in self.env.cr.fetchall()}
+
+    @api.model
+    def get_upstream(self, tasks, only_open=False):
+        """Các task mà `tasks` phụ thuộc vào (bắc cầu)"""
+        upstream = self.env['project.task'].browse(self._walk(tasks.ids, upstream=True)) - tasks
+        if only_open:
+            upstream = upstream.filtered(lambda t: not t.is_task_closed)
+        return upstream
+
+    @api.model
+    def get_downstream(self, tasks):
+        """Các task bị `tasks` chặn (bắc cầu) - "task này đang chặn những gì" """
+        return self.env['project.task'].browse(self._walk(tasks.ids, upstream=False)) - tasks
+
+    @api.model
+    def count_downstream(self, tasks):
+        """{task_id: số task bị chặn bắc cầu} cho nhiều task bằng một câu SQL"""
+        counts = dict.fromkeys(tasks.ids, 0)
+        if not counts:
+            return counts
+
+        self.env['project.task'].flush(['dependent_task_ids'])
+        self.env.cr.execute("""
+            WITH RECURSIVE reach(start_id, node_id) AS (
+                SELECT depends_on_id, task_id FROM task_dependency_rel WHERE depends_on_id IN %s
+                UNION
+                SELECT r.start_id, d.task_id
+                  FROM reach r
+                  JOIN task_dependency_rel d ON d.depends_on_id = r.node_id
+            )
+            SELECT start_id, COUNT(*) FILTER (WHERE node_id != start_id)
+              FROM reach
+             GROUP BY start_id
+        """, [tuple(counts)])
+        counts.update(self.env.cr.fetchall())
+        return counts
+
+    # ==================
+    # PHÁT HIỆN VÒNG
+    # ==================
+    @api.model
+    def _find_cyclic(self, task_ids):
+        """Các id trong `task_ids` phụ thuộc (bắc cầu) vào chính nó"""
+        task_ids = tuple(tid for tid in task_ids if isinstance(tid, int))
+        if not task_ids:
+            return []
+
+        self.env['project.task'].flush(['dependent_task_ids'])
+        self.env.cr.execute("""
+            WITH RECURSIVE reach(start_id, node_id) AS (
+                SELECT task_id, depends_on_id FROM task_dependency_rel WHERE task_id IN %s
+                UNION
+                SELECT r.start_id, d.depends_on_id
+                  FROM reach r
+                  JOIN task_dependency_rel d ON d.task_id = r.node_id
+                 WHERE r.node_id != r.start_id
+            )
+            SELECT DISTINCT start_id FROM reach WHERE node_id = start_id
+        """, [task_ids])
+        return [row[0] for row in self.env.cr.fetchall()]
+
+    @api.model
+    def check_no_cycle(self, tasks):
+        """Raise ValidationError nếu một trong `tasks` nằm trên vòng phụ thuộc"""
+        cyclic = self._find_cyclic(tasks.ids)
+        if cyclic:
+            names = self.env['project.task'].browse(cyclic).mapped('name')
+            raise ValidationError(_(
+                'Phụ thuộc vòng! Các task sau phụ thuộc (trực tiếp hoặc gián tiếp) vào chính nó:\n%s'
+            ) % '\n'.join(names))
+
+    # ==================
+    # CRITICAL PATH (CPM)
+    # ==================
+    @api.model
+    def _load_project_graph(self, project_id):
+        """
+        Tải đồ thị của một dự án bằng 2 câu SQL.
+
+        Returns:
+            (durations {task_id: giờ còn lại}, successors {task_id: [task_id]}, indegree {task_id: n})
+            Task đã đóng có thời lượng 0; cạnh sang task ngoài dự án bị bỏ qua.
+        """
+        self.env['project.task'].flush(['project_id', 'planned_hours', 'stage_id', 'active', 'dependent_task_ids'])
+        self.env['project.task.type'].flush(['fold'])
+        cr = self.env.cr
+
+        cr.execute("""
+            SELECT t.id,
+                   CASE WHEN COALESCE(s.fold, FALSE) THEN 0
+                        ELSE COALESCE(t.planned_hours, 0) END
+              FROM project_task t
+              LEFT JOIN project_task_type s ON s.id = t.stage_id
+             WHERE t.project_id = %s AND t.active
+        """, [project_id])
+        durations = dict(cr.fetchall())
+
+        successors = defaultdict(list)
+        indegree = dict.fromkeys(durations, 0)
+        cr.execute("""
+            SELECT r.depends_on_id, r.task_id
+              FROM task_dependency_rel r
+              JOIN project_task t ON t.id = r.task_id
+              JOIN project_task p ON p.id = r.depends_on_id
+             WHERE t.project_id = %s AND t.active
+               AND p.project_id = %s AND p.active
+        """, [project_id, project_id])
+        for pred_id, succ_id in cr.fetchall():
+            successors[pred_id].append(succ_id)
+            indegree[succ_id] += 1
+
+        return durations, successors, indegree
+
+    @api.model
+    def compute_schedule(self, project):
+        """
+        Lịch CPM của dự án (đơn vị: giờ tính từ thời điểm hiện tại).
+
+        Returns:
+            {
+                'schedule': {task_id: {'es', 'ef', 'ls', 'lf', 'slack', 'critical'}},
+                'duration': tổng thời lượng dự án,
+                'critical_path': [task_id] theo thứ tự thực hiện,
+            }
+        """
+        if not project:
+            return {'schedule': {}, 'duration': 0.0, 'critical_path': []}
+        durations, successors, indegree = self._load_project_graph(project.id)
+
+        # Sắp xếp topo (Kahn)
+        queue = deque(tid for tid, deg in indegree.items() if deg == 0)
+        order = []
+        while queue:
+            tid = queue.popleft()
+            order.append(tid)
+            for succ in successors[tid]:
+                indegree[succ] -= 1
+                if indegree[succ] == 0:
+                    queue.append(succ)
+        if len(order) != len(durations):
+            raise UserError(_('Dự án "%s" có phụ thuộc vòng, không thể lập lịch!') % project.display_name)
+
+        # Duyệt xuôi: earliest start / finish
+        earliest_start = dict.fromkeys(order, 0.0)
+        earliest_finish = {}
+        for tid in order:
+            finish = earliest_start[tid] + durations[tid]
+            earliest_finish[tid] = finish
+            for succ in successors[tid]:
+                if finish > earliest_start[succ]:
+                    earliest_start[succ] = finish
+        project_duration = max(earliest_finish.values(), default=0.0)
+
+        # Duyệt ngược: latest finish / start
+        latest_finish = {}
+        latest_start = {}
+        for tid in reversed(order):
+            finish = min((latest_start[succ] for succ in successors[tid]), default=project_duration)
+            latest_finish[tid] = finish
+            latest_start[tid] = finish - durations[tid]
+
+        schedule = {}
+        for tid in order:
+            slack = latest_start[tid] - earliest_start[tid]
+            schedule[tid] = {
+                'es': earliest_start[tid],
+                'ef': earliest_finish[tid],
+                'ls': latest_start[tid],
+                'lf': latest_finish[tid],
+                'slack': slack,
+                'critical': slack <= self.SLACK_EPSILON,
+            }
+
+        return {
+            'schedule': schedule,
+            'duration': project_duration,
+            'critical_path': self._extract_critical_path(order, successors, schedule),
+        }
+
+    @api.model
+    def _graph_fingerprint(self, project_id):
+        """
+        Dấu vân tay của những gì lịch CPM phụ thuộc (task, thời lượng, stage, cạnh),
+        tính bằng một câu SQL tổng hợp - rẻ hơn nhiều so với tải và sắp xếp cả đồ thị.
+        """
+        self.env['project.task'].flush(['project_id', 'planned_hours', 'stage_id', 'active', 'dependent_task_ids'])
+        self.env['project.task.type'].flush(['fold'])
+        self.env.cr.execute("""
+            SELECT (SELECT ROW(COUNT(*), MAX(write_date), SUM(planned_hours),
+                               SUM(COALESCE(stage_id, 0)), SUM(active::int))::text
+                      FROM project_task WHERE project_id = %(project_id)s),
+                   (SELECT ROW(COUNT(*), SUM(r.task_id::bigint * 1000003 + r.depends_on_id))::text
+                      FROM task_dependency_rel r
+                      JOIN project_task t ON t.id = r.task_id
+                     WHERE t.project_id = %(project_id)s),
+                   (SELECT MAX(write_date)::text FROM project_task_type)
+        """, {'project_id': project_id})
+        return self.env.cr.fetchone()
+
+    @api.model
+    def get_schedule(self, project):
+        """
+        schedule của compute_schedule, cache theo dự án và dấu vân tay đồ thị.
+        Dự án có phụ thuộc vòng (dữ liệu cũ trước constraint) cho lịch rỗng thay vì lỗi.
+        """
+        if not project:
+            return {}
+        return self._cached_schedule(project.id, self._graph_fingerprint(project.id))
+
+    @tools.ormcache('project_id', 'fingerprint')
+    def _cached_schedule(self, project_id, fingerprint):
+        project = self.env['project.project'].sudo().browse(project_id)
+        try:
+            return self.sudo().compute_schedule(project)['schedule']
+        except UserError as e:
+            _logger.warning('CPM schedule unavailable for project %s: %s', project_id, e)
+            return {}
+
+    @api.model
+    def _extract_critical_path(self, order, successors, schedule):
+        """Một chuỗi task găng từ đầu tới cuối dự án (đi theo cạnh có ES = EF trước)"""
+        current = next(
+            (tid for tid in order if schedule[tid]['critical'] and schedule[tid]['es'] <= self.SLACK_EPSILON),
+            None
+        )
+        path = []
+        while current is not None:
+            path.append(current)
+            finish = schedule[current]['ef']
+            current = next(
+                (succ for succ in successors[current]
+                 if schedule[succ]['critical'] and abs(schedule[succ]['es'] - finish) <= self.SLACK_EPSILON),
+                None
+            )
+        return path
+
+
+class ProjectTaskDependency(models.Model):
+    _inherit = 'project.task'
+
+    blocked_task_count = fields.Integer(
+        string='Đang chặn (task)',
+        compute='_compute_blocked_task_count',
+        help='Số task phụ thuộc (trực tiếp hoặc gián tiếp) vào task này'
+    )
+
+    cpm_earliest_start = fields.Float(
+        string='Bắt đầu sớm nhất (h)',
+        compute='_compute_cpm_schedule',
+        help='Số giờ tính từ hiện tại, theo lịch găng (CPM) của dự án'
+    )
+
+    cpm_latest_finish = fields.Float(
+        string='Kết thúc muộn nhất (h)',
+        compute='_compute_cpm_schedule',
+    )
+
+    cpm_slack = fields.Float(
+        string='Thời gian dự trữ (h)',
+        compute='_compute_cpm_schedule',
+    )
+
+    is_critical = fields.Boolean(
+        string='Task găng',
+        compute='_compute_cpm_schedule',
+        help='Nằm trên đường găng: trễ task này làm trễ cả dự án'
+    )
+
+    @api.constrains('dependent_task_ids')
+    def _check_dependency_cycle(self):
+        self.env['task.dependency.graph'].check_no_cycle(self)
+
+    def _compute_blocked_task_count(self):
+        counts = self.env['task.dependency.graph'].count_downstream(self._origin)
+        for task in self:
+            task.blocked_task_count = counts.get(task._origin.id, 0)
+
+    def _compute_cpm_schedule(self):
+        """Lịch (đã cache) của mỗi dự án có trong recordset"""
+        graph = self.env['task.dependency.graph']
+        schedules = {project.id: graph.get_schedule(project) for project in self.mapped('project_id')}
+        for task in self:
+            data = schedules.get(task.project_id.id, {}).get(task._origin.id)
+            task.cpm_earliest_start = data['es'] if data else 0.0
+            task.cpm_latest_finish = data['lf'] if data else 0.0
+            task.cpm_slack = data['slack'] if data else 0.0
+            task.is_critical = data['critical'] if data else False
+
+    def action_view_blocked_tasks(self):
+        """Mở danh sách task đang bị task này chặn"""
+        self.ensure_one()
+        blocked = self.env['task.dependency.graph'].get_downstream(self)
+        return {
+            'name': _('Task bị chặn bởi %s') % self.name,
+            'type': 'ir.actions.act_window',
+            'res_model': 'project.task',
+            'view_mode': 'tree,form',
+            'domain': [('id', 'in', blocked.ids)],
+        }
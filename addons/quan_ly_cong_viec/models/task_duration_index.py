@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, api
+from datetime import timedelta
+import hashlib
+import logging
+import threading
+
+from .task_search_index import fold_text
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_logger = logging.getLogger(__name__)
+
+
+def _stable_hash(value):
+    """Hash ổn định giữa các process (hash() của Python thay đổi theo PYTHONHASHSEED)"""
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+class TaskFeaturizer(object):
+    """
+    Vector đặc trưng của task cho k-NN (cosine):
+
+    - văn bản (tên + mô tả, đã bỏ dấu): unigram + bigram băm vào TEXT_DIM chiều,
+      tf dạng log(1 + tf), mỗi token băm kèm dấu ±1 để giảm va chạm
+    - complexity, priority_level: one-hot
+    - kỹ năng yêu cầu: băm id kỹ năng vào SKILL_DIM chiều
+
+    Mỗi khối được chuẩn hóa L2 rồi nhân trọng số, cả vector chuẩn hóa L2 lần cuối.
+    """
+
+    TEXT_DIM = 256
+    SKILL_DIM = 32
+    COMPLEXITIES = ('easy', 'medium', 'hard', 'epic')
+    PRIORITIES = ('0', '1', '2', '3', '4')
+    WEIGHTS = {'text': 1.0, 'complexity': 0.8, 'priority': 0.3, 'skills': 0.6}
+
+    def __init__(self):
+        self.dim = self.TEXT_DIM + len(self.COMPLEXITIES) + len(self.PRIORITIES) + self.SKILL_DIM
+
+    def transform(self, rows):
+        """rows: [(name, description, complexity, priority_level, skill_ids)] → ma trận float32 (n × dim)"""
+        matrix = np.zeros((len(rows), self.dim), dtype=np.float32)
+        c_off = self.TEXT_DIM
+        p_off = c_off + len(self.COMPLEXITIES)
+        s_off = p_off + len(self.PRIORITIES)
+        weights = self.WEIGHTS
+
+        for i, (name, description, complexity, priority, skill_ids) in enumerate(rows):
+            row = matrix[i]
+
+            tokens = fold_text('%s %s' % (name or '', description or '')).split()
+            grams = tokens + ['%s_%s' % pair for pair in zip(tokens, tokens[1:])]
+            if grams:
+                text = np.zeros(self.TEXT_DIM, dtype=np.float32)
+                for gram in grams:
+                    h = _stable_hash(gram)
+                    text[h % self.TEXT_DIM] += 1.0 if (h >> 32) & 1 else -1.0
+                text = np.sign(text) * np.log1p(np.abs(text))
+                norm = np.linalg.norm(text)
+                if norm:
+                    row[:c_off] = text / norm * weights['text']
+
+            if complexity in self.COMPLEXITIES:
+                row[c_off + self.COMPLEXITIES.index(complexity)] = weights['complexity']
+            if priority in self.PRIORITIES:
+                row[p_off + self.PRIORITIES.index(priority)] = weights['priority']
+
+            if skill_ids:
+                skills = np.zeros(self.SKILL_DIM, dtype=np.float32)
+                for skill_id in skill_ids:
+                    skills[_stable_hash(str(skill_id)) % self.SKILL_DIM] = 1.0
+                row[s_off:] = skills / np.linalg.norm(skills) * weights['skills']
+
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix /= norms
+        return matrix
+
+
+class DurationIndex(object):
+    """
+    Ma trận đặc trưng của các task đã đóng (actual_hours > 0) trong một database.
+
+    Cập nhật tăng dần: mỗi lần refresh vector hóa task hợp lệ chưa có trong ma trận
+    và task đã sửa gần đây (theo write_date), bỏ các task không còn đủ điều kiện.
+    """
+
+    def __init__(self, featurizer):
+        self.featurizer = featurizer
+        self.lock = threading.Lock()
+        self.matrix = np.zeros((0, featurizer.dim), dtype=np.float32)
+        self.hours = np.zeros(0, dtype=np.float32)
+        self.task_ids = np.zeros(0, dtype=np.int64)
+        self.watermark = None
+
+    def upsert(self, task_ids, vectors, hours):
+        """Thay dòng của task đã có, thêm dòng cho task mới"""
+        if not len(task_ids):
+            return
+        position = {tid: i for i, tid in enumerate(self.task_ids.tolist())}
+        existing = [(position[tid], j) for j, tid in enumerate(task_ids) if tid in position]
+        new = [j for j, tid in enumerate(task_ids) if tid not in position]
+        for i, j in existing:
+            self.matrix[i] = vectors[j]
+            self.hours[i] = hours[j]
+        if new:
+            self.matrix = np.vstack([self.matrix, vectors[new]])
+            self.hours = np.concatenate([self.hours, np.asarray(hours, dtype=np.float32)[new]])
+            self.task_ids = np.concatenate([self.task_ids, np.asarray(task_ids, dtype=np.int64)[new]])
+
+    def retain(self, valid_ids):
+        """Giữ lại các dòng có task id trong `valid_ids` (mảng int64)"""
+        keep = np.isin(self.task_ids, valid_ids)
+        if not keep.all():
+            self.matrix = self.matrix[keep]
+            self.hours = self.hours[keep]
+            self.task_ids = self.task_ids[keep]
+
+    def knn_predict(self, queries, exclude_ids=None, k=10, chunk=256):
+        """
+        Dự đoán giờ cho từng dòng của `queries` = trung bình actual_hours của k
+        láng giềng gần nhất, trọng số theo độ tương đồng cosine (> 0).
+        Trả về mảng float (nan nếu không có láng giềng).
+        """
+        n = len(self.task_ids)
+        result = np.full(len(queries), np.nan, dtype=np.float64)
+        if not n or not len(queries):
+            return result
+        k = min(k, n)
+
+        for start in range(0, len(queries), chunk):
+            sims = queries[start:start + chunk] @ self.matrix.T
+            if exclude_ids is not None:
+                # Không dùng chính task đó làm láng giềng
+                own = exclude_ids[start:start + chunk]
+                sims[own[:, None] == self.task_ids[None, :]] = -1.0
+            top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+            top_sims = np.take_along_axis(sims, top, axis=1)
+            weights = np.clip(top_sims, 0.0, None)
+            total = weights.sum(axis=1)
+            weighted = (weights * self.hours[top]).sum(axis=1)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                result[start:start + chunk] = np.where(total > 0, weighted / total, np.nan)
+        return result
+
+
+class TaskDurationIndex(models.AbstractModel):
+    """
+    Dự đoán thời gian task theo k láng giềng gần nhất trong lịch sử task đã đóng.
+
+    Ma trận đặc trưng sống trong bộ nhớ của từng worker (mỗi database một ma trận)
+    và được làm mới tăng dần trước mỗi lần dự đoán.
+    """
+    _name = 'task.duration.index'
+    _description = 'Chỉ mục Dự đoán Thời gian Task'
+
+    DEFAULT_K = 10
+    DEFAULT_HOURS = 8.0
+
+    _indexes = {}
+    _indexes_lock = threading.Lock()
+
+    @api.model
+    def _get_index(self):
+        dbname = self.env.cr.dbname
+        with self._indexes_lock:
+            index = self._indexes.get(dbname)
+            if index is None:
+                index = self._indexes[dbname] = DurationIndex(TaskFeaturizer())
+            return index
+
+    @api.model
+    def _fetch_feature_rows(self, where, params):
+        """(id, name, description, complexity, priority_level, skill_ids, actual_hours, write_date) theo điều kiện"""
+        Task = self.env['project.task']
+        skills_field = Task._fields['required_skill_ids']
+        Task.flush(['name', 'description', 'complexity', 'priority_level', 'required_skill_ids',
+                    'actual_hours', 'stage_id', 'active'])
+        self.env['project.task.type'].flush(['fold'])
+        self.env.cr.execute("""
+            SELECT t.id, t.name, t.description, t.complexity, t.priority_level,
+                   ARRAY(SELECT r.{col2} FROM {rel} r WHERE r.{col1} = t.id),
+                   t.actual_hours, t.write_date
+              FROM project_task t
+              LEFT JOIN project_task_type s ON s.id = t.stage_id
+             WHERE {where}
+        """.format(
+            rel=skills_field.relation, col1=skills_field.column1, col2=skills_field.column2, where=where,
+        ), params)
+        return self.env.cr.fetchall()
+
+    _HISTORY_WHERE = "t.active AND COALESCE(s.fold, FALSE) AND t.actual_hours > 0"
+    # write_date là thời điểm bắt đầu transaction: task do transaction commit sau lần refresh
+    # trước có thể mang write_date nhỏ hơn watermark, nên đọc lại cả cửa sổ này
+    WATERMARK_OVERLAP = timedelta(hours=1)
+
+    @api.model
+    def _refresh(self):
+        """
+        Đồng bộ ma trận với database: bỏ task hết hợp lệ, vector hóa task hợp lệ chưa có
+        trong ma trận (kể cả task vừa hợp lệ do stage đổi fold, write_date cũ) và task sửa
+        sau watermark - WATERMARK_OVERLAP.
+        """
+        index = self._get_index()
+        with index.lock:
+            self.env['project.task'].flush(['stage_id', 'active', 'actual_hours'])
+            self.env['project.task.type'].flush(['fold'])
+            self.env.cr.execute("""
+                SELECT t.id FROM project_task t
+                  LEFT JOIN project_task_type s ON s.id = t.stage_id
+                 WHERE {where}
+            """.format(where=self._HISTORY_WHERE))
+            valid_ids = np.fromiter((row[0] for row in self.env.cr.fetchall()), dtype=np.int64)
+            index.retain(valid_ids)
+
+            where = self._HISTORY_WHERE
+            params = []
+            if index.watermark:
+                missing = np.setdiff1d(valid_ids, index.task_ids, assume_unique=True)
+                where += " AND (t.write_date > %s OR t.id = ANY(%s))"
+                params += [index.watermark - self.WATERMARK_OVERLAP, missing.tolist()]
+            rows = self._fetch_feature_rows(where, params)
+
+            if rows:
+                vectors = index.featurizer.transform([row[1:6] for row in rows])
+                index.upsert([row[0] for row in rows], vectors, [row[6] for row in rows])
+                latest = max(row[7] for row in rows)
+                index.watermark = max(index.watermark, latest) if index.watermark else latest
+
+            if rows:
+                _logger.info('Duration index: %d tasks vectorized, %d in index', len(rows), len(index.task_ids))
+        return index
+
+    @api.model
+    def predict(self, tasks, k=None):
+        """
+        Dự đoán số giờ cho cả recordset `tasks` trong một lần gọi.
+
+        Returns:
+            {task_id: giờ} (planned_hours hoặc DEFAULT_HOURS nếu không có láng giềng)
+        """
+        if not tasks:
+            return {}
+        if np is None:
+            return self._predict_without_numpy(tasks)
+
+        index = self._refresh()
+        rows = self._fetch_feature_rows('t.id IN %s', [tuple(tasks.ids)])
+        task_ids = [row[0] for row in rows]
+        queries = index.featurizer.transform([row[1:6] for row in rows])
+        with index.lock:
+            predicted = index.knn_predict(
+                queries, exclude_ids=np.asarray(task_ids, dtype=np.int64), k=k or self.DEFAULT_K,
+            )
+
+        fallback = {task.id: task.planned_hours or self.DEFAULT_HOURS for task in tasks}
+        return {
+            task_id: float(hours) if not np.isnan(hours) else fallback[task_id]
+            for task_id, hours in zip(task_ids, predicted)
+        }
+
+    @api.model
+    def _predict_without_numpy(self, tasks):
+        """Không có NumPy: trung bình actual_hours của task đã đóng cùng độ phức tạp (một câu SQL)"""
+        self.env.cr.execute("""
+            SELECT t.complexity, AVG(t.actual_hours)
+              FROM project_task t
+              LEFT JOIN project_task_type s ON s.id = t.stage_id
+             WHERE {where}
+             GROUP BY t.complexity
+        """.format(where=self._HISTORY_WHERE))
+        averages = dict(self.env.cr.fetchall())
+        return {
+            task.id: averages.get(task.complexity) or task.planned_hours or self.DEFAULT_HOURS
+            for task in tasks
+        }
@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+from psycopg2.extras import execute_values
+import json
+import logging
+import threading
+
+from .effort_regression import (
+    FEATURE_NAMES, EffortRegressor, featurize, mean_absolute_error, user_history,
+)
+
+_logger = logging.getLogger(__name__)
+
+# Task đã đóng dùng để huấn luyện (cùng điều kiện với task.duration.index)
+HISTORY_WHERE = "t.active AND COALESCE(s.fold, FALSE) AND t.actual_hours > 0"
+OPEN_WHERE = "t.active AND NOT COALESCE(s.fold, FALSE)"
+
+
+class TaskEffortModel(models.Model):
+    """
+    Mô hình hồi quy thời gian task đã huấn luyện (mỗi lần huấn luyện = một phiên bản).
+
+    Hệ số được lưu dạng JSON; phiên bản mới nhất đang active được dùng để điền
+    ai_estimated_hours cho các task đang mở. Mỗi worker giữ bản đã giải mã của
+    phiên bản hiện hành trong bộ nhớ.
+    """
+    _name = 'task.effort.model'
+    _description = 'Mô hình Dự đoán Thời gian Task'
+    _order = 'version desc'
+    _rec_name = 'version'
+
+    MIN_SAMPLES = 20
+    RETRAIN_DAYS = 7
+    # Mỗi HOLDOUT_EVERY task (theo id) có 1 task để đánh giá
+    HOLDOUT_EVERY = 5
+    REFRESH_CHUNK = 2000
+
+    version = fields.Integer(string='Phiên bản', required=True, readonly=True)
+    active = fields.Boolean(default=True)
+    feature_names = fields.Char(string='Đặc trưng', readonly=True)
+    coefficients = fields.Text(string='Hệ số (JSON)', readonly=True)
+    l2 = fields.Float(string='Hệ số Ridge', readonly=True)
+    sample_count = fields.Integer(string='Số task huấn luyện', readonly=True)
+    train_mae = fields.Float(string='MAE huấn luyện (giờ)', readonly=True)
+    holdout_mae = fields.Float(string='MAE kiểm tra (giờ)', readonly=True)
+    baseline_mae = fields.Float(string='MAE planned_hours (giờ)', readonly=True,
+                                help='Sai số nếu chỉ dùng planned_hours làm dự đoán, trên cùng tập kiểm tra')
+
+    _sql_constraints = [
+        ('version_unique', 'UNIQUE(version)', 'Phiên bản mô hình phải là duy nhất!'),
+    ]
+
+    # {dbname: (model id, EffortRegressor)}
+    _regressors = {}
+    _regressors_lock = threading.Lock()
+
+    @api.model
+    def _fetch_rows(self, where, params=None, limit=None):
+        """
+        [(id, (planned_hours, complexity, skill_level_required, user_ids, actual_hours), ai_estimated_hours)]
+        theo điều kiện, sắp theo id
+        """
+        Task = self.env['project.task']
+        users_field = Task._fields['user_ids']
+        Task.flush(['planned_hours', 'complexity', 'skill_level_required', 'user_ids',
+                    'actual_hours', 'ai_estimated_hours', 'stage_id', 'active'])
+        self.env['project.task.type'].flush(['fold'])
+        self.env.cr.execute("""
+            SELECT t.id, t.planned_hours, t.complexity, t.skill_level_required,
+                   ARRAY(SELECT r.{col2} FROM {rel} r WHERE r.{col1} = t.id),
+                   t.actual_hours, t.ai_estimated_hours
+              FROM project_task t
+              LEFT JOIN project_task_type s ON s.id = t.stage_id
+             WHERE {where}
+             ORDER BY t.id
+             {limit}
+        """.format(
+            rel=users_field.relation, col1=users_field.column1, col2=users_field.column2, where=where,
+            limit='LIMIT %d' % limit if limit else '',
+        ), params or [])
+        return [(row[0], row[1:6], row[6]) for row in self.env.cr.fetchall()]
+
+    @api.model
+    def _load_history(self):
+        """Lịch sử theo người được giao từ toàn bộ task đã đóng (xem effort_regression.user_history)"""
+        return user_history([row for _id, row, _current in self._fetch_rows(HISTORY_WHERE)])
+
+    @api.model
+    def train(self, l2=1.0):
+        """
+        Huấn luyện phiên bản mới từ task đã đóng và lưu trữ phiên bản cũ.
+
+        MAE được đo trên tập kiểm tra (1/HOLDOUT_EVERY task theo id) với mô hình
+        huấn luyện trên phần còn lại; mô hình lưu lại được huấn luyện trên toàn bộ.
+
+        Returns:
+            task.effort.model mới, hoặc recordset rỗng nếu chưa đủ dữ liệu
+        """
+        rows = [row for _id, row, _current in self._fetch_rows(HISTORY_WHERE)]
+        if len(rows) < self.MIN_SAMPLES:
+            _logger.info('Effort model: %d closed tasks, need %d to train', len(rows), self.MIN_SAMPLES)
+            return self.browse()
+
+        actual = [row[4] for row in rows]
+        history = user_history(rows)
+        features = featurize(rows, history, leave_one_out=True)
+        full = EffortRegressor(l2=l2).fit(features, actual)
+
+        train_idx = [i for i in range(len(rows)) if i % self.HOLDOUT_EVERY]
+        test_idx = [i for i in range(len(rows)) if not i % self.HOLDOUT_EVERY]
+        train_rows = [rows[i] for i in train_idx]
+        test_rows = [rows[i] for i in test_idx]
+        train_history = user_history(train_rows)
+        split = EffortRegressor(l2=l2).fit(
+            featurize(train_rows, train_history, leave_one_out=True), [actual[i] for i in train_idx],
+        )
+        test_actual = [actual[i] for i in test_idx]
+        holdout_mae = mean_absolute_error(split.predict(featurize(test_rows, train_history)), test_actual)
+        baseline_mae = mean_absolute_error([row[0] or 0.0 for row in test_rows], test_actual)
+
+        self.env.cr.execute("SELECT COALESCE(MAX(version), 0) + 1 FROM task_effort_model")
+        version = self.env.cr.fetchone()[0]
+        self.search([]).write({'active': False})
+        record = self.create({
+            'version': version,
+            'feature_names': ','.join(FEATURE_NAMES),
+            'coefficients': json.dumps(full.coefficients),
+            'l2': l2,
+            'sample_count': len(rows),
+            'train_mae': mean_absolute_error(full.predict(features), actual),
+            'holdout_mae': holdout_mae,
+            'baseline_mae': baseline_mae,
+        })
+        _logger.info('Effort model v%d trained on %d tasks: holdout MAE %.2fh (planned_hours %.2fh)',
+                     version, len(rows), holdout_mae, baseline_mae)
+        return record
+
+    @api.model
+    def _get_regressor(self):
+        """EffortRegressor của phiên bản active mới nhất (None nếu chưa huấn luyện)"""
+        self.env.cr.execute("""
+            SELECT id, feature_names, coefficients FROM task_effort_model
+             WHERE active ORDER BY version DESC LIMIT 1
+        """)
+        row = self.env.cr.fetchone()
+        if not row:
+            return None
+        model_id, feature_names, coefficients = row
+        dbname = self.env.cr.dbname
+        with self._regressors_lock:
+            cached = self._regressors.get(dbname)
+            if cached and cached[0] == model_id:
+                return cached[1]
+            if feature_names != ','.join(FEATURE_NAMES):
+                # Phiên bản được huấn luyện với bộ đặc trưng khác (trước khi nâng cấp code)
+                _logger.warning('Effort model %s has outdated features, retrain required', model_id)
+                return None
+            regressor = EffortRegressor(json.loads(coefficients))
+            self._regressors[dbname] = (model_id, regressor)
+            return regressor
+
+    @api.model
+    def predict(self, tasks, history=None):
+        """{task_id: giờ dự đoán} cho recordset `tasks` (rỗng nếu chưa có mô hình)"""
+        regressor = self._get_regressor()
+        if not tasks or regressor is None:
+            return {}
+        rows = self._fetch_rows('t.id IN %s', [tuple(tasks.ids)])
+        if history is None:
+            history = self._load_history()
+        predicted = regressor.predict(featurize([row for _id, row, _current in rows], history))
+        return {task_id: hours for (task_id, _row, _current), hours in zip(rows, predicted)}
+
+    @api.model
+    def _refresh_estimates(self, chunk_size=None, auto_commit=True):
+        """
+        Điền ai_estimated_hours cho mọi task đang mở theo từng chunk id (keyset),
+        chỉ UPDATE dòng thay đổi.
+
+        Returns:
+            số task được cập nhật
+        """
+        regressor = self._get_regressor()
+        if regressor is None:
+            return 0
+        auto_commit = auto_commit and not getattr(threading.current_thread(), 'testing', False)
+        chunk_size = chunk_size or self.REFRESH_CHUNK
+        history = self._load_history()
+        cr = self.env.cr
+
+        last_id = 0
+        updated = 0
+        while True:
+            rows = self._fetch_rows(OPEN_WHERE + " AND t.id > %s", [last_id], limit=chunk_size)
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            predicted = regressor.predict(featurize([row for _id, row, _current in rows], history))
+            changed = [
+                (task_id, round(hours, 2))
+                for (task_id, _row, current), hours in zip(rows, predicted)
+                if current is None or abs(current - round(hours, 2)) > 1e-6
+            ]
+            if changed:
+                execute_values(cr._obj, """
+                    UPDATE project_task t
+                       SET ai_estimated_hours = v.hours
+                      FROM (VALUES %s) AS v(id, hours)
+                     WHERE t.id = v.id
+                """, changed, page_size=len(changed))
+                updated += len(changed)
+            if auto_commit:
+                cr.commit()
+
+        self.env['project.task'].invalidate_cache(['ai_estimated_hours'])
+        return updated
+
+    @api.model
+    def _cron_refresh_estimates(self):
+        """Cron hằng đêm: huấn luyện lại khi mô hình quá RETRAIN_DAYS ngày, rồi điền ước lượng cho task mở"""
+        latest = self.search([], limit=1)
+        if not latest or latest.create_date < fields.Datetime.subtract(fields.Datetime.now(), days=self.RETRAIN_DAYS):
+            self.train()
+        updated = self._refresh_estimates()
+        _logger.info('Refreshed ai_estimated_hours for %d open tasks', updated)
+
+    @api.model
+    def action_train_and_refresh(self):
+        """Nút thủ công: huấn luyện phiên bản mới và điền lại ước lượng ngay"""
+        if not self.train():
+            raise UserError(_('Cần ít nhất %s task đã đóng có giờ thực tế để huấn luyện mô hình.') % self.MIN_SAMPLES)
+        self._refresh_estimates(auto_commit=False)
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'reload',
+        }
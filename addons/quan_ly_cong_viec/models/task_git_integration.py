@@ -2,9 +2,32 @@
 
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError, UserError
+from psycopg2.extras import execute_values
 import requests
 import json
-from datetime import datetime
+import logging
+from datetime import timedelta
+
+from .git_local_reader import LocalGitReader
+from .git_sync_client import SYNC_RESOURCES, FetchResult, GitRestClient, GitSyncError, parse_datetime
+
+_logger = logging.getLogger(__name__)
+
+# Bản clone local chỉ có commit và branch
+LOCAL_RESOURCES = ('commits', 'branches')
+
+# resource → (model, khóa upsert, cột đồng bộ, field tổng số trên integration)
+SYNC_MODELS = {
+    'commits': ('task.git.commit', 'sha',
+                ['message', 'author_name', 'author_email', 'author_login', 'commit_date', 'url',
+                 'files_changed', 'additions', 'deletions'], 'total_commits'),
+    'branches': ('task.git.branch', 'name', ['protected'], 'total_branches'),
+    'pulls': ('task.git.pullrequest', 'number',
+              ['title', 'state', 'author', 'created_at', 'updated_at', 'merged_at', 'closed_at', 'url'],
+              'total_prs'),
+    'issues': ('task.git.issue', 'number',
+               ['title', 'state', 'author', 'created_at', 'updated_at', 'url'], 'total_issues'),
+}
 
 class TaskGitIntegration(models.Model):
     _name = 'task.git.integration'
@@ -15,9 +38,13 @@ class TaskGitIntegration(models.Model):
     platform = fields.Selection([
         ('github', 'GitHub'),
         ('gitlab', 'GitLab'),
+        ('local', 'Local Repository'),
     ], string='Platform', default='github', required=True)
     
-    api_token = fields.Char('API Token', required=True, help='Personal Access Token for API authentication')
+    api_token = fields.Char('API Token', help='Personal Access Token for API authentication (GitHub/GitLab)')
+    # Chỉ admin: đường dẫn trên máy chủ được đưa cho git chạy trong process Odoo
+    local_path = fields.Char('Local Path', groups='base.group_system',
+                             help='Đường dẫn bản clone trên máy chủ Odoo (platform Local Repository)')
     repository_url = fields.Char('Repository URL', compute='_compute_repository_url', store=True)
     
     # Sync Settings
@@ -44,9 +71,29 @@ class TaskGitIntegration(models.Model):
     ], string='State', default='draft', readonly=True)
     
     error_message = fields.Text('Error Message', readonly=True)
+
+    # Trạng thái đồng bộ tăng dần: {resource: {'etag': ..., 'cursor': ...}}
+    sync_state = fields.Text('Sync State', readonly=True, copy=False)
+    last_sync_requests = fields.Integer('Requests (last sync)', readonly=True)
+    last_sync_not_modified = fields.Integer('Not Modified (last sync)', readonly=True,
+                                            help='Số loại dữ liệu server trả 304 (không đổi) ở lần sync trước')
+
+    # Số thread tải song song các loại dữ liệu
+    SYNC_WORKERS = 4
+    # Số commit mỗi lần ghi khi nhập từ bản clone local
+    LOCAL_CHUNK = 5000
     
+    def init(self):
+        super().init()
+        # Phiên bản trước lưu file://<local_path> vào repository_url (đọc được bởi mọi user)
+        self.env.cr.execute(
+            "UPDATE task_git_integration SET repository_url = NULL "
+            "WHERE platform = 'local' AND repository_url IS NOT NULL"
+        )
+
     @api.depends('platform', 'name')
     def _compute_repository_url(self):
+        # Không lưu local_path: repository_url không giới hạn nhóm
         for record in self:
             if record.platform == 'github':
                 record.repository_url = f'https://github.com/{record.name}'
@@ -55,11 +102,20 @@ class TaskGitIntegration(models.Model):
             else:
                 record.repository_url = ''
     
-    @api.constrains('name')
+    @api.constrains('name', 'platform')
     def _check_repository_name(self):
         for record in self:
-            if record.name and '/' not in record.name:
+            if record.platform != 'local' and record.name and '/' not in record.name:
                 raise ValidationError(_('Repository name must be in format: owner/repo (e.g., thaiduis/my-project)'))
+
+    @api.constrains('platform', 'api_token', 'local_path')
+    def _check_credentials(self):
+        for record in self:
+            if record.platform == 'local':
+                if not record.sudo().local_path:
+                    raise ValidationError(_('Local Path is required for a local repository'))
+            elif not record.api_token:
+                raise ValidationError(_('API Token is required for %s') % record.platform)
     
     def _get_api_headers(self):
         """Get API headers for authentication"""
@@ -92,6 +148,23 @@ class TaskGitIntegration(models.Model):
     def action_test_connection(self):
         """Test connection to Git platform"""
         self.ensure_one()
+        if self.platform == 'local':
+            try:
+                LocalGitReader(self.sudo().local_path).check()
+            except GitSyncError as e:
+                self._record_error(str(e))
+                raise UserError(_('Connection failed: %s') % e)
+            self.write({'state': 'connected', 'error_message': False})
+            return {
+                'type': 'ir.actions.client',
+                'tag': 'display_notification',
+                'params': {
+                    'title': _('Success'),
+                    'message': _('Local repository found: %s') % self.sudo().local_path,
+                    'type': 'success',
+                    'sticky': False,
+                }
+            }
         try:
             url = self._get_api_url()
             headers = self._get_api_headers()
@@ -115,265 +188,260 @@ class TaskGitIntegration(models.Model):
                 }
             else:
                 error_msg = f'Connection failed: {response.status_code} - {response.text}'
-                self.write({
-                    'state': 'error',
-                    'error_message': error_msg
-                })
+                self._record_error(error_msg)
                 raise UserError(error_msg)
                 
+        except UserError:
+            raise
         except Exception as e:
             error_msg = str(e)
-            self.write({
-                'state': 'error',
-                'error_message': error_msg
-            })
+            self._record_error(error_msg)
             raise UserError(_('Connection failed: %s') % error_msg)
     
+    def _get_sync_state(self):
+        """{resource: {'etag': ..., 'cursor': ...}} của lần đồng bộ trước"""
+        self.ensure_one()
+        try:
+            return json.loads(self.sync_state or '{}')
+        except ValueError:
+            return {}
+
+    def _get_sync_client(self):
+        self.ensure_one()
+        return GitRestClient(self.platform, self.name, self.api_token)
+
+    def _run_sync(self, resources=SYNC_RESOURCES, full=False):
+        """
+        Đồng bộ tăng dần `resources`: tải song song (chỉ HTTP trong thread), rồi
+        upsert toàn bộ kết quả trong transaction hiện tại.
+
+        Args:
+            full: bỏ qua ETag / con trỏ, tải lại toàn bộ (vẫn upsert, không xóa)
+
+        Returns:
+            {resource: FetchResult}
+        """
+        self.ensure_one()
+        state = {} if full else self._get_sync_state()
+        if self.platform == 'local':
+            resources = tuple(r for r in resources if r in LOCAL_RESOURCES)
+            results = self._run_local_sync(resources, state)
+        else:
+            try:
+                results = self._get_sync_client().fetch_many(
+                    resources, state, max_workers=min(self.SYNC_WORKERS, len(resources)),
+                )
+            except GitSyncError as e:
+                raise UserError(str(e))
+
+            for resource, result in results.items():
+                if not result.not_modified:
+                    self._upsert_sync_result(result)
+                state[resource] = {'etag': result.etag, 'cursor': result.cursor}
+
+        vals = {
+            'sync_state': json.dumps(state, sort_keys=True),
+            'last_sync_date': fields.Datetime.now(),
+            'last_sync_requests': sum(r.requests_made for r in results.values()),
+            'last_sync_not_modified': sum(1 for r in results.values() if r.not_modified),
+            'state': 'connected',
+            'error_message': False,
+        }
+        vals.update(self._count_totals(resources))
+        self.write(vals)
+        return results
+
+    def _count_totals(self, resources):
+        """{field tổng số: số dòng hiện có} cho `resources`"""
+        self.ensure_one()
+        totals = {}
+        for resource in resources:
+            model_name, _key, _columns, total_field = SYNC_MODELS[resource]
+            self.env.cr.execute(
+                'SELECT COUNT(*) FROM %s WHERE integration_id = %%s' % self.env[model_name]._table, [self.id],
+            )
+            totals[total_field] = self.env.cr.fetchone()[0]
+        return totals
+
+    def _run_local_sync(self, resources, state):
+        """
+        Nhập từ bản clone local: commit mới kể từ sha cuối đã nhập (git log --numstat
+        dạng stream, ghi theo từng chunk LOCAL_CHUNK commit) và danh sách branch.
+        """
+        reader = LocalGitReader(self.sudo().local_path)
+        results = {}
+        try:
+            reader.check()
+            if 'commits' in resources:
+                cursor = (state.get('commits') or {}).get('cursor')
+                received = 0
+                chunk = []
+                for commit in reader.iter_commits(since_sha=cursor):
+                    chunk.append(commit)
+                    if len(chunk) >= self.LOCAL_CHUNK:
+                        self._upsert_sync_result(FetchResult('commits', chunk))
+                        received += len(chunk)
+                        cursor = chunk[-1]['sha']
+                        chunk = []
+                if chunk:
+                    self._upsert_sync_result(FetchResult('commits', chunk))
+                    received += len(chunk)
+                    cursor = chunk[-1]['sha']
+                results['commits'] = FetchResult('commits', cursor=cursor, received=received)
+            if 'branches' in resources:
+                results['branches'] = FetchResult('branches', reader.branches(), complete=True)
+                self._upsert_sync_result(results['branches'])
+        except GitSyncError as e:
+            raise UserError(str(e))
+
+        for resource, result in results.items():
+            state[resource] = {'etag': None, 'cursor': result.cursor}
+        return results
+
+    def _upsert_sync_result(self, result):
+        """
+        Upsert items của `result` theo (integration_id, khóa) bằng execute_values,
+        chỉ ghi dòng có thay đổi. Chỉ các cột có trong item được ghi (webhook không có
+        đủ mọi cột), item chỉ có khóa thì chỉ thêm dòng chưa có.
+        Branch không còn trên server bị xóa khi danh sách đầy đủ.
+
+        Returns:
+            id các dòng được thêm hoặc cập nhật
+        """
+        model_name, key, columns, _total_field = SYNC_MODELS[result.resource]
+        Model = self.env[model_name]
+        table = Model._table
+        # Một câu INSERT ... ON CONFLICT không được chạm cùng một dòng hai lần
+        rows = {item[key]: item for item in result.items if item.get(key)}
+        cr = self.env.cr
+        Model.flush()
+
+        changed_ids = []
+        if rows:
+            # Các item của một result có cùng bộ cột
+            sample = next(iter(rows.values()))
+            columns = [c for c in columns if c in sample]
+            if columns:
+                conflict = """DO UPDATE
+                   SET {updates},
+                       write_uid = EXCLUDED.write_uid,
+                       write_date = EXCLUDED.write_date
+                 WHERE ({old}) IS DISTINCT FROM ({new})""".format(
+                    updates=', '.join('%s = EXCLUDED.%s' % (c, c) for c in columns),
+                    old=', '.join('%s.%s' % (table, c) for c in columns),
+                    new=', '.join('EXCLUDED.%s' % c for c in columns),
+                )
+            else:
+                conflict = 'DO NOTHING'
+            changed_ids = [row[0] for row in execute_values(cr._obj, """
+                INSERT INTO {table} (integration_id, {key}, {columns}
+                                     create_uid, create_date, write_uid, write_date)
+                VALUES %s
+                ON CONFLICT (integration_id, {key}) {conflict}
+                RETURNING id
+            """.format(
+                table=table, key=key, columns=''.join('%s, ' % c for c in columns), conflict=conflict,
+            ), [
+                (self.id, value) + tuple(item.get(c) for c in columns) + (self.env.uid, self.env.uid)
+                for value, item in rows.items()
+            ], template="(%s, %s, {placeholders}%s, now() at time zone 'UTC', %s, now() at time zone 'UTC')".format(
+                placeholders=''.join(['%s, '] * len(columns)),
+            ), page_size=1000, fetch=True)]
+
+        if result.resource == 'branches' and result.complete:
+            cr.execute(
+                'DELETE FROM {table} WHERE integration_id = %s AND NOT ({key} = ANY(%s))'.format(table=table, key=key),
+                [self.id, list(rows)],
+            )
+
+        Model.invalidate_cache()
+        return changed_ids
+
+    def _sync_notification(self, results):
+        changed = sum(r.received for r in results.values())
+        requests_made = sum(r.requests_made for r in results.values())
+        not_modified = sum(1 for r in results.values() if r.not_modified)
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Success'),
+                'message': _('Sync completed: %s items received, %s requests (%s not modified)') % (
+                    changed, requests_made, not_modified),
+                'type': 'success',
+                'sticky': False,
+            }
+        }
+
+    def _record_error(self, message):
+        """
+        Lưu state='error' / error_message bằng cursor riêng: UserError ném ra ngay sau đó
+        rollback transaction của request, kể cả một self.write() ở đây.
+        """
+        self.ensure_one()
+        # Bỏ phần ghi dở (và lock dòng integration nếu có) trước khi cursor khác ghi cùng dòng
+        self.env.cr.rollback()
+        with self.env.registry.cursor() as cr:
+            self.with_env(self.env(cr=cr)).write({'state': 'error', 'error_message': message})
+
     def action_sync_all(self):
         """Sync all data from repository"""
         self.ensure_one()
         try:
-            self.action_sync_commits()
-            self.action_sync_branches()
-            self.action_sync_pull_requests()
-            self.action_sync_issues()
-            
-            self.write({
-                'last_sync_date': fields.Datetime.now(),
-                'state': 'connected',
-                'error_message': False
-            })
-            
-            return {
-                'type': 'ir.actions.client',
-                'tag': 'display_notification',
-                'params': {
-                    'title': _('Success'),
-                    'message': _('Sync completed successfully'),
-                    'type': 'success',
-                    'sticky': False,
-                }
-            }
+            results = self._run_sync()
         except Exception as e:
-            self.write({
-                'state': 'error',
-                'error_message': str(e)
-            })
+            self._record_error(str(e))
             raise UserError(_('Sync failed: %s') % str(e))
-    
-    def action_sync_commits(self):
-        """Sync commits from repository"""
+        return self._sync_notification(results)
+
+    def action_full_resync(self):
+        """Bỏ ETag / con trỏ và tải lại toàn bộ repository"""
         self.ensure_one()
         try:
-            if self.platform == 'github':
-                url = self._get_api_url('/commits')
-            else:  # gitlab
-                url = self._get_api_url('/repository/commits')
-            
-            headers = self._get_api_headers()
-            response = requests.get(url, headers=headers, timeout=30)
-            
-            if response.status_code != 200:
-                raise UserError(_('Failed to fetch commits: %s') % response.text)
-            
-            commits_data = response.json()
-            
-            # Clear existing commits
-            self.commit_ids.unlink()
-            
-            # Create new commits
-            Commit = self.env['task.git.commit']
-            for commit_data in commits_data[:50]:  # Limit to 50 most recent
-                if self.platform == 'github':
-                    commit_info = commit_data.get('commit', {})
-                    author_info = commit_info.get('author', {})
-                    commit_date = self._parse_datetime(author_info.get('date', ''))
-                    
-                    Commit.create({
-                        'integration_id': self.id,
-                        'sha': commit_data.get('sha', ''),
-                        'message': commit_info.get('message', ''),
-                        'author_name': author_info.get('name', ''),
-                        'author_email': author_info.get('email', ''),
-                        'commit_date': commit_date,
-                        'url': commit_data.get('html_url', ''),
-                    })
-                else:  # gitlab
-                    commit_date = self._parse_datetime(commit_data.get('created_at', ''))
-                    
-                    Commit.create({
-                        'integration_id': self.id,
-                        'sha': commit_data.get('id', ''),
-                        'message': commit_data.get('message', ''),
-                        'author_name': commit_data.get('author_name', ''),
-                        'author_email': commit_data.get('author_email', ''),
-                        'commit_date': commit_date,
-                        'url': commit_data.get('web_url', ''),
-                    })
-            
-            self.total_commits = len(self.commit_ids)
-            
+            results = self._run_sync(full=True)
         except Exception as e:
-            raise UserError(_('Failed to sync commits: %s') % str(e))
-    
-    def _parse_datetime(self, date_str):
-        """Parse datetime string from Git API to Odoo datetime format
-        
-        Handles formats like:
-        - GitHub: 2026-01-13T15:44:27Z
-        - GitLab: 2026-01-13T15:44:27.000+00:00
-        
-        Returns naive datetime (without timezone) for Odoo
-        """
-        if not date_str:
-            return False
-        
-        try:
-            # Remove 'Z', replace 'T' with space, remove timezone and microseconds
-            date_str_clean = date_str.replace('Z', '').replace('T', ' ').split('+')[0].split('.')[0]
-            # Parse to datetime object (naive)
-            dt = datetime.strptime(date_str_clean, '%Y-%m-%d %H:%M:%S')
-            return dt
-        except:
-            return False
-    
+            self._record_error(str(e))
+            raise UserError(_('Sync failed: %s') % str(e))
+        return self._sync_notification(results)
+
+    def action_sync_commits(self):
+        """Sync commits from repository"""
+        self.ensure_one()
+        self._run_sync(('commits',))
+
     def action_sync_branches(self):
         """Sync branches from repository"""
         self.ensure_one()
-        try:
-            if self.platform == 'github':
-                url = self._get_api_url('/branches')
-            else:  # gitlab
-                url = self._get_api_url('/repository/branches')
-            
-            headers = self._get_api_headers()
-            response = requests.get(url, headers=headers, timeout=30)
-            
-            if response.status_code != 200:
-                raise UserError(_('Failed to fetch branches: %s') % response.text)
-            
-            branches_data = response.json()
-            
-            # Clear existing branches
-            self.branch_ids.unlink()
-            
-            # Create new branches
-            Branch = self.env['task.git.branch']
-            for branch_data in branches_data:
-                Branch.create({
-                    'integration_id': self.id,
-                    'name': branch_data.get('name', ''),
-                    'protected': branch_data.get('protected', False),
-                })
-            
-            self.total_branches = len(self.branch_ids)
-            
-        except Exception as e:
-            raise UserError(_('Failed to sync branches: %s') % str(e))
-    
+        self._run_sync(('branches',))
+
     def action_sync_pull_requests(self):
         """Sync pull requests from repository"""
         self.ensure_one()
-        try:
-            if self.platform == 'github':
-                url = self._get_api_url('/pulls')
-            else:  # gitlab
-                url = self._get_api_url('/merge_requests')
-            
-            headers = self._get_api_headers()
-            response = requests.get(url, headers=headers, params={'state': 'all'}, timeout=30)
-            
-            if response.status_code != 200:
-                raise UserError(_('Failed to fetch pull requests: %s') % response.text)
-            
-            prs_data = response.json()
-            
-            # Clear existing PRs
-            self.pr_ids.unlink()
-            
-            # Create new PRs
-            PR = self.env['task.git.pullrequest']
-            for pr_data in prs_data[:50]:  # Limit to 50
-                if self.platform == 'github':
-                    created_at = self._parse_datetime(pr_data.get('created_at', ''))
-                    updated_at = self._parse_datetime(pr_data.get('updated_at', ''))
-                    
-                    PR.create({
-                        'integration_id': self.id,
-                        'number': pr_data.get('number', 0),
-                        'title': pr_data.get('title', ''),
-                        'state': pr_data.get('state', 'open'),
-                        'author': pr_data.get('user', {}).get('login', ''),
-                        'created_at': created_at,
-                        'updated_at': updated_at,
-                        'url': pr_data.get('html_url', ''),
-                    })
-                else:  # gitlab
-                    created_at = self._parse_datetime(pr_data.get('created_at', ''))
-                    updated_at = self._parse_datetime(pr_data.get('updated_at', ''))
-                    
-                    PR.create({
-                        'integration_id': self.id,
-                        'number': pr_data.get('iid', 0),
-                        'title': pr_data.get('title', ''),
-                        'state': pr_data.get('state', 'opened'),
-                        'author': pr_data.get('author', {}).get('username', ''),
-                        'created_at': created_at,
-                        'updated_at': updated_at,
-                        'url': pr_data.get('web_url', ''),
-                    })
-            
-            self.total_prs = len(self.pr_ids)
-            
-        except Exception as e:
-            raise UserError(_('Failed to sync pull requests: %s') % str(e))
-    
+        self._run_sync(('pulls',))
+
     def action_sync_issues(self):
         """Sync issues from repository"""
         self.ensure_one()
-        try:
-            url = self._get_api_url('/issues')
-            headers = self._get_api_headers()
-            response = requests.get(url, headers=headers, params={'state': 'all'}, timeout=30)
-            
-            if response.status_code != 200:
-                raise UserError(_('Failed to fetch issues: %s') % response.text)
-            
-            issues_data = response.json()
-            
-            # Clear existing issues
-            self.issue_ids.unlink()
-            
-            # Create new issues
-            Issue = self.env['task.git.issue']
-            for issue_data in issues_data[:50]:  # Limit to 50
-                # Skip pull requests (GitHub includes PRs in issues endpoint)
-                if self.platform == 'github' and 'pull_request' in issue_data:
-                    continue
-                
-                created_at = self._parse_datetime(issue_data.get('created_at', ''))
-                updated_at = self._parse_datetime(issue_data.get('updated_at', ''))
-                
-                if self.platform == 'github':
-                    author = issue_data.get('user', {}).get('login', '')
-                else:  # gitlab
-                    author = issue_data.get('author', {}).get('username', '')
-                
-                Issue.create({
-                    'integration_id': self.id,
-                    'number': issue_data.get('number') if self.platform == 'github' else issue_data.get('iid', 0),
-                    'title': issue_data.get('title', ''),
-                    'state': issue_data.get('state', 'open'),
-                    'author': author,
-                    'created_at': created_at,
-                    'updated_at': updated_at,
-                    'url': issue_data.get('html_url') if self.platform == 'github' else issue_data.get('web_url', ''),
-                })
-            
-            self.total_issues = len(self.issue_ids)
-            
-        except Exception as e:
-            raise UserError(_('Failed to sync issues: %s') % str(e))
+        self._run_sync(('issues',))
+
+    def _parse_datetime(self, date_str):
+        """Parse datetime string from Git API to Odoo datetime format (naive UTC, False nếu lỗi)"""
+        return parse_datetime(date_str) or False
+
+    @api.model
+    def _cron_auto_sync(self):
+        """Cron: đồng bộ các repository bật auto_sync đã quá sync_interval phút"""
+        now = fields.Datetime.now()
+        for integration in self.search([('auto_sync', '=', True), ('state', '!=', 'draft')]):
+            if integration.last_sync_date and \
+                    integration.last_sync_date + timedelta(minutes=integration.sync_interval or 30) > now:
+                continue
+            try:
+                with self.env.cr.savepoint():
+                    integration._run_sync()
+            except Exception as e:
+                _logger.warning('Git auto sync failed for %s: %s', integration.name, e)
+                integration.write({'state': 'error', 'error_message': str(e)})
 
 
 class TaskGitCommit(models.Model):
@@ -386,8 +454,12 @@ class TaskGitCommit(models.Model):
     message = fields.Text('Message')
     author_name = fields.Char('Author Name')
     author_email = fields.Char('Author Email')
+    author_login = fields.Char('Author Login', index=True, help='Tài khoản GitHub của tác giả')
     commit_date = fields.Datetime('Commit Date')
     url = fields.Char('URL')
+    files_changed = fields.Integer('Files Changed')
+    additions = fields.Integer('Additions')
+    deletions = fields.Integer('Deletions')
     
     _sql_constraints = [
         ('sha_unique', 'unique(integration_id, sha)', 'Commit SHA must be unique per integration!')
@@ -420,6 +492,8 @@ class TaskGitPullRequest(models.Model):
     author = fields.Char('Author')
     created_at = fields.Datetime('Created At')
     updated_at = fields.Datetime('Updated At')
+    merged_at = fields.Datetime('Merged At')
+    closed_at = fields.Datetime('Closed At')
     url = fields.Char('URL')
     
     _sql_constraints = [
@@ -0,0 +1,504 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, tools, _
+from psycopg2.extras import execute_values
+import logging
+import re
+
+_logger = logging.getLogger(__name__)
+
+# Tham chiếu id task tường minh: "task #42", "TASK-42", "task:42"
+TASK_ID_RE = re.compile(r'\btask(?:[-_:#]|\s+#)\s*(\d{1,9})\b', re.IGNORECASE)
+# Token có thể là mã Jira / external_task_id: "PROJ-123", "EXT_2024.7"
+TASK_KEY_RE = re.compile(r'[A-Za-z0-9][\w.\-]*[A-Za-z0-9]')
+
+
+def task_key(value):
+    """
+    Khóa tra cứu của jira_ticket / external_task_id: phần cuối URL, chữ hoa.
+    None nếu khóa quá dễ trùng với từ thường (không có cả chữ và số).
+    """
+    if not value:
+        return None
+    key = value.strip().rstrip('/').rsplit('/', 1)[-1].upper()
+    if len(key) < 3 or not any(c.isdigit() for c in key) or not any(c.isalpha() for c in key):
+        return None
+    return key
+
+
+class TaskRefMatcher(object):
+    """Tìm task được nhắc tới trong commit message / tiêu đề PR"""
+
+    def __init__(self, key_index):
+        # {khóa (task_key): {task_id}}
+        self.key_index = key_index
+
+    def match(self, text):
+        """(id task ghi tường minh - chưa kiểm tra tồn tại, id task khớp theo khóa)"""
+        if not text:
+            return set(), set()
+        explicit = {int(task_id) for task_id in TASK_ID_RE.findall(text)}
+        keyed = set()
+        if self.key_index:
+            for token in TASK_KEY_RE.findall(text):
+                keyed.update(self.key_index.get(token.upper(), ()))
+        return explicit, keyed
+
+
+class LazyMatcher(object):
+    """TaskRefMatcher dựng ở lần dùng đầu tiên, dùng chung cho mọi chunk / sự kiện của một lượt đồng bộ"""
+
+    def __init__(self, linker):
+        self._linker = linker
+        self._matcher = None
+
+    def get(self):
+        if self._matcher is None:
+            self._matcher = self._linker._build_matcher()
+        return self._matcher
+
+
+class TaskGitLinker(models.AbstractModel):
+    """
+    Gắn commit / pull request với task (theo tham chiếu trong message / tiêu đề) và
+    với nhân viên (email tác giả commit; tài khoản tác giả PR qua commit cùng tài khoản),
+    sau đó làm mới số liệu đóng góp của các task / nhân viên bị ảnh hưởng.
+    """
+    _name = 'task.git.linker'
+    _description = 'Liên kết Git ↔ Task'
+
+    LINK_CHUNK = 5000
+
+    @api.model
+    def _build_matcher(self):
+        """Chỉ mục jira_ticket / external_task_id → task, dựng bằng một câu SQL"""
+        self.env['project.task'].flush(['jira_ticket', 'external_task_id'])
+        self.env.cr.execute("""
+            SELECT id, jira_ticket, external_task_id
+              FROM project_task
+             WHERE jira_ticket IS NOT NULL OR external_task_id IS NOT NULL
+        """)
+        index = {}
+        for task_id, jira_ticket, external_id in self.env.cr.fetchall():
+            for value in (jira_ticket, external_id):
+                key = task_key(value)
+                if key:
+                    index.setdefault(key, set()).add(task_id)
+        return TaskRefMatcher(index)
+
+    @api.model
+    def _resolve_links(self, texts, matcher):
+        """{record_id: {task_id}} cho {record_id: text}; id tường minh được kiểm tra tồn tại một lần"""
+        matches = {record_id: matcher.match(text) for record_id, text in texts.items()}
+        explicit_ids = set().union(*(explicit for explicit, _keyed in matches.values())) if matches else set()
+        existing = set()
+        if explicit_ids:
+            self.env.cr.execute("SELECT id FROM project_task WHERE id IN %s", [tuple(explicit_ids)])
+            existing = {row[0] for row in self.env.cr.fetchall()}
+        return {
+            record_id: (explicit & existing) | keyed
+            for record_id, (explicit, keyed) in matches.items()
+        }
+
+    @api.model
+    def _replace_links(self, relation, column, record_ids, links):
+        """
+        Ghi lại bảng quan hệ record ↔ task cho `record_ids`.
+
+        Returns:
+            id task có liên kết trước hoặc sau khi ghi
+        """
+        cr = self.env.cr
+        cr.execute(
+            "DELETE FROM {rel} WHERE {col} IN %s RETURNING task_id".format(rel=relation, col=column),
+            [tuple(record_ids)],
+        )
+        affected = {row[0] for row in cr.fetchall()}
+        pairs = [(record_id, task_id) for record_id, task_ids in links.items() for task_id in task_ids]
+        if pairs:
+            execute_values(cr._obj, "INSERT INTO {rel} ({col}, task_id) VALUES %s".format(
+                rel=relation, col=column), pairs, page_size=1000)
+            affected.update(task_id for _record_id, task_id in pairs)
+        return affected
+
+    @api.model
+    def _set_employees(self, table, employees):
+        """
+        Ghi nhan_vien_id theo {record_id: nhan_vien_id hoặc None}, chỉ dòng thay đổi.
+
+        Returns:
+            id nhân viên cũ và mới của các dòng thay đổi
+        """
+        if not employees:
+            return set()
+        execute_values(self.env.cr._obj, """
+            UPDATE {table} r
+               SET nhan_vien_id = v.nhan_vien_id
+              FROM (VALUES %s) AS v(id, nhan_vien_id),
+                   {table} old
+             WHERE r.id = v.id AND old.id = v.id
+               AND r.nhan_vien_id IS DISTINCT FROM v.nhan_vien_id
+         RETURNING old.nhan_vien_id, r.nhan_vien_id
+        """.format(table=table), list(employees.items()), template='(%s, %s::integer)', page_size=1000)
+        affected = set()
+        for old_id, new_id in self.env.cr.fetchall():
+            affected.update(nv_id for nv_id in (old_id, new_id) if nv_id)
+        return affected
+
+    @api.model
+    def link_commits(self, commit_ids, matcher=None):
+        """Liên kết commit với task và nhân viên, làm mới số liệu đóng góp bị ảnh hưởng"""
+        Commit = self.env['task.git.commit']
+        Commit.flush(['message', 'author_email'])
+        matcher = matcher or self._build_matcher()
+        resolver = self.env['nhan_vien.resolver']
+        affected_tasks, affected_employees = set(), set()
+
+        for chunk in tools.split_every(self.LINK_CHUNK, list(commit_ids)):
+            self.env.cr.execute(
+                "SELECT id, message, author_email FROM task_git_commit WHERE id IN %s", [tuple(chunk)],
+            )
+            rows = self.env.cr.fetchall()
+            if not rows:
+                continue
+            links = self._resolve_links({row[0]: row[1] for row in rows}, matcher)
+            affected_tasks |= self._replace_links('task_git_commit_task_rel', 'commit_id', [row[0] for row in rows], links)
+
+            emails = resolver.resolve_emails({row[2] for row in rows if row[2]})
+            affected_employees |= self._set_employees(
+                'task_git_commit', {row[0]: emails.get(row[2]) for row in rows},
+            )
+
+        Commit.invalidate_cache(['task_ids', 'nhan_vien_id'])
+        self.env['task.git.contribution']._refresh_contributions(affected_tasks, affected_employees)
+
+    @api.model
+    def link_pullrequests(self, pr_ids, matcher=None):
+        """
+        Liên kết PR với task theo tiêu đề; tác giả PR → nhân viên xuất hiện nhiều nhất
+        trong các commit cùng tài khoản (author_login) của cùng repository.
+        """
+        PullRequest = self.env['task.git.pullrequest']
+        PullRequest.flush(['title', 'author', 'merged_at', 'created_at'])
+        self.env['task.git.commit'].flush(['author_login', 'nhan_vien_id'])
+        matcher = matcher or self._build_matcher()
+        affected_tasks, affected_employees = set(), set()
+
+        for chunk in tools.split_every(self.LINK_CHUNK, list(pr_ids)):
+            self.env.cr.execute("""
+                SELECT p.id, p.title,
+                       (SELECT c.nhan_vien_id
+                          FROM task_git_commit c
+                         WHERE c.integration_id = p.integration_id
+                           AND c.author_login = p.author
+                           AND c.nhan_vien_id IS NOT NULL
+                         GROUP BY c.nhan_vien_id
+                         ORDER BY COUNT(*) DESC, c.nhan_vien_id
+                         LIMIT 1)
+                  FROM task_git_pullrequest p
+                 WHERE p.id IN %s
+            """, [tuple(chunk)])
+            rows = self.env.cr.fetchall()
+            if not rows:
+                continue
+            links = self._resolve_links({row[0]: row[1] for row in rows}, matcher)
+            affected_tasks |= self._replace_links(
+                'task_git_pullrequest_task_rel', 'pullrequest_id', [row[0] for row in rows], links,
+            )
+            affected_employees |= self._set_employees('task_git_pullrequest', {row[0]: row[2] for row in rows})
+
+        PullRequest.invalidate_cache(['task_ids', 'nhan_vien_id'])
+        self.env['task.git.contribution']._refresh_contributions(affected_tasks, affected_employees)
+
+    @api.model
+    def _cron_relink_all(self):
+        """
+        Cron: liên kết lại toàn bộ commit / PR (task mới nhận jira_ticket, nhân viên đổi email...)
+        và dựng lại số liệu đóng góp.
+        """
+        matcher = self._build_matcher()
+        for table, method in (('task_git_commit', self.link_commits), ('task_git_pullrequest', self.link_pullrequests)):
+            self.env.cr.execute("SELECT id FROM {table} ORDER BY id".format(table=table))
+            method([row[0] for row in self.env.cr.fetchall()], matcher=matcher)
+        self.env['task.git.contribution']._rebuild()
+
+
+class TaskGitContribution(models.Model):
+    """
+    Số liệu đóng góp Git theo task và theo nhân viên (commit, dòng code, PR, thời gian
+    chu kỳ PR). Mỗi dòng có đúng một trong task_id / nhan_vien_id.
+
+    Bảng được làm mới theo khóa khi commit / PR được liên kết lại, nên form task và
+    nhân viên chỉ đọc một dòng thay vì quét commit.
+    """
+    _name = 'task.git.contribution'
+    _description = 'Đóng góp Git'
+    _auto = False
+
+    task_id = fields.Many2one('project.task', string='Công việc', readonly=True)
+    nhan_vien_id = fields.Many2one('nhan_vien', string='Nhân viên', readonly=True)
+    commit_count = fields.Integer('Commits', readonly=True)
+    lines_added = fields.Integer('Dòng thêm', readonly=True)
+    lines_deleted = fields.Integer('Dòng xóa', readonly=True)
+    pr_count = fields.Integer('Pull Requests', readonly=True)
+    merged_pr_count = fields.Integer('PR đã merge', readonly=True)
+    avg_pr_cycle_hours = fields.Float('Chu kỳ PR TB (giờ)', readonly=True,
+                                      help='Thời gian trung bình từ lúc mở tới lúc merge PR')
+    last_commit_date = fields.Datetime('Commit gần nhất', readonly=True)
+
+    STAT_COLUMNS = ('commit_count', 'lines_added', 'lines_deleted', 'pr_count',
+                    'merged_pr_count', 'avg_pr_cycle_hours', 'last_commit_date')
+
+    # khóa → (nguồn commit, cột khóa commit, nguồn PR, cột khóa PR)
+    _SOURCES = {
+        'task_id': (
+            "task_git_commit_task_rel k JOIN task_git_commit c ON c.id = k.commit_id", "k.task_id",
+            "task_git_pullrequest_task_rel k JOIN task_git_pullrequest p ON p.id = k.pullrequest_id", "k.task_id",
+        ),
+        'nhan_vien_id': (
+            "task_git_commit c", "c.nhan_vien_id",
+            "task_git_pullrequest p", "p.nhan_vien_id",
+        ),
+    }
+
+    _STATS_SELECT = """
+        WITH c AS (
+            SELECT {commit_key} AS key,
+                   COUNT(*) AS commit_count,
+                   COALESCE(SUM(c.additions), 0) AS lines_added,
+                   COALESCE(SUM(c.deletions), 0) AS lines_deleted,
+                   MAX(c.commit_date) AS last_commit_date
+              FROM {commit_source}
+             WHERE {commit_key} IS NOT NULL {commit_where}
+             GROUP BY 1
+        ), p AS (
+            SELECT {pr_key} AS key,
+                   COUNT(*) AS pr_count,
+                   COUNT(p.merged_at) AS merged_pr_count,
+                   AVG(EXTRACT(EPOCH FROM p.merged_at - p.created_at) / 3600.0)
+                       FILTER (WHERE p.merged_at IS NOT NULL AND p.created_at IS NOT NULL) AS avg_pr_cycle_hours
+              FROM {pr_source}
+             WHERE {pr_key} IS NOT NULL {pr_where}
+             GROUP BY 1
+        )
+        SELECT COALESCE(c.key, p.key) AS key,
+               COALESCE(c.commit_count, 0) AS commit_count,
+               COALESCE(c.lines_added, 0) AS lines_added,
+               COALESCE(c.lines_deleted, 0) AS lines_deleted,
+               COALESCE(p.pr_count, 0) AS pr_count,
+               COALESCE(p.merged_pr_count, 0) AS merged_pr_count,
+               p.avg_pr_cycle_hours,
+               c.last_commit_date
+          FROM c FULL JOIN p ON p.key = c.key
+    """
+
+    def init(self):
+        cr = self.env.cr
+        if tools.table_exists(cr, self._table):
+            return
+
+        cr.execute("""
+            CREATE TABLE task_git_contribution (
+                id SERIAL PRIMARY KEY,
+                task_id INTEGER REFERENCES project_task(id) ON DELETE CASCADE,
+                nhan_vien_id INTEGER REFERENCES nhan_vien(id) ON DELETE CASCADE,
+                commit_count INTEGER NOT NULL DEFAULT 0,
+                lines_added INTEGER NOT NULL DEFAULT 0,
+                lines_deleted INTEGER NOT NULL DEFAULT 0,
+                pr_count INTEGER NOT NULL DEFAULT 0,
+                merged_pr_count INTEGER NOT NULL DEFAULT 0,
+                avg_pr_cycle_hours DOUBLE PRECISION,
+                last_commit_date TIMESTAMP,
+                CHECK ((task_id IS NULL) <> (nhan_vien_id IS NULL))
+            )
+        """)
+        cr.execute("CREATE UNIQUE INDEX task_git_contribution_task_uniq ON task_git_contribution (task_id) "
+                   "WHERE task_id IS NOT NULL")
+        cr.execute("CREATE UNIQUE INDEX task_git_contribution_nhan_vien_uniq ON task_git_contribution (nhan_vien_id) "
+                   "WHERE nhan_vien_id IS NOT NULL")
+
+        self._rebuild()
+
+    @api.model
+    def _refresh(self, key, ids=None):
+        """
+        Tính lại số liệu của `ids` theo `key` ('task_id' / 'nhan_vien_id'; ids=None = toàn bộ)
+        bằng một câu SQL: xóa dòng không còn đóng góp + upsert giá trị mới.
+        """
+        commit_source, commit_key, pr_source, pr_key = self._SOURCES[key]
+        params = []
+        if ids is None:
+            commit_where = pr_where = ''
+            scope = 'TRUE'
+        else:
+            ids = tuple(i for i in ids if i)
+            if not ids:
+                return
+            commit_where = 'AND %s IN %%s' % commit_key
+            pr_where = 'AND %s IN %%s' % pr_key
+            scope = 'g.%s IN %%s' % key
+            params = [ids, ids, ids]
+
+        columns = ', '.join(self.STAT_COLUMNS)
+        self.env.cr.execute("""
+            WITH fresh AS ({select}),
+            stale AS (
+                DELETE FROM task_git_contribution g
+                 WHERE g.{key} IS NOT NULL AND {scope}
+                   AND NOT EXISTS (SELECT 1 FROM fresh f WHERE f.key = g.{key})
+            )
+            INSERT INTO task_git_contribution ({key}, {columns})
+            SELECT key, {columns} FROM fresh
+            ON CONFLICT ({key}) WHERE {key} IS NOT NULL DO UPDATE
+               SET {updates}
+             WHERE ({old}) IS DISTINCT FROM ({new})
+        """.format(
+            select=self._STATS_SELECT.format(
+                commit_source=commit_source, commit_key=commit_key, commit_where=commit_where,
+                pr_source=pr_source, pr_key=pr_key, pr_where=pr_where,
+            ),
+            key=key, scope=scope, columns=columns,
+            updates=', '.join('%s = EXCLUDED.%s' % (c, c) for c in self.STAT_COLUMNS),
+            old=', '.join('task_git_contribution.%s' % c for c in self.STAT_COLUMNS),
+            new=', '.join('EXCLUDED.%s' % c for c in self.STAT_COLUMNS),
+        ), params)
+        self.invalidate_cache()
+
+    @api.model
+    def _refresh_contributions(self, task_ids, nhan_vien_ids):
+        self._refresh('task_id', task_ids)
+        self._refresh('nhan_vien_id', nhan_vien_ids)
+
+    @api.model
+    def _rebuild(self):
+        self._refresh('task_id')
+        self._refresh('nhan_vien_id')
+
+    @api.model
+    def _get_stats(self, key, ids):
+        """{id: {cột: giá trị}} theo `key`; id không có đóng góp → giá trị 0"""
+        empty = dict.fromkeys(self.STAT_COLUMNS, 0)
+        empty['last_commit_date'] = False
+        stats = {i: dict(empty) for i in ids if isinstance(i, int)}
+        if stats:
+            self.env.cr.execute("""
+                SELECT {key}, {columns} FROM task_git_contribution WHERE {key} IN %s
+            """.format(key=key, columns=', '.join(self.STAT_COLUMNS)), [tuple(stats)])
+            for row in self.env.cr.fetchall():
+                stats[row[0]] = dict(zip(self.STAT_COLUMNS, (value or 0 for value in row[1:])))
+                stats[row[0]]['last_commit_date'] = row[-1] or False
+        return stats
+
+
+class TaskGitIntegrationLinker(models.Model):
+    _inherit = 'task.git.integration'
+
+    def _with_link_matcher(self):
+        """
+        self với context `git_link_matcher`: chỉ mục task được dựng một lần cho cả lượt
+        đồng bộ thay vì mỗi lần _upsert_sync_result (mỗi chunk LOCAL_CHUNK commit).
+        """
+        if self.env.context.get('git_link_matcher'):
+            return self
+        return self.with_context(git_link_matcher=LazyMatcher(self.env['task.git.linker']))
+
+    def _run_sync(self, *args, **kwargs):
+        return super(TaskGitIntegrationLinker, self._with_link_matcher())._run_sync(*args, **kwargs)
+
+    def _upsert_sync_result(self, result):
+        changed_ids = super()._upsert_sync_result(result)
+        if result.resource not in ('commits', 'pulls') or not changed_ids:
+            return changed_ids
+        linker = self.env['task.git.linker']
+        lazy = self.env.context.get('git_link_matcher')
+        matcher = lazy.get() if lazy else None
+        if result.resource == 'commits':
+            linker.link_commits(changed_ids, matcher=matcher)
+        else:
+            linker.link_pullrequests(changed_ids, matcher=matcher)
+        return changed_ids
+
+
+class TaskGitCommitLink(models.Model):
+    _inherit = 'task.git.commit'
+
+    task_ids = fields.Many2many('project.task', 'task_git_commit_task_rel', 'commit_id', 'task_id',
+                                string='Tasks', readonly=True)
+    nhan_vien_id = fields.Many2one('nhan_vien', string='Nhân viên', readonly=True, index=True,
+                                   ondelete='set null')
+    lines_changed = fields.Integer('Lines Changed', compute='_compute_lines_changed')
+
+    def _compute_lines_changed(self):
+        for commit in self:
+            commit.lines_changed = commit.additions + commit.deletions
+
+
+class TaskGitPullRequestLink(models.Model):
+    _inherit = 'task.git.pullrequest'
+
+    task_ids = fields.Many2many('project.task', 'task_git_pullrequest_task_rel', 'pullrequest_id', 'task_id',
+                                string='Tasks', readonly=True)
+    nhan_vien_id = fields.Many2one('nhan_vien', string='Nhân viên', readonly=True, index=True,
+                                   ondelete='set null')
+
+
+class ProjectTaskGitStats(models.Model):
+    _inherit = 'project.task'
+
+    git_commit_count = fields.Integer('Git Commits', compute='_compute_git_stats')
+    git_lines_changed = fields.Integer('Dòng code thay đổi', compute='_compute_git_stats')
+    git_pr_count = fields.Integer('Pull Requests', compute='_compute_git_stats')
+    git_pr_cycle_hours = fields.Float('Chu kỳ PR TB (giờ)', compute='_compute_git_stats')
+    git_last_commit_date = fields.Datetime('Commit gần nhất', compute='_compute_git_stats')
+
+    def _compute_git_stats(self):
+        stats = self.env['task.git.contribution'].sudo()._get_stats('task_id', self.ids)
+        for task in self:
+            row = stats.get(task.id) or {}
+            task.git_commit_count = row.get('commit_count', 0)
+            task.git_lines_changed = row.get('lines_added', 0) + row.get('lines_deleted', 0)
+            task.git_pr_count = row.get('pr_count', 0)
+            task.git_pr_cycle_hours = row.get('avg_pr_cycle_hours', 0)
+            task.git_last_commit_date = row.get('last_commit_date', False)
+
+    def action_view_git_commits(self):
+        self.ensure_one()
+        return {
+            'name': _('Commits: %s') % self.name,
+            'type': 'ir.actions.act_window',
+            'res_model': 'task.git.commit',
+            'view_mode': 'tree,form',
+            'domain': [('task_ids', 'in', self.id)],
+        }
+
+
+class NhanVienGitStats(models.Model):
+    _inherit = 'nhan_vien'
+
+    git_commit_count = fields.Integer('Git Commits', compute='_compute_git_stats')
+    git_lines_changed = fields.Integer('Dòng code thay đổi', compute='_compute_git_stats')
+    git_pr_count = fields.Integer('Pull Requests', compute='_compute_git_stats')
+    git_merged_pr_count = fields.Integer('PR đã merge', compute='_compute_git_stats')
+    git_pr_cycle_hours = fields.Float('Chu kỳ PR TB (giờ)', compute='_compute_git_stats')
+    git_last_commit_date = fields.Datetime('Commit gần nhất', compute='_compute_git_stats')
+
+    def _compute_git_stats(self):
+        stats = self.env['task.git.contribution'].sudo()._get_stats('nhan_vien_id', self.ids)
+        for nv in self:
+            row = stats.get(nv.id) or {}
+            nv.git_commit_count = row.get('commit_count', 0)
+            nv.git_lines_changed = row.get('lines_added', 0) + row.get('lines_deleted', 0)
+            nv.git_pr_count = row.get('pr_count', 0)
+            nv.git_merged_pr_count = row.get('merged_pr_count', 0)
+            nv.git_pr_cycle_hours = row.get('avg_pr_cycle_hours', 0)
+            nv.git_last_commit_date = row.get('last_commit_date', False)
+
+    def action_view_git_commits(self):
+        self.ensure_one()
+        return {
+            'name': _('Commits: %s') % self.name,
+            'type': 'ir.actions.act_window',
+            'res_model': 'task.git.commit',
+            'view_mode': 'tree,form',
+            'domain': [('nhan_vien_id', '=', self.id)],
+        }
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+from collections import defaultdict
+from datetime import timedelta
+import json
+import logging
+import secrets
+
+from .git_sync_client import SYNC_RESOURCES
+from .git_webhook import parse_event
+
+_logger = logging.getLogger(__name__)
+
+WEBHOOK_ROUTE = '/quan_ly_cong_viec/git/webhook/%s'
+
+
+class TaskGitIntegrationWebhook(models.Model):
+    _inherit = 'task.git.integration'
+
+    webhook_secret = fields.Char('Webhook Secret', copy=False, groups='project.group_project_manager',
+                                 help='Secret khai báo trong cấu hình webhook của GitHub / GitLab')
+    webhook_url = fields.Char('Webhook URL', compute='_compute_webhook_url',
+                              help='Payload URL cho webhook (content type application/json)')
+    last_webhook_date = fields.Datetime('Last Webhook', readonly=True)
+    commit_sync_pending = fields.Boolean('Commit Sync Pending', readonly=True, copy=False,
+                                         help='Webhook nhận push chưa đủ commit / số dòng, chờ đồng bộ commit qua REST')
+    webhook_event_ids = fields.One2many('task.git.webhook.event', 'integration_id', string='Webhook Events')
+
+    def _compute_webhook_url(self):
+        base_url = self.env['ir.config_parameter'].sudo().get_param('web.base.url', '')
+        for record in self:
+            if record.id and record.platform != 'local':
+                record.webhook_url = base_url.rstrip('/') + WEBHOOK_ROUTE % record.id
+            else:
+                record.webhook_url = False
+
+    def action_generate_webhook_secret(self):
+        for record in self:
+            record.webhook_secret = secrets.token_hex(20)
+
+    def _apply_webhook_event(self, event, payload):
+        """
+        Ghi thay đổi của một sự kiện webhook như đồng bộ REST (upsert chỉ dòng thay đổi,
+        commit / PR được liên kết lại task qua _upsert_sync_result).
+
+        Returns:
+            set resource bị ảnh hưởng (rỗng nếu sự kiện không liên quan)
+        """
+        self.ensure_one()
+        change = parse_event(self.platform, event, payload)
+        touched = set()
+        for result in change.results:
+            self._upsert_sync_result(result)
+            touched.add(result.resource)
+        if change.needs_commit_sync and not self.commit_sync_pending:
+            self.commit_sync_pending = True
+        if change.deleted_branches:
+            self.env['task.git.branch'].flush()
+            self.env.cr.execute(
+                'DELETE FROM task_git_branch WHERE integration_id = %s AND name = ANY(%s)',
+                [self.id, change.deleted_branches],
+            )
+            self.env['task.git.branch'].invalidate_cache()
+            touched.add('branches')
+        return touched
+
+    def _run_sync(self, resources=SYNC_RESOURCES, full=False):
+        results = super()._run_sync(resources, full)
+        if 'commits' in results and self.commit_sync_pending:
+            self.commit_sync_pending = False
+        return results
+
+    @api.model
+    def _sync_pending_commits(self):
+        """Đồng bộ commit tăng dần (REST) cho các integration có push webhook chưa đủ commit"""
+        for integration in self.search([('commit_sync_pending', '=', True)]):
+            try:
+                with self.env.cr.savepoint():
+                    integration._run_sync(('commits',))
+            except Exception as e:
+                # Giữ cờ: thử lại ở lượt xử lý webhook / đồng bộ sau
+                _logger.warning('Commit sync after webhook failed for %s: %s', integration.name, e)
+
+
+class TaskGitWebhookEvent(models.Model):
+    """
+    Hàng đợi sự kiện webhook. Controller chỉ xác thực chữ ký và ghi payload vào đây rồi
+    đánh thức cron; cron áp dụng các sự kiện theo thứ tự nhận, mỗi sự kiện trong một
+    savepoint riêng để một payload lỗi không chặn các sự kiện sau.
+    """
+    _name = 'task.git.webhook.event'
+    _description = 'Git Webhook Event'
+    _order = 'id desc'
+
+    integration_id = fields.Many2one('task.git.integration', string='Integration', required=True,
+                                     index=True, ondelete='cascade', readonly=True)
+    event = fields.Char('Event', readonly=True)
+    delivery_id = fields.Char('Delivery ID', readonly=True)
+    payload = fields.Text('Payload', readonly=True)
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('done', 'Done'),
+        ('ignored', 'Ignored'),
+        ('failed', 'Failed'),
+    ], string='State', default='pending', required=True, index=True, readonly=True)
+    error_message = fields.Text('Error Message', readonly=True)
+    processed_at = fields.Datetime('Processed At', readonly=True)
+
+    _sql_constraints = [
+        ('delivery_unique', 'unique(integration_id, delivery_id)', 'Webhook delivery already received!')
+    ]
+
+    # Số sự kiện mỗi lượt xử lý
+    PROCESS_BATCH = 200
+    # Số ngày giữ sự kiện đã xử lý xong
+    KEEP_DAYS = 14
+
+    @api.model
+    def _enqueue(self, integration, event, delivery_id, payload):
+        """
+        Ghi sự kiện vào hàng đợi (bỏ qua delivery đã nhận) và đánh thức cron xử lý.
+
+        Returns:
+            id sự kiện, None nếu trùng
+        """
+        self.env.cr.execute("""
+            INSERT INTO task_git_webhook_event (integration_id, event, delivery_id, payload, state,
+                                                create_uid, create_date, write_uid, write_date)
+            VALUES (%s, %s, %s, %s, 'pending',
+                    %s, now() at time zone 'UTC', %s, now() at time zone 'UTC')
+            ON CONFLICT (integration_id, delivery_id) DO NOTHING
+            RETURNING id
+        """, [integration.id, event, delivery_id, payload, self.env.uid, self.env.uid])
+        row = self.env.cr.fetchone()
+        if not row:
+            return None
+        cron = self.env.ref('quan_ly_cong_viec.ir_cron_task_git_webhook', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
+        return row[0]
+
+    @api.model
+    def _process_pending(self, limit=None):
+        """
+        Áp dụng tối đa `limit` sự kiện pending theo thứ tự nhận.
+
+        Returns:
+            số sự kiện đã xử lý
+        """
+        self.flush(['state'])
+        self.env.cr.execute("""
+            SELECT id FROM task_git_webhook_event
+             WHERE state = 'pending'
+             ORDER BY id
+             LIMIT %s
+               FOR UPDATE SKIP LOCKED
+        """, [limit or self.PROCESS_BATCH])
+        events = self.browse([row[0] for row in self.env.cr.fetchall()])
+
+        touched = defaultdict(set)
+        now = fields.Datetime.now()
+        # Chỉ mục task dùng chung cho cả lượt xử lý
+        linked = self.env['task.git.integration']._with_link_matcher()
+        for event in events:
+            integration = event.integration_id
+            try:
+                with self.env.cr.savepoint():
+                    resources = integration.with_env(linked.env)._apply_webhook_event(
+                        event.event, json.loads(event.payload or '{}'))
+            except Exception as e:
+                _logger.warning('Git webhook event %s (%s) failed: %s', event.id, event.event, e)
+                event.write({'state': 'failed', 'error_message': str(e), 'processed_at': now})
+                continue
+            touched[integration] |= resources
+            event.write({'state': 'done' if resources else 'ignored', 'error_message': False, 'processed_at': now})
+
+        for integration, resources in touched.items():
+            vals = integration._count_totals(resources)
+            vals['last_webhook_date'] = now
+            integration.write(vals)
+        return len(events)
+
+    @api.model
+    def _cron_process_events(self):
+        """Cron (được controller đánh thức): xử lý hết hàng đợi, dọn sự kiện cũ"""
+        while self._process_pending() >= self.PROCESS_BATCH:
+            pass
+        self.env['task.git.integration']._sync_pending_commits()
+        self.search([
+            ('state', 'in', ('done', 'ignored')),
+            ('create_date', '<', fields.Datetime.now() - timedelta(days=self.KEEP_DAYS)),
+        ]).unlink()
+
+    def action_retry(self):
+        """Đưa sự kiện lỗi về hàng đợi"""
+        failed = self.filtered(lambda e: e.state == 'failed')
+        if not failed:
+            raise UserError(_('Only failed events can be retried.'))
+        failed.write({'state': 'pending', 'error_message': False})
+        self._process_pending()
@@ -89,6 +89,24 @@ class TaskScoreCard(models.Model):
         readonly=True
     )
 
+    # Màu theo xếp loại
+    GRADE_COLORS = {
+        'S': '#FFD700',  # Gold
+        'A': '#4CAF50',  # Green
+        'B': '#2196F3',  # Blue
+        'C': '#FF9800',  # Orange
+        'D': '#F44336',  # Red
+    }
+
+    # XP theo xếp loại
+    GRADE_XP = {
+        'S': 100,
+        'A': 80,
+        'B': 60,
+        'C': 40,
+        'D': 20,
+    }
+
     # ==================
     # COMPUTED FIELDS
     # ==================
@@ -140,30 +158,35 @@ class TaskScoreCard(models.Model):
     # ==================
     # BUSINESS LOGIC
     # ==================
-    @api.model
-    def create(self, vals):
-        """Override: Post notification when score is created"""
-        score_card = super(TaskScoreCard, self).create(vals)
-        score_card._post_score_to_chatter()
-        score_card._reward_xp_to_employee()
-        return score_card
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Override: Post notification when score is created (xử lý theo lô)"""
+        score_cards = super(TaskScoreCard, self).create(vals_list)
+        score_cards._post_score_to_chatter()
+        score_cards._reward_xp_to_employee()
+        self.env['task.analytics.report']._refresh_for_tasks(score_cards.task_id)
+        return score_cards
 
-    def _post_score_to_chatter(self):
-        """Đăng điểm lên Chatter"""
+    def write(self, vals):
+        """Override: Cập nhật rollup Analytics khi điểm thay đổi"""
+        old_tasks = self.task_id
+        res = super(TaskScoreCard, self).write(vals)
+        if {'task_id', 'timeliness_score', 'efficiency_score', 'quality_score'}.intersection(vals):
+            self.env['task.analytics.report']._refresh_for_tasks(old_tasks | self.task_id)
+        return res
+
+    def unlink(self):
+        """Override: Cập nhật rollup Analytics khi xóa phiếu điểm"""
+        rollup_keys = self.task_id._get_analytics_rollup_keys()
+        res = super(TaskScoreCard, self).unlink()
+        self.env['task.analytics.report']._refresh_rollup(rollup_keys)
+        return res
+
+    def _render_score_message(self):
+        """HTML phiếu điểm đăng lên Chatter của task"""
         self.ensure_one()
-        
-        # Choose color based on grade
-        color_map = {
-            'S': '#FFD700',  # Gold
-            'A': '#4CAF50',  # Green
-            'B': '#2196F3',  # Blue
-            'C': '#FF9800',  # Orange
-            'D': '#F44336',  # Red
-        }
-        
-        color = color_map.get(self.grade, '#999')
-        
-        message = f'''
+        color = self.GRADE_COLORS.get(self.grade, '#999')
+        return f'''
             <div style="background:{color}; color:white; padding:15px; border-radius:8px; text-align:center;">
                 <h2 style="margin:0;">🏆 Xếp loại: {self.grade}</h2>
                 <h3 style="margin:10px 0;">Điểm: {self.final_score:.1f}/100</h3>
@@ -175,18 +198,24 @@ class TaskScoreCard(models.Model):
                 <p style="margin-top:15px; font-style:italic;">"{self.ai_feedback}"</p>
             </div>
         '''
+
+    def _post_score_to_chatter(self):
+        """Đăng điểm lên Chatter - một ghi chú cho mỗi task, tạo hàng loạt"""
+        bodies = {}
+        for card in self:
+            bodies.setdefault(card.task_id.id, []).append(card._render_score_message())
+        if not bodies:
+            return
         
-        self.task_id.message_post(
-            body=message,
+        self.env['project.task'].browse(list(bodies))._message_log_batch(
+            bodies={task_id: ''.join(parts) for task_id, parts in bodies.items()},
             message_type='notification',
-            subtype_xmlid='mail.mt_note',
         )
 
     def _reward_xp_to_employee(self):
         """Cộng XP cho nhân viên dựa trên điểm task (HR Integration với quan_ly_nhan_su)"""
-        self.ensure_one()
-        
-        if not self.user_id:
+        cards = self.filtered('user_id')
+        if not cards:
             return
         
         # Check if quan_ly_nhan_su module is installed
@@ -194,41 +223,33 @@ class TaskScoreCard(models.Model):
             _logger.info('Module quan_ly_nhan_su not installed, skipping XP reward')
             return
         
-        # Tìm nhan_vien từ quan_ly_nhan_su
-        nhan_vien = self.env['nhan_vien'].search([
-            '|',
-            ('email', '=', self.user_id.login),
-            ('name', '=', self.user_id.name)
-        ], limit=1)
+        # Tìm nhan_vien cho tất cả user bằng một lần tra cứu
+        employees = self.env['nhan_vien.resolver'].resolve_many(cards.mapped('user_id'))
         
-        if not nhan_vien:
-            _logger.warning(f'Không tìm thấy nhân viên cho user {self.user_id.name}')
+        lines_by_employee = {}
+        for card in cards:
+            nhan_vien = employees.get(card.user_id.id)
+            if not nhan_vien:
+                _logger.warning(f'Không tìm thấy nhân viên cho user {card.user_id.name}')
+                continue
+            
+            # XP theo grade + bonus XP nếu task có xp_reward
+            xp_amount = self.GRADE_XP.get(card.grade, 0) + (card.task_id.xp_reward or 0)
+            lines_by_employee.setdefault(nhan_vien.id, []).append(
+                _('🎉 Hoàn thành task "%s" với xếp hạng %s. Nhận %d XP!') % (
+                    card.task_id.name,
+                    card.grade,
+                    xp_amount
+                )
+            )
+        if not lines_by_employee:
             return
         
-        # Tính XP dựa trên grade
-        xp_rewards = {
-            'S': 100,
-            'A': 80,
-            'B': 60,
-            'C': 40,
-            'D': 20,
-        }
-        
-        xp_amount = xp_rewards.get(self.grade, 0)
-        
-        # Bonus XP nếu task có xp_reward
-        if self.task_id.xp_reward:
-            xp_amount += self.task_id.xp_reward
-        
-        # Gửi thông báo cho nhân viên (thay vì cộng XP trực tiếp vì quan_ly_nhan_su chưa có field total_xp)
-        nhan_vien.message_post(
-            body=_('🎉 Hoàn thành task "%s" với xếp hạng %s. Nhận %d XP!') % (
-                self.task_id.name,
-                self.grade,
-                xp_amount
-            ),
-            subject=_('XP Reward'),
-            message_type='notification'
+        # Gửi thông báo cho nhân viên (thay vì cộng XP trực tiếp vì quan_ly_nhan_su chưa có field total_xp),
+        # một ghi chú cho mỗi nhân viên
+        self.env['nhan_vien'].browse(list(lines_by_employee))._message_log_batch(
+            bodies={nv_id: '<br/>'.join(lines) for nv_id, lines in lines_by_employee.items()},
+            message_type='notification',
         )
 
     def action_view_task(self):
@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, tools
+from psycopg2.extras import execute_values
+import logging
+import re
+
+from .task_checklist import normalize_tokens
+
+_logger = logging.getLogger(__name__)
+
+_HTML_TAG_RE = re.compile(r'<[^>]+>')
+
+# Field của từng model làm thay đổi tài liệu tìm kiếm của task
+SEARCH_TASK_FIELDS = {'name', 'description'}
+SEARCH_REPORT_FIELDS = {'task_id', 'report_content'}
+SEARCH_CHECKLIST_FIELDS = {'task_id', 'name'}
+
+
+def fold_text(text):
+    """Chuẩn hóa văn bản cho chỉ mục: bỏ thẻ HTML, bỏ dấu, chữ thường"""
+    return ' '.join(normalize_tokens(_HTML_TAG_RE.sub(' ', text or '')))
+
+
+class TaskSearchIndex(models.Model):
+    """
+    Chỉ mục full-text của task (tsvector + GIN).
+
+    Tài liệu của mỗi task gồm tên (trọng số A), checklist (B), mô tả (C) và nội
+    dung báo cáo (D), được bỏ dấu tiếng Việt bằng normalize_tokens trước khi đưa
+    vào to_tsvector('simple', ...), nên 'hoàn thành' và 'hoan thanh' khớp nhau mà
+    không cần extension unaccent. Bảng được cập nhật theo task khi task, báo cáo
+    hoặc checklist thay đổi; task bị xóa thì dòng bị xóa theo (ON DELETE CASCADE).
+    """
+    _name = 'task.search.index'
+    _description = 'Chỉ mục Tìm kiếm Task'
+    _auto = False
+    _rec_name = 'task_id'
+
+    REBUILD_CHUNK = 2000
+
+    task_id = fields.Many2one('project.task', string='Công việc', readonly=True)
+
+    def init(self):
+        cr = self.env.cr
+        if tools.table_exists(cr, self._table):
+            return
+
+        # id = task_id (một dòng cho mỗi task)
+        cr.execute("""
+            CREATE TABLE task_search_index (
+                id INTEGER PRIMARY KEY,
+                task_id INTEGER NOT NULL UNIQUE REFERENCES project_task(id) ON DELETE CASCADE,
+                document TSVECTOR NOT NULL
+            )
+        """)
+        cr.execute("CREATE INDEX task_search_index_document_idx ON task_search_index USING GIN (document)")
+
+        self._rebuild_index()
+
+    @api.model
+    def _refresh_tasks(self, task_ids):
+        """Dựng lại tài liệu của `task_ids` (2 câu SQL: đọc văn bản + upsert)"""
+        task_ids = tuple(tid for tid in task_ids if isinstance(tid, int))
+        if not task_ids:
+            return
+
+        self.env['project.task'].flush(list(SEARCH_TASK_FIELDS))
+        self.env['task.smart.report'].flush(list(SEARCH_REPORT_FIELDS))
+        self.env['task.checklist'].flush(list(SEARCH_CHECKLIST_FIELDS))
+
+        cr = self.env.cr
+        cr.execute("""
+            SELECT t.id, t.name, t.description,
+                   (SELECT string_agg(c.name, ' ') FROM task_checklist c WHERE c.task_id = t.id),
+                   (SELECT string_agg(r.report_content, ' ') FROM task_smart_report r WHERE r.task_id = t.id)
+              FROM project_task t
+             WHERE t.id IN %s
+        """, [task_ids])
+        rows = [
+            (task_id, fold_text(name), fold_text(checklist), fold_text(description), fold_text(reports))
+            for task_id, name, description, checklist, reports in cr.fetchall()
+        ]
+        if not rows:
+            return
+
+        execute_values(cr._obj, """
+            INSERT INTO task_search_index (id, task_id, document)
+            VALUES %s
+            ON CONFLICT (id) DO UPDATE
+               SET document = EXCLUDED.document
+             WHERE task_search_index.document IS DISTINCT FROM EXCLUDED.document
+        """, [(row[0],) + row for row in rows], template="""(
+            %s, %s,
+            setweight(to_tsvector('simple', %s), 'A') ||
+            setweight(to_tsvector('simple', %s), 'B') ||
+            setweight(to_tsvector('simple', %s), 'C') ||
+            setweight(to_tsvector('simple', %s), 'D')
+        )""", page_size=500)
+
+    @api.model
+    def _rebuild_index(self):
+        """Dựng lại toàn bộ chỉ mục theo từng chunk id"""
+        cr = self.env.cr
+        last_id = 0
+        total = 0
+        while True:
+            cr.execute("SELECT id FROM project_task WHERE id > %s ORDER BY id LIMIT %s",
+                       [last_id, self.REBUILD_CHUNK])
+            task_ids = [row[0] for row in cr.fetchall()]
+            if not task_ids:
+                break
+            self._refresh_tasks(task_ids)
+            last_id = task_ids[-1]
+            total += len(task_ids)
+        _logger.info('Task search index rebuilt for %d tasks', total)
+        return total
+
+    @api.model
+    def _cron_rebuild_index(self):
+        """Cron: dựng lại chỉ mục (sửa sai lệch nếu có ghi SQL trực tiếp)"""
+        self._rebuild_index()
+
+    @api.model
+    def _build_tsquery(self, query, operator='&'):
+        """'Hoàn thành API' → 'hoan:* & thanh:* & api:*' (None nếu không có token)"""
+        tokens = normalize_tokens(query)
+        if not tokens:
+            return None
+        return (' %s ' % operator).join('%s:*' % token for token in dict.fromkeys(tokens))
+
+    @api.model
+    def search_task_ids(self, query, limit=20):
+        """
+        Id task khớp `query`, sắp theo điểm ts_rank_cd giảm dần (chưa áp quyền truy cập).
+        Khớp tất cả từ trước; nếu không có kết quả thì khớp bất kỳ từ nào.
+        """
+        for operator in ('&', '|'):
+            tsquery = self._build_tsquery(query, operator)
+            if not tsquery:
+                return []
+            self.env.cr.execute("""
+                SELECT task_id
+                  FROM task_search_index, to_tsquery('simple', %s) q
+                 WHERE document @@ q
+                 ORDER BY ts_rank_cd(document, q) DESC, task_id DESC
+                 LIMIT %s
+            """, [tsquery, limit])
+            task_ids = [row[0] for row in self.env.cr.fetchall()]
+            if task_ids:
+                return task_ids
+        return []
+
+    @api.model
+    def search_tasks(self, query, limit=20):
+        """Task khớp `query` mà người dùng hiện tại được xem, theo thứ tự liên quan"""
+        # Lấy dư để bù cho task bị lọc bởi quyền truy cập / archive
+        task_ids = self.search_task_ids(query, limit=limit * 3)
+        allowed = set(self.env['project.task'].search([('id', 'in', task_ids)]).ids)
+        return self.env['project.task'].browse([tid for tid in task_ids if tid in allowed][:limit])
+
+
+class ProjectTaskSearchIndex(models.Model):
+    _inherit = 'project.task'
+
+    @api.model
+    def search(self, args, offset=0, limit=None, order=None, count=False):
+        """
+        Context `task_search_rank` = [task_id] theo thứ tự liên quan (kết quả smart_task_search):
+        khi domain chứa đúng ('id', 'in', danh sách đó) và không có order tường minh (list view
+        chưa bấm sắp xếp cột), trả kết quả theo thứ tự liên quan thay cho _order.
+        """
+        ranking = self.env.context.get('task_search_rank')
+        if not ranking or order or count or not any(
+                isinstance(leaf, (list, tuple)) and len(leaf) == 3 and tuple(leaf[:2]) == ('id', 'in')
+                and list(leaf[2]) == list(ranking) for leaf in args):
+            return super().search(args, offset=offset, limit=limit, order=order, count=count)
+        rank = {task_id: position for position, task_id in enumerate(ranking)}
+        tasks = super().search(args).sorted(lambda task: rank.get(task.id, len(rank)))
+        return tasks[offset:offset + limit] if limit else tasks[offset:]
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        tasks = super().create(vals_list)
+        self.env['task.search.index']._refresh_tasks(tasks.ids)
+        return tasks
+
+    def write(self, vals):
+        res = super().write(vals)
+        if SEARCH_TASK_FIELDS.intersection(vals):
+            self.env['task.search.index']._refresh_tasks(self.ids)
+        return res
+
+
+class TaskSmartReportSearchIndex(models.Model):
+    _inherit = 'task.smart.report'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        reports = super().create(vals_list)
+        self.env['task.search.index']._refresh_tasks(reports.mapped('task_id').ids)
+        return reports
+
+    def write(self, vals):
+        old_task_ids = self.mapped('task_id').ids if 'task_id' in vals else []
+        res = super().write(vals)
+        if SEARCH_REPORT_FIELDS.intersection(vals):
+            self.env['task.search.index']._refresh_tasks(old_task_ids + self.mapped('task_id').ids)
+        return res
+
+    def unlink(self):
+        task_ids = self.mapped('task_id').ids
+        res = super().unlink()
+        self.env['task.search.index']._refresh_tasks(task_ids)
+        return res
+
+
+class TaskChecklistSearchIndex(models.Model):
+    _inherit = 'task.checklist'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        items = super().create(vals_list)
+        self.env['task.search.index']._refresh_tasks(items.mapped('task_id').ids)
+        return items
+
+    def write(self, vals):
+        old_task_ids = self.mapped('task_id').ids if 'task_id' in vals else []
+        res = super().write(vals)
+        if SEARCH_CHECKLIST_FIELDS.intersection(vals):
+            self.env['task.search.index']._refresh_tasks(old_task_ids + self.mapped('task_id').ids)
+        return res
+
+    def unlink(self):
+        task_ids = self.mapped('task_id').ids
+        res = super().unlink()
+        self.env['task.search.index']._refresh_tasks(task_ids)
+        return res
@@ -1,8 +1,155 @@
 # -*- coding: utf-8 -*-
 
 from odoo import models, fields, api
+import hashlib
 import re
 
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+# Độ ưu tiên khi một cụm từ xuất hiện trong nhiều từ điển
+_KIND_PRIORITY = ('neutral', 'diminisher', 'intensifier', 'negation', 'sentiment')
+
+
+class SentimentLexicon(object):
+    """
+    Từ điển cảm xúc đã biên dịch thành trie theo âm tiết (token).
+
+    Tiếng Việt là ngôn ngữ đơn lập nên cụm từ ('khó khăn', 'hoàn thành',
+    'thất bại') gồm nhiều token. Trie cho phép khớp cụm dài nhất tại mỗi vị trí,
+    độ sâu tối đa bằng số âm tiết của cụm dài nhất nên một lượt quét là tuyến tính
+    theo số token của văn bản.
+    """
+
+    def __init__(self, sentiment_words, negation_words, intensifiers, diminishers, neutral_words):
+        self.trie = {}
+        self.max_depth = 0
+        entries = []
+        for phrase, value in neutral_words.items():
+            entries.append(('neutral', phrase, value))
+        for phrase, value in diminishers.items():
+            entries.append(('diminisher', phrase, value))
+        for phrase, value in intensifiers.items():
+            entries.append(('intensifier', phrase, value))
+        for phrase in negation_words:
+            entries.append(('negation', phrase, None))
+        for phrase, value in sentiment_words.items():
+            entries.append(('sentiment', phrase, value))
+
+        for kind, phrase, value in entries:
+            tokens = _TOKEN_RE.findall(phrase.lower())
+            if not tokens:
+                continue
+            node = self.trie
+            for token in tokens:
+                node = node.setdefault(token, {})
+            previous = node.get(None)
+            if previous and _KIND_PRIORITY.index(previous[0]) > _KIND_PRIORITY.index(kind):
+                continue
+            node[None] = (kind, value, ' '.join(tokens))
+            self.max_depth = max(self.max_depth, len(tokens))
+
+        # Phiên bản từ điển: đổi khi bất kỳ mục nào thay đổi
+        digest = hashlib.sha1(repr(sorted(
+            (kind, phrase.lower(), value) for kind, phrase, value in entries
+        )).encode('utf-8'))
+        self.version = digest.hexdigest()[:12]
+
+    def _match(self, tokens, start):
+        """Cụm dài nhất trong từ điển bắt đầu tại `start` → (entry, số token) hoặc (None, 0)"""
+        node = self.trie
+        best, best_len = None, 0
+        for offset in range(start, min(len(tokens), start + self.max_depth)):
+            node = node.get(tokens[offset])
+            if node is None:
+                break
+            if None in node:
+                best, best_len = node[None], offset - start + 1
+        return best, best_len
+
+    def analyze(self, text):
+        """
+        Phân tích cảm xúc của văn bản (không cần env, dùng được trong process pool)
+
+        Phủ định / từ nhấn mạnh / từ giảm nhẹ đứng liền trước một cụm cảm xúc
+        (có thể nối tiếp nhau, vd. 'không quá tệ') được áp dụng cho cụm đó.
+        """
+        if not text:
+            return {
+                'score': 0.0,
+                'sentiment': 'neutral',
+                'confidence': 0.0,
+                'details': []
+            }
+
+        tokens = _TOKEN_RE.findall(text.lower().strip())
+
+        sentiment_scores = []
+        found_keywords = []
+        is_negated = False
+        modifier = 1.0
+
+        i = 0
+        while i < len(tokens):
+            entry, length = self._match(tokens, i)
+            if not entry:
+                is_negated, modifier = False, 1.0
+                i += 1
+                continue
+
+            kind, value, phrase = entry
+            if kind == 'negation':
+                is_negated = True
+            elif kind in ('intensifier', 'diminisher'):
+                modifier = value
+            elif kind == 'sentiment':
+                score = value * modifier
+                if is_negated:
+                    score = -score * 0.8  # Đảo ngược nhưng giảm 20%
+                found_keywords.append({
+                    'word': phrase,
+                    'base_score': value,
+                    'final_score': score,
+                    'negated': is_negated,
+                    'modifier': modifier
+                })
+                if score != 0.0:
+                    sentiment_scores.append(score)
+                is_negated, modifier = False, 1.0
+            else:
+                is_negated, modifier = False, 1.0
+            i += length
+
+        # Tính điểm trung bình
+        if sentiment_scores:
+            avg_score = sum(sentiment_scores) / len(sentiment_scores)
+            # Normalize về khoảng -1.0 đến 1.0
+            final_score = max(-1.0, min(1.0, avg_score / 2.0))
+        else:
+            final_score = 0.0
+
+        # Xác định sentiment
+        if final_score > 0.2:
+            sentiment = 'positive'
+        elif final_score < -0.2:
+            sentiment = 'negative'
+        else:
+            sentiment = 'neutral'
+
+        # Tính confidence dựa trên số lượng từ khóa tìm thấy
+        total_words = len(tokens) if tokens else 1
+        keyword_count = len(found_keywords)
+        confidence = min(1.0, keyword_count / (total_words * 0.3))  # Max confidence khi 30% là keywords
+
+        return {
+            'score': round(final_score, 2),
+            'sentiment': sentiment,
+            'confidence': round(confidence, 2),
+            'details': found_keywords,
+            'keyword_count': keyword_count,
+            'total_words': total_words
+        }
+
+
 class TaskSentimentAnalyzer(models.AbstractModel):
     _name = 'task.sentiment.analyzer'
     _description = 'Task Sentiment Analyzer - Vietnamese'
@@ -121,100 +268,17 @@ class TaskSentimentAnalyzer(models.AbstractModel):
                 'details': list[dict] - Các từ khóa tìm thấy
             }
         """
-        if not text:
-            return {
-                'score': 0.0,
-                'sentiment': 'neutral',
-                'confidence': 0.0,
-                'details': []
-            }
-        
-        # Chuẩn hóa text
-        text = text.lower().strip()
-        words = re.findall(r'\w+', text, re.UNICODE)
-        
-        sentiment_scores = []
-        found_keywords = []
-        
-        i = 0
-        while i < len(words):
-            word = words[i]
-            score = 0.0
-            modifier = 1.0
-            is_negated = False
-            
-            # Kiểm tra từ phủ định trước đó
-            if i > 0 and words[i-1] in self.NEGATION_WORDS:
-                is_negated = True
-            
-            # Kiểm tra từ nhấn mạnh trước đó
-            if i > 0 and words[i-1] in self.INTENSIFIERS:
-                modifier = self.INTENSIFIERS[words[i-1]]
-            
-            # Kiểm tra từ giảm nhẹ trước đó
-            if i > 0 and words[i-1] in self.DIMINISHERS:
-                modifier = self.DIMINISHERS[words[i-1]]
-            
-            # Tìm trong từ điển tích cực
-            if word in self.POSITIVE_WORDS:
-                score = self.POSITIVE_WORDS[word] * modifier
-                if is_negated:
-                    score = -score * 0.8  # Đảo ngược nhưng giảm 20%
-                found_keywords.append({
-                    'word': word,
-                    'base_score': self.POSITIVE_WORDS[word],
-                    'final_score': score,
-                    'negated': is_negated,
-                    'modifier': modifier
-                })
-            
-            # Tìm trong từ điển tiêu cực
-            elif word in self.NEGATIVE_WORDS:
-                score = self.NEGATIVE_WORDS[word] * modifier
-                if is_negated:
-                    score = -score * 0.8  # Đảo ngược thành tích cực
-                found_keywords.append({
-                    'word': word,
-                    'base_score': self.NEGATIVE_WORDS[word],
-                    'final_score': score,
-                    'negated': is_negated,
-                    'modifier': modifier
-                })
-            
-            if score != 0.0:
-                sentiment_scores.append(score)
-            
-            i += 1
-        
-        # Tính điểm trung bình
-        if sentiment_scores:
-            avg_score = sum(sentiment_scores) / len(sentiment_scores)
-            # Normalize về khoảng -1.0 đến 1.0
-            final_score = max(-1.0, min(1.0, avg_score / 2.0))
-        else:
-            final_score = 0.0
-        
-        # Xác định sentiment
-        if final_score > 0.2:
-            sentiment = 'positive'
-        elif final_score < -0.2:
-            sentiment = 'negative'
-        else:
-            sentiment = 'neutral'
-        
-        # Tính confidence dựa trên số lượng từ khóa tìm thấy
-        total_words = len(words) if words else 1
-        keyword_count = len(found_keywords)
-        confidence = min(1.0, keyword_count / (total_words * 0.3))  # Max confidence khi 30% là keywords
-        
-        return {
-            'score': round(final_score, 2),
-            'sentiment': sentiment,
-            'confidence': round(confidence, 2),
-            'details': found_keywords,
-            'keyword_count': keyword_count,
-            'total_words': total_words
-        }
+        return LEXICON.analyze(text)
+    
+    def analyze_many(self, texts):
+        """Phân tích hàng loạt, trả về list kết quả theo đúng thứ tự `texts`"""
+        analyze = LEXICON.analyze
+        return [analyze(text) for text in texts]
+    
+    @api.model
+    def get_lexicon_version(self):
+        """Phiên bản từ điển hiện tại (dùng để biết báo cáo nào cần chấm lại)"""
+        return LEXICON.version
     
     def analyze_report_content(self, progress_note, issues, achievements):
         """
@@ -278,3 +342,13 @@ class TaskSentimentAnalyzer(models.AbstractModel):
                 return "Có một số vấn đề cần chú ý"
         else:
             return "Tiến độ ổn định, bình thường"
+
+
+# Biên dịch từ điển một lần khi load module
+LEXICON = SentimentLexicon(
+    sentiment_words={**TaskSentimentAnalyzer.POSITIVE_WORDS, **TaskSentimentAnalyzer.NEGATIVE_WORDS},
+    negation_words=TaskSentimentAnalyzer.NEGATION_WORDS,
+    intensifiers=TaskSentimentAnalyzer.INTENSIFIERS,
+    diminishers=TaskSentimentAnalyzer.DIMINISHERS,
+    neutral_words=TaskSentimentAnalyzer.NEUTRAL_WORDS,
+)
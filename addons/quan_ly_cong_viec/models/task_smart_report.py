@@ -2,11 +2,67 @@
 
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
+from odoo.service import server as odoo_server
+from psycopg2.extras import execute_values
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
 import logging
 import re
+import threading
+import time
+
+from .task_checklist import ChecklistMatcher
+from .task_sentiment_analyzer import LEXICON
 
 _logger = logging.getLogger(__name__)
 
+# Tiêu đề activity cảnh báo vướng mắc gửi PM
+BLOCKER_ACTIVITY_SUMMARY = 'Cảnh báo: Task bị vướng mắc'
+
+# Các field do phân tích cảm xúc ghi ra (được chấm lại khi từ điển thay đổi)
+SENTIMENT_FIELDS = ['ai_summary', 'sentiment_score', 'blocker_detected', 'risk_keywords']
+
+
+def _analysis_to_vals(analysis):
+    """Chuyển kết quả của task.sentiment.analyzer thành giá trị field báo cáo"""
+    result = {
+        'ai_summary': analysis.get('summary', ''),
+        'sentiment_score': analysis['sentiment'],
+        'blocker_detected': False,
+        'risk_keywords': '',
+    }
+    
+    # Phát hiện blocker nếu sentiment rất tiêu cực
+    if analysis['score'] < -0.5:
+        result['blocker_detected'] = True
+        # Lấy các từ tiêu cực tìm thấy
+        negative_words = [
+            detail['word'] for detail in analysis.get('details', [])
+            if detail['final_score'] < 0
+        ]
+        result['risk_keywords'] = ', '.join(negative_words[:5])  # Lấy 5 từ đầu
+    
+    # Tạo summary ngắn gọn
+    if analysis['score'] > 0.5:
+        result['ai_summary'] = f"✓ Tiến độ tốt (Score: {analysis['score']}). Tìm thấy {analysis['keyword_count']} từ khóa tích cực."
+    elif analysis['score'] < -0.5:
+        result['ai_summary'] = f"⚠ Có vấn đề (Score: {analysis['score']}). Phát hiện {len(negative_words)} từ khóa cảnh báo."
+    else:
+        result['ai_summary'] = f"→ Tiến độ ổn định (Score: {analysis['score']}). Confidence: {analysis['confidence']*100:.0f}%"
+    
+    return result
+
+
+def _content_hash(content):
+    """SHA-1 của nội dung báo cáo (đánh dấu nội dung đã được xử lý sau gửi)"""
+    return hashlib.sha1((content or '').encode('utf-8')).hexdigest()
+
+
+def _reanalyze_rows(rows):
+    """Worker của process pool: [(id, content)] → [(id, vals)]. Không dùng env/cursor."""
+    analyze = LEXICON.analyze
+    return [(report_id, _analysis_to_vals(analyze(content or ''))) for report_id, content in rows]
+
 
 class TaskSmartReport(models.Model):
     _name = 'task.smart.report'
@@ -81,6 +137,21 @@ class TaskSmartReport(models.Model):
         help='Các từ khóa AI phát hiện được'
     )
     
+    post_processed_hash = fields.Char(
+        string='Nội dung đã xử lý',
+        readonly=True,
+        copy=False,
+        help='SHA-1 của nội dung báo cáo đã chạy xử lý sau gửi (auto-tick, thông báo, chatter)'
+    )
+    
+    sentiment_lexicon_version = fields.Char(
+        string='Phiên bản Từ điển',
+        readonly=True,
+        copy=False,
+        index=True,
+        help='Phiên bản từ điển cảm xúc đã dùng để phân tích báo cáo này'
+    )
+    
     # === RELATIONS ===
     attachment_ids = fields.Many2many(
         'ir.attachment',
@@ -101,13 +172,26 @@ class TaskSmartReport(models.Model):
     # ==================
     @api.model_create_multi
     def create(self, vals_list):
-        """Override: Tự động phân tích AI khi tạo báo cáo"""
-        # AI Processing for each report
+        """
+        Override: Lưu báo cáo + snapshot tiến độ, phần xử lý nặng (auto-tick,
+        blocker, thông báo, chatter) được đưa vào hàng đợi task.smart.report.job
+        (xem _run_post_processing).
+
+        Phân tích cảm xúc theo từ điển chạy ngay (rẻ, không gọi mạng) vì snapshot
+        tiến độ dùng sentiment_score / blocker_detected.
+        """
+        analyzer = self.env['task.sentiment.analyzer']
+        version = analyzer.get_lexicon_version()
+        to_analyze = [vals for vals in vals_list if vals.get('report_content')]
+        analyses = analyzer.analyze_many([vals['report_content'] for vals in to_analyze])
+        for vals, analysis in zip(to_analyze, analyses):
+            analysis_vals = _analysis_to_vals(analysis)
+            analysis_vals['sentiment_lexicon_version'] = version
+            for field_name, value in analysis_vals.items():
+                # Giá trị truyền vào tường minh được giữ nguyên
+                vals.setdefault(field_name, value)
+
         for vals in vals_list:
-            if vals.get('report_content'):
-                ai_result = self._ai_analyze_report(vals['report_content'])
-                vals.update(ai_result)
-            
             # SNAPSHOT % hoàn thành tại thời điểm này (không đổi sau này)
             if vals.get('task_id'):
                 task = self.env['project.task'].browse(vals['task_id'])
@@ -115,10 +199,52 @@ class TaskSmartReport(models.Model):
                 vals['progress_percentage'] = progress
         
         reports = super(TaskSmartReport, self).create(vals_list)
-        
-        # Update task status based on AI analysis
+        self.env['task.smart.report.job']._enqueue(reports)
+        return reports
+    
+    def write(self, vals):
+        """Override: Nội dung đổi → phân tích lại qua hàng đợi"""
+        if 'report_content' in vals and 'sentiment_lexicon_version' not in vals:
+            vals = dict(vals, sentiment_lexicon_version=False)
+        res = super(TaskSmartReport, self).write(vals)
+        if 'report_content' in vals:
+            self.env['task.smart.report.job']._enqueue(self)
+        return res
+    
+    def _run_post_processing(self):
+        """
+        Xử lý sau khi gửi báo cáo, chạy theo lô từ task.smart.report.job:
+        phân tích AI, auto-tick checklist, cờ blocker của task, thông báo PM
+        và chatter. % hoàn thành của milestone là field stored, tự cập nhật qua
+        project.task.latest_report_progress.
+
+        Idempotent theo nội dung: báo cáo đã xử lý với đúng nội dung hiện tại
+        (post_processed_hash) bị bỏ qua, nên chạy lại job không đăng chatter
+        hay tạo activity trùng.
+        """
+        reports = self.filtered(lambda r: r.post_processed_hash != _content_hash(r.report_content))
+        if not reports:
+            return
+        reports._apply_post_processing()
         for report in reports:
-            # 🤖 AI AUTO-TICK CHECKLIST (KILLER FEATURE!)
+            report.post_processed_hash = _content_hash(report.report_content)
+
+    def _apply_post_processing(self):
+        """Các bước xử lý sau gửi cho báo cáo có nội dung chưa được xử lý"""
+        # AI Processing: chỉ phân tích báo cáo chưa có kết quả với từ điển hiện tại
+        analyzer = self.env['task.sentiment.analyzer']
+        version = analyzer.get_lexicon_version()
+        to_analyze = self.filtered(
+            lambda r: r.report_content and r.sentiment_lexicon_version != version
+        )
+        analyses = analyzer.analyze_many(to_analyze.mapped('report_content'))
+        for report, analysis in zip(to_analyze, analyses):
+            vals = _analysis_to_vals(analysis)
+            vals['sentiment_lexicon_version'] = version
+            report.write(vals)
+        
+        # 🤖 AI AUTO-TICK CHECKLIST (KILLER FEATURE!)
+        for report in self:
             if report.task_id.checklist_ids and report.report_content:
                 auto_ticked = report._ai_auto_tick_checklist()
                 if auto_ticked:
@@ -126,37 +252,43 @@ class TaskSmartReport(models.Model):
                         body=f"🤖 AI đã tự động tick {len(auto_ticked)} checklist items: {', '.join(auto_ticked)}",
                         message_type='notification',
                     )
-            
+        
+        # Update task status based on AI analysis (theo thứ tự báo cáo, ghi gộp theo task)
+        blocker_state = {}
+        blocker_reports = self.browse()
+        cleared_reports = self.browse()
+        for report in self.sorted('id'):
+            task = report.task_id
             if report.blocker_detected:
                 # Phát hiện vấn đề → Set blocker flag
-                report.task_id.write({
-                    'blocker_flag': True,
-                    'risk_level': 'high',
-                })
-                report._notify_manager_about_blocker()
-            else:
+                blocker_state[task] = True
+                blocker_reports |= report
+            elif blocker_state.get(task, task.blocker_flag):
                 # Báo cáo tốt → Tự động xóa cảnh báo blocker
-                if report.task_id.blocker_flag:
-                    report.task_id.write({
-                        'blocker_flag': False,
-                        'risk_level': 'low',
-                    })
-                    # Thông báo trên Chatter
-                    report.task_id.message_post(
-                        body=f"✅ Cảnh báo đã được gỡ bỏ! Báo cáo mới cho thấy tiến độ tốt.<br/>"
-                             f"<b>AI Analysis:</b> {report.ai_summary}",
-                        message_type='notification',
-                        subtype_xmlid='mail.mt_note',
-                    )
-            
-            # Post to Chatter
+                blocker_state[task] = False
+                cleared_reports |= report
+        
+        Task = self.env['project.task']
+        flagged_tasks = Task.union(*[task for task, flag in blocker_state.items() if flag])
+        cleared_tasks = Task.union(*[task for task, flag in blocker_state.items() if not flag])
+        if flagged_tasks:
+            flagged_tasks.write({'blocker_flag': True, 'risk_level': 'high'})
+        if cleared_tasks:
+            cleared_tasks.write({'blocker_flag': False, 'risk_level': 'low'})
+        blocker_reports._notify_manager_about_blocker()
+        
+        for report in cleared_reports:
+            # Thông báo trên Chatter
+            report.task_id.message_post(
+                body=f"✅ Cảnh báo đã được gỡ bỏ! Báo cáo mới cho thấy tiến độ tốt.<br/>"
+                     f"<b>AI Analysis:</b> {report.ai_summary}",
+                message_type='notification',
+                subtype_xmlid='mail.mt_note',
+            )
+        
+        # Post to Chatter
+        for report in self:
             report._post_to_chatter()
-            
-            # Trigger Milestone completion percentage update
-            if report.task_id.milestone_id:
-                report.task_id.milestone_id._compute_completion_percentage()
-        
-        return reports
     
     @api.onchange('report_content')
     def _onchange_report_content_auto_tick(self):
@@ -193,8 +325,8 @@ class TaskSmartReport(models.Model):
         
         # Nếu là record mới (chưa save)
         if not self.id:
-            # Create sẽ tự động trigger AI analysis và auto-tick
-            self.create({
+            # Create sẽ đưa báo cáo vào hàng đợi AI analysis và auto-tick
+            report = self.create({
                 'task_id': self.task_id.id,
                 'user_id': self.env.user.id,
                 'report_date': self.report_date or fields.Datetime.now(),
@@ -203,30 +335,18 @@ class TaskSmartReport(models.Model):
                 'attachment_ids': [(6, 0, self.attachment_ids.ids)],
             })
         else:
-            # Update existing record
+            # Update existing record (nội dung đổi → tự động phân tích lại)
             self.write({
                 'report_content': self.report_content,
                 'time_spent': self.time_spent,
             })
-            
-            # Trigger AI analysis manually
-            ai_result = self._ai_analyze_report(self.report_content)
-            self.write(ai_result)
-            
-            # Auto-tick checklist
-            if self.task_id.checklist_ids:
-                auto_ticked = self._ai_auto_tick_checklist()
-                if auto_ticked:
-                    self.message_post(
-                        body=f"🤖 AI đã tự động tick {len(auto_ticked)} items: {', '.join(auto_ticked)}",
-                        message_type='notification',
-                    )
+            report = self
         
         # Get updated stats
-        task = self.task_id
+        task = report.task_id
         checklist_done = len(task.checklist_ids.filtered('is_done'))
         checklist_total = len(task.checklist_ids)
-        progress = int(task.checklist_progress) if task.checklist_ids else int(self.progress_percentage)
+        progress = int(task.checklist_progress) if task.checklist_ids else int(report.progress_percentage)
         
         # Show success notification
         return {
@@ -236,7 +356,7 @@ class TaskSmartReport(models.Model):
                 'title': '✅ Báo cáo đã gửi thành công!',
                 'message': f"""📊 Tiến độ cập nhật: {progress}%
 ✅ Checklist: {checklist_done}/{checklist_total} items hoàn thành
-🤖 AI: {self.ai_summary or 'Đã phân tích'}""",
+🤖 AI: Đang phân tích và tự động tick checklist, kết quả sẽ có sau ít giây""",
                 'type': 'success',
                 'sticky': False,
                 'next': {'type': 'ir.actions.act_window_close'},
@@ -247,44 +367,111 @@ class TaskSmartReport(models.Model):
         """Submit report from wizard - just close the wizard"""
         return {'type': 'ir.actions.act_window_close'}
 
-    def _ai_analyze_report(self, content):
+    @api.model
+    def _reanalyze_stale_reports(self, chunk_size=2000, workers=1, time_limit=None, auto_commit=True):
         """
-        AI phân tích nội dung báo cáo sử dụng Sentiment Analyzer nâng cao
+        Chấm lại cảm xúc cho các báo cáo phân tích bằng từ điển cũ.
+
+        Duyệt báo cáo theo id tăng dần từng chunk, phân tích (tuần tự, hoặc bằng process
+        pool khi chạy từ odoo shell / script với workers > 1) và ghi lại bằng một câu UPDATE ... FROM (VALUES ...) mỗi chunk. Mỗi báo cáo
+        được gắn phiên bản từ điển nên chạy lại (sau khi bị ngắt, hết time_limit...)
+        chỉ xử lý phần còn lại. Chỉ cập nhật các field phân tích, không tác động
+        lại blocker/chatter của task.
+
+        Args:
+            chunk_size: số báo cáo mỗi lần đọc/ghi
+            workers: số process phân tích (<= 1 = chạy tuần tự). Trong process server Odoo
+                (cron, RPC) luôn chạy tuần tự: fork một process nhiều thread đang giữ socket
+                database / lock logging có thể làm process con treo
+            time_limit: dừng sau số giây này (lần chạy sau sẽ làm tiếp)
+            auto_commit: commit sau mỗi chunk
+
+        Returns:
+            dict: processed, elapsed, rate (báo cáo/giây), done
         """
-        # Lấy sentiment analyzer
-        analyzer = self.env['task.sentiment.analyzer']
-        
-        # Phân tích nội dung báo cáo
-        analysis = analyzer.analyze_text(content or '')
-        
-        result = {
-            'ai_summary': analysis.get('summary', ''),
-            'sentiment_score': analysis['sentiment'],
-            'blocker_detected': False,
-            'risk_keywords': '',
+        version = LEXICON.version
+        if workers > 1 and odoo_server.server is not None:
+            _logger.warning('Sentiment re-analysis: process pool is only used outside the Odoo server, '
+                            'running sequentially')
+            workers = 1
+        auto_commit = auto_commit and not getattr(threading.current_thread(), 'testing', False)
+        
+        cr = self.env.cr
+        pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        started = time.perf_counter()
+        processed = 0
+        last_id = 0
+        done = False
+        try:
+            while True:
+                cr.execute("""
+                    SELECT id, report_content
+                      FROM task_smart_report
+                     WHERE id > %s
+                       AND report_content IS NOT NULL
+                       AND sentiment_lexicon_version IS DISTINCT FROM %s
+                     ORDER BY id
+                     LIMIT %s
+                """, [last_id, version, chunk_size])
+                rows = cr.fetchall()
+                if not rows:
+                    done = True
+                    break
+                last_id = rows[-1][0]
+                
+                if pool:
+                    step = -(-len(rows) // workers)
+                    results = []
+                    for part in pool.map(_reanalyze_rows, [rows[i:i + step] for i in range(0, len(rows), step)]):
+                        results.extend(part)
+                else:
+                    results = _reanalyze_rows(rows)
+                
+                execute_values(cr._obj, """
+                    UPDATE task_smart_report r
+                       SET ai_summary = v.ai_summary,
+                           sentiment_score = v.sentiment_score,
+                           blocker_detected = v.blocker_detected,
+                           risk_keywords = v.risk_keywords,
+                           sentiment_lexicon_version = v.version
+                      FROM (VALUES %s) AS v(id, ai_summary, sentiment_score, blocker_detected, risk_keywords, version)
+                     WHERE r.id = v.id
+                """, [
+                    (report_id, vals['ai_summary'], vals['sentiment_score'],
+                     vals['blocker_detected'], vals['risk_keywords'], version)
+                    for report_id, vals in results
+                ], page_size=len(results))
+                
+                processed += len(rows)
+                if auto_commit:
+                    cr.commit()
+                
+                elapsed = time.perf_counter() - started
+                _logger.info(
+                    'Sentiment re-analysis: %d reports (last id %d), %.0f reports/s',
+                    processed, last_id, processed / elapsed if elapsed else 0
+                )
+                if time_limit and elapsed >= time_limit:
+                    break
+        finally:
+            if pool:
+                pool.shutdown()
+            self.invalidate_cache(SENTIMENT_FIELDS + ['sentiment_lexicon_version'])
+        
+        elapsed = time.perf_counter() - started
+        stats = {
+            'processed': processed,
+            'elapsed': round(elapsed, 2),
+            'rate': round(processed / elapsed, 1) if elapsed else 0.0,
+            'done': done,
         }
-        
-        # Phát hiện blocker nếu sentiment rất tiêu cực
-        if analysis['score'] < -0.5:
-            result['blocker_detected'] = True
-            # Lấy các từ tiêu cực tìm thấy
-            negative_words = [
-                detail['word'] for detail in analysis.get('details', [])
-                if detail['final_score'] < 0
-            ]
-            result['risk_keywords'] = ', '.join(negative_words[:5])  # Lấy 5 từ đầu
-        
-        # Tạo summary ngắn gọn
-        if analysis['score'] > 0.5:
-            result['ai_summary'] = f"✓ Tiến độ tốt (Score: {analysis['score']}). Tìm thấy {analysis['keyword_count']} từ khóa tích cực."
-        elif analysis['score'] < -0.5:
-            result['ai_summary'] = f"⚠ Có vấn đề (Score: {analysis['score']}). Phát hiện {len(negative_words)} từ khóa cảnh báo."
-        else:
-            result['ai_summary'] = f"→ Tiến độ ổn định (Score: {analysis['score']}). Confidence: {analysis['confidence']*100:.0f}%"
-        
-        _logger.info(f'AI Analysis Result: {result} | Details: {analysis}')
-        
-        return result
+        _logger.info('Sentiment re-analysis (lexicon %s) finished: %s', version, stats)
+        return stats
+
+    @api.model
+    def _cron_reanalyze_reports(self, time_limit=1800):
+        """Cron: chấm lại các báo cáo còn dùng phiên bản từ điển cũ"""
+        return self._reanalyze_stale_reports(time_limit=time_limit)
 
     def _calculate_progress_snapshot(self, task, vals):
         """
@@ -337,9 +524,9 @@ class TaskSmartReport(models.Model):
         🤖 AI TỰ ĐỘNG TICK CHECKLIST (KILLER FEATURE!)
         
         Cách hoạt động:
-        1. Parse report_content → Extract completed tasks
-        2. Fuzzy match với checklist items
-        3. Auto-tick items match (>70% similarity)
+        1. Tách token nội dung báo cáo (một lần, bỏ dấu)
+        2. So khớp với chỉ mục token của checklist items chưa xong
+        3. Tick tất cả items đạt ngưỡng trong một lần write
         4. Return list of auto-ticked items
         
         VD: "Hôm nay tôi đã hoàn thành design UI và code backend"
@@ -347,177 +534,66 @@ class TaskSmartReport(models.Model):
         """
         self.ensure_one()
         
-        _logger.info(f'=== AI AUTO-TICK CHECKLIST START ===')
-        _logger.info(f'Task ID: {self.task_id.id}')
-        _logger.info(f'Checklist items count: {len(self.task_id.checklist_ids)}')
-        _logger.info(f'Report content: {self.report_content[:200]}...')
-        
-        if not self.task_id.checklist_ids:
-            _logger.warning('No checklist items found!')
-            return []
-            
-        if not self.report_content:
-            _logger.warning('No report content!')
-            return []
-        
-        # Import difflib for fuzzy matching
-        from difflib import SequenceMatcher
-        
-        content_lower = self.report_content.lower()
-        auto_ticked = []
-        
-        # Từ khóa completion - RELAXED (bỏ yêu cầu bắt buộc)
-        completion_keywords = [
-            'hoàn thành', 'xong', 'done', 'completed', 'finished',
-            'làm xong', 'đã làm', 'đã hoàn thành', 'complete',
-            'fix xong', 'solved', 'resolved', 'implemented',
-            'đã', 'rồi', 'được', 'finish'
-        ]
+        matched_items = self._match_pending_checklist()
+        if matched_items:
+            matched_items.write({'is_done': True})
         
-        # Check if có từ khóa completion trong content
-        has_completion = any(kw in content_lower for kw in completion_keywords)
-        
-        # Các checklist items chưa done
-        pending_items = self.task_id.checklist_ids.filtered(lambda c: not c.is_done)
-        _logger.info(f'Pending checklist items: {len(pending_items)}')
-        
-        for item in pending_items:
-            item_name_lower = item.name.lower()
-            _logger.info(f'Checking item: "{item.name}"')
-            
-            # Method 1: SUPER RELAXED - Direct substring match (không cần completion keyword)
-            # VD: "Design UI" in "Tôi đang design UI"
-            if item_name_lower in content_lower or any(word in content_lower for word in item_name_lower.split() if len(word) > 3):
-                item.write({'is_done': True})
-                auto_ticked.append(item.name)
-                _logger.info(f'✓ Auto-ticked (relaxed match): {item.name}')
-                continue
-            
-            # Method 2: Fuzzy matching - Giảm threshold xuống 50%
-            item_words = item_name_lower.split()
-            max_similarity = 0
-            best_match = ''
-            
-            # Chia content thành các cụm 2-6 từ
-            words = content_lower.split()
-            for i in range(len(words)):
-                for window_size in [2, 3, 4, 5, 6]:
-                    if i + window_size > len(words):
-                        continue
-                    
-                    phrase = ' '.join(words[i:i+window_size])
-                    
-                    # Tính similarity
-                    similarity = SequenceMatcher(None, item_name_lower, phrase).ratio()
-                    if similarity > max_similarity:
-                        max_similarity = similarity
-                        best_match = phrase
-                    
-                    # Nếu match >50% (đã giảm từ 70%)
-                    if similarity > 0.5:
-                        item.write({'is_done': True})
-                        auto_ticked.append(item.name)
-                        _logger.info(f'✓ Auto-ticked (fuzzy {similarity:.0%}): {item.name} ~ "{phrase}"')
-                        break
-                if item.is_done:
-                    break
-            
-            if not item.is_done and max_similarity > 0:
-                _logger.info(f'  Best match: "{best_match}" (similarity: {max_similarity:.0%}) - Not enough')
-            
-            # Method 3: Keyword extraction - Tìm 1 từ khóa quan trọng là đủ
-            if not item.is_done:
-                important_words = [w for w in item_words if len(w) > 3]
-                if important_words:
-                    # Nếu tìm thấy BẤT KỲ từ quan trọng nào
-                    found_words = [w for w in important_words if w in content_lower]
-                    if found_words:
-                        item.write({'is_done': True})
-                        auto_ticked.append(item.name)
-                        _logger.info(f'✓ Auto-ticked (keyword match): {item.name} (found: {found_words})')
-        
-        _logger.info(f'=== AI AUTO-TICK RESULT: {len(auto_ticked)} items ticked ===')
-        return auto_ticked
+        _logger.info(f'AI auto-tick: {len(matched_items)} checklist items ticked for task {self.task_id.id}')
+        return matched_items.mapped('name')
 
     def _ai_auto_tick_checklist_preview(self):
         """
         Preview version - không lưu DB, chỉ return danh sách items sẽ được tick
         Dùng cho onchange
         """
+        return self._match_pending_checklist().mapped('name')
+
+    def _match_pending_checklist(self):
+        """Checklist items chưa xong khớp với nội dung báo cáo"""
         if not self.task_id.checklist_ids or not self.report_content:
-            return []
-        
-        from difflib import SequenceMatcher
-        
-        content_lower = self.report_content.lower()
-        will_tick = []
-        
-        completion_keywords = [
-            'hoàn thành', 'xong', 'done', 'completed', 'finished',
-            'làm xong', 'đã làm', 'đã hoàn thành', 'complete',
-            'fix xong', 'solved', 'resolved', 'implemented'
-        ]
+            return self.env['task.checklist']
         
         pending_items = self.task_id.checklist_ids.filtered(lambda c: not c.is_done)
-        
-        for item in pending_items:
-            item_name_lower = item.name.lower()
-            matched = False
-            
-            # Direct match
-            if item_name_lower in content_lower:
-                for keyword in completion_keywords:
-                    if keyword in content_lower:
-                        will_tick.append(item.name)
-                        matched = True
-                        break
-            
-            if matched:
-                continue
-            
-            # Fuzzy match
-            words = content_lower.split()
-            for i in range(len(words)):
-                for window_size in [3, 4, 5]:
-                    if i + window_size > len(words):
-                        continue
-                    phrase = ' '.join(words[i:i+window_size])
-                    similarity = SequenceMatcher(None, item_name_lower, phrase).ratio()
-                    
-                    if similarity > 0.7:
-                        for keyword in completion_keywords:
-                            if keyword in content_lower:
-                                will_tick.append(item.name)
-                                matched = True
-                                break
-                    if matched:
-                        break
-                if matched:
-                    break
-        
-        return will_tick
+        matcher = ChecklistMatcher((item, item.name) for item in pending_items)
+        return self.env['task.checklist'].union(*matcher.match(self.report_content))
 
     def _notify_manager_about_blocker(self):
-        """Gửi thông báo cho PM khi phát hiện vướng mắc"""
-        self.ensure_one()
-        
-        if not self.task_id.project_id.user_id:
-            return
-        
-        # Create activity for PM
-        self.env['mail.activity'].create({
-            'activity_type_id': self.env.ref('mail.mail_activity_data_todo').id,
-            'summary': f'Cảnh báo: Task bị vướng mắc',
-            'note': f'''
-                <p><strong>{self.user_id.name}</strong> báo cáo có khó khăn trong task 
-                <a href="/web#id={self.task_id.id}&model=project.task">{self.task_id.name}</a></p>
-                <p><em>"{self.report_content[:100]}..."</em></p>
-                <p>Từ khóa rủi ro: <strong>{self.risk_keywords}</strong></p>
-            ''',
-            'user_id': self.task_id.project_id.user_id.id,
-            'res_id': self.task_id.id,
-            'res_model_id': self.env.ref('project.model_project_task').id,
-        })
+        """Gửi thông báo cho PM khi phát hiện vướng mắc (một lần create cho cả recordset)"""
+        activity_type = self.env.ref('mail.mail_activity_data_todo')
+        # Task đã có cảnh báo đang mở cho PM thì không tạo thêm
+        open_warnings = set()
+        tasks = self.mapped('task_id')
+        if tasks:
+            for activity in self.env['mail.activity'].sudo().search([
+                ('res_model', '=', 'project.task'),
+                ('res_id', 'in', tasks.ids),
+                ('activity_type_id', '=', activity_type.id),
+                ('summary', '=', BLOCKER_ACTIVITY_SUMMARY),
+            ]):
+                open_warnings.add((activity.res_id, activity.user_id.id))
+        activity_vals = []
+        for report in self:
+            manager = report.task_id.project_id.user_id
+            if not manager or (report.task_id.id, manager.id) in open_warnings:
+                continue
+            open_warnings.add((report.task_id.id, manager.id))
+            
+            # Create activity for PM
+            activity_vals.append({
+                'activity_type_id': activity_type.id,
+                'summary': BLOCKER_ACTIVITY_SUMMARY,
+                'note': f'''
+                    <p><strong>{report.user_id.name}</strong> báo cáo có khó khăn trong task 
+                    <a href="/web#id={report.task_id.id}&model=project.task">{report.task_id.name}</a></p>
+                    <p><em>"{(report.report_content or '')[:100]}..."</em></p>
+                    <p>Từ khóa rủi ro: <strong>{report.risk_keywords}</strong></p>
+                ''',
+                'user_id': report.task_id.project_id.user_id.id,
+                'res_id': report.task_id.id,
+                'res_model_id': self.env.ref('project.model_project_task').id,
+            })
+        if activity_vals:
+            self.env['mail.activity'].create(activity_vals)
 
     def _post_to_chatter(self):
         """Đăng báo cáo lên Chatter của Task"""
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api
+from datetime import timedelta
+import logging
+import threading
+import time
+
+_logger = logging.getLogger(__name__)
+
+
+class TaskSmartReportJob(models.Model):
+    """
+    Hàng đợi xử lý sau khi gửi báo cáo (phân tích AI, auto-tick checklist,
+    blocker, thông báo, chatter).
+
+    Mỗi báo cáo có tối đa một job (UNIQUE report_id) nên enqueue nhiều lần là
+    idempotent. Cron lấy job bằng FOR UPDATE SKIP LOCKED, xử lý theo lô và đánh
+    dấu done trong cùng transaction với các thay đổi, nên một job không bị chạy 2 lần.
+    """
+    _name = 'task.smart.report.job'
+    _description = 'Hàng đợi Xử lý Báo cáo'
+    _order = 'id'
+    _rec_name = 'report_id'
+
+    MAX_ATTEMPTS = 5
+
+    report_id = fields.Many2one(
+        'task.smart.report',
+        string='Báo cáo',
+        required=True,
+        index=True,
+        ondelete='cascade'
+    )
+
+    state = fields.Selection([
+        ('pending', 'Chờ xử lý'),
+        ('done', 'Hoàn tất'),
+        ('failed', 'Thất bại'),
+    ], string='Trạng thái', default='pending', required=True, index=True)
+
+    attempts = fields.Integer(string='Số lần thử', default=0)
+
+    next_attempt = fields.Datetime(
+        string='Thử lại lúc',
+        default=fields.Datetime.now,
+        help='Job chỉ được xử lý sau thời điểm này (backoff khi lỗi)'
+    )
+
+    date_done = fields.Datetime(string='Hoàn tất lúc', readonly=True)
+
+    last_error = fields.Text(string='Lỗi gần nhất', readonly=True)
+
+    _sql_constraints = [
+        ('report_unique', 'UNIQUE(report_id)', 'Mỗi báo cáo chỉ có một job xử lý!'),
+    ]
+
+    @api.model
+    def _enqueue(self, reports):
+        """Đưa báo cáo vào hàng đợi (job đã xong/thất bại được đặt lại về pending)"""
+        if not reports:
+            return
+        self.env.cr.execute("""
+            INSERT INTO task_smart_report_job
+                   (report_id, state, attempts, next_attempt,
+                    create_uid, create_date, write_uid, write_date)
+            SELECT report_id, 'pending', 0, now() at time zone 'UTC',
+                   %(uid)s, now() at time zone 'UTC', %(uid)s, now() at time zone 'UTC'
+              FROM unnest(%(report_ids)s) AS report_id
+            ON CONFLICT (report_id) DO UPDATE
+               SET state = 'pending',
+                   attempts = 0,
+                   next_attempt = EXCLUDED.next_attempt,
+                   last_error = NULL,
+                   write_uid = EXCLUDED.write_uid,
+                   write_date = EXCLUDED.write_date
+             WHERE task_smart_report_job.state != 'pending'
+        """, {'uid': self.env.uid, 'report_ids': reports.ids})
+        self.invalidate_cache()
+
+        # Đánh thức cron ngay thay vì chờ chu kỳ tiếp theo
+        cron = self.env.ref('quan_ly_cong_viec.ir_cron_task_smart_report_jobs', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
+
+    @api.model
+    def _cron_process_jobs(self, batch_size=100, time_limit=240):
+        """Cron: xử lý các job đến hạn theo lô, commit sau mỗi lô"""
+        auto_commit = not getattr(threading.current_thread(), 'testing', False)
+        started = time.perf_counter()
+        processed = 0
+
+        while time.perf_counter() - started < time_limit:
+            self.env.cr.execute("""
+                SELECT id FROM task_smart_report_job
+                 WHERE state = 'pending'
+                   AND next_attempt <= now() at time zone 'UTC'
+                 ORDER BY id
+                 LIMIT %s
+                   FOR UPDATE SKIP LOCKED
+            """, [batch_size])
+            job_ids = [row[0] for row in self.env.cr.fetchall()]
+            if not job_ids:
+                break
+
+            self.browse(job_ids)._process_batch()
+            processed += len(job_ids)
+            if auto_commit:
+                self.env.cr.commit()
+
+        if processed:
+            elapsed = time.perf_counter() - started
+            _logger.info('Processed %d smart report jobs in %.1fs', processed, elapsed)
+        return processed
+
+    def _process_batch(self):
+        """
+        Chạy xử lý cho cả lô trong một savepoint. Nếu lô lỗi thì chạy lại từng job
+        riêng lẻ để chỉ job lỗi bị tính một lần thử.
+        """
+        try:
+            with self.env.cr.savepoint():
+                reports = self.mapped('report_id')
+                for user in reports.mapped('user_id'):
+                    # Xử lý với quyền/tên của người báo cáo như khi còn chạy đồng bộ
+                    reports.filtered(lambda r: r.user_id == user).with_user(user)._run_post_processing()
+                self.write({
+                    'state': 'done',
+                    'date_done': fields.Datetime.now(),
+                    'last_error': False,
+                })
+        except Exception as e:
+            self.env.clear()
+            if len(self) > 1:
+                for job in self:
+                    job._process_batch()
+                return
+            _logger.exception('Smart report job %s failed', self.id)
+            self._mark_failed(e)
+
+    def _mark_failed(self, error):
+        """Tăng số lần thử, hẹn giờ thử lại (backoff lũy thừa) hoặc đánh dấu thất bại"""
+        for job in self:
+            attempts = job.attempts + 1
+            job.write({
+                'attempts': attempts,
+                'state': 'failed' if attempts >= self.MAX_ATTEMPTS else 'pending',
+                'next_attempt': fields.Datetime.now() + timedelta(minutes=2 ** attempts),
+                'last_error': str(error),
+            })
+
+    def action_retry(self):
+        """Thử lại các job thất bại"""
+        self._enqueue(self.mapped('report_id'))
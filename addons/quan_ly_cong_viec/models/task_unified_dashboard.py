@@ -4,6 +4,32 @@ from odoo import models, fields, api, _
 import json
 from datetime import datetime, timedelta
 
+TREND_LABEL_FORMATS = {
+    'day': '%m/%d',
+    'week': '%G-W%V',
+    'month': '%m/%Y',
+}
+
+
+def _trend_buckets(start, end, granularity):
+    """Các mốc đầu bucket (giống date_trunc của PostgreSQL) từ start tới end"""
+    if granularity == 'week':
+        bucket = start - timedelta(days=start.weekday())
+    elif granularity == 'month':
+        bucket = start.replace(day=1)
+    else:
+        bucket = start
+    
+    while bucket <= end:
+        yield bucket
+        if granularity == 'week':
+            bucket += timedelta(days=7)
+        elif granularity == 'month':
+            bucket = (bucket.replace(day=28) + timedelta(days=4)).replace(day=1)
+        else:
+            bucket += timedelta(days=1)
+
+
 class TaskUnifiedDashboard(models.Model):
     _name = 'task.unified.dashboard'
     _description = 'Unified Task Dashboard'
@@ -18,134 +44,289 @@ class TaskUnifiedDashboard(models.Model):
     user_ids = fields.Many2many('res.users', string='Users')
     project_ids = fields.Many2many('project.project', string='Projects')
     
+    # Completion Trend
+    trend_days = fields.Selection([
+        ('7', 'Last 7 days'),
+        ('30', 'Last 30 days'),
+        ('365', 'Last 365 days'),
+    ], string='Trend Window', default='7', required=True)
+    trend_granularity = fields.Selection([
+        ('day', 'Day'),
+        ('week', 'Week'),
+        ('month', 'Month'),
+    ], string='Trend Granularity', default='day', required=True)
+    
     # KPI Cards
-    total_tasks = fields.Integer('Total Tasks', compute='_compute_kpis', store=False)
-    tasks_completed = fields.Integer('Completed Tasks', compute='_compute_kpis', store=False)
-    tasks_in_progress = fields.Integer('In Progress', compute='_compute_kpis', store=False)
-    tasks_overdue = fields.Integer('Overdue Tasks', compute='_compute_kpis', store=False)
+    total_tasks = fields.Integer('Total Tasks', compute='_compute_dashboard', store=False)
+    tasks_completed = fields.Integer('Completed Tasks', compute='_compute_dashboard', store=False)
+    tasks_in_progress = fields.Integer('In Progress', compute='_compute_dashboard', store=False)
+    tasks_overdue = fields.Integer('Overdue Tasks', compute='_compute_dashboard', store=False)
+    
+    completion_rate = fields.Float('Completion Rate (%)', compute='_compute_dashboard', store=False)
+    avg_completion_time = fields.Float('Avg Completion Time (days)', compute='_compute_dashboard', store=False)
+    avg_score = fields.Float('Average Score', compute='_compute_dashboard', store=False)
     
-    completion_rate = fields.Float('Completion Rate (%)', compute='_compute_kpis', store=False)
-    avg_completion_time = fields.Float('Avg Completion Time (days)', compute='_compute_kpis', store=False)
-    avg_score = fields.Float('Average Score', compute='_compute_kpis', store=False)
+    # Workload hiện tại (từ bộ đếm task.user.workload, không phụ thuộc khoảng ngày)
+    open_planned_hours = fields.Float('Open Planned Hours', compute='_compute_dashboard', store=False)
+    overloaded_users = fields.Integer('Overloaded Users', compute='_compute_dashboard', store=False)
     
     # Charts Data (JSON)
-    tasks_by_stage_chart = fields.Text('Tasks by Stage Chart', compute='_compute_charts', store=False)
-    tasks_by_priority_chart = fields.Text('Tasks by Priority Chart', compute='_compute_charts', store=False)
-    completion_trend_chart = fields.Text('Completion Trend Chart', compute='_compute_charts', store=False)
-    team_performance_chart = fields.Text('Team Performance Chart', compute='_compute_charts', store=False)
+    tasks_by_stage_chart = fields.Text('Tasks by Stage Chart', compute='_compute_dashboard', store=False)
+    tasks_by_priority_chart = fields.Text('Tasks by Priority Chart', compute='_compute_dashboard', store=False)
+    completion_trend_chart = fields.Text('Completion Trend Chart', compute='_compute_dashboard', store=False)
+    team_performance_chart = fields.Text('Team Performance Chart', compute='_compute_dashboard', store=False)
     
     # Top Performers
-    top_performers_data = fields.Text('Top Performers', compute='_compute_top_performers', store=False)
+    top_performers_data = fields.Text('Top Performers', compute='_compute_dashboard', store=False)
+    
+    PRIORITY_LABELS = {'0': 'Normal', '1': 'Low', '2': 'High', '3': 'Urgent'}
+    OVERLOAD_OPEN_TASKS = 3
     
-    @api.depends('date_from', 'date_to', 'user_ids', 'project_ids')
-    def _compute_kpis(self):
+    @api.depends('date_from', 'date_to', 'user_ids', 'project_ids', 'trend_days', 'trend_granularity')
+    def _compute_dashboard(self):
+        """Tính toàn bộ KPI/Chart từ một lần tổng hợp SQL duy nhất"""
         for record in self:
-            domain = record._get_base_domain()
-            
-            tasks = self.env['project.task'].search(domain)
-            
-            record.total_tasks = len(tasks)
-            record.tasks_completed = len(tasks.filtered(lambda t: t.stage_id.is_closed))
-            record.tasks_in_progress = len(tasks.filtered(lambda t: not t.stage_id.is_closed and not t.stage_id.fold))
+            data = record._get_dashboard_aggregates()
             
-            # Overdue tasks
-            today = fields.Date.today()
-            record.tasks_overdue = len(tasks.filtered(lambda t: t.date_deadline and t.date_deadline < today and not t.stage_id.is_closed))
+            record.total_tasks = data['total_tasks']
+            record.tasks_completed = data['tasks_completed']
+            record.tasks_in_progress = data['tasks_in_progress']
+            record.tasks_overdue = data['tasks_overdue']
+            record.completion_rate = data['completion_rate']
+            record.avg_completion_time = data['avg_completion_time']
+            record.avg_score = data['avg_score']
+            record.open_planned_hours, record.overloaded_users = record._get_workload_kpis()
             
-            # Completion rate
-            if record.total_tasks > 0:
-                record.completion_rate = (record.tasks_completed / record.total_tasks) * 100
-            else:
-                record.completion_rate = 0.0
+            record.tasks_by_stage_chart = json.dumps(data['tasks_by_stage'])
+            record.tasks_by_priority_chart = json.dumps(data['tasks_by_priority'])
+            record.team_performance_chart = json.dumps(data['team_performance'])
+            record.top_performers_data = json.dumps(data['top_performers'])
             
-            # Average completion time
-            completed_tasks = tasks.filtered(lambda t: t.stage_id.is_closed and t.date_deadline and t.create_date)
-            if completed_tasks:
-                total_days = 0
-                count = 0
-                for task in completed_tasks:
-                    if task.date_deadline and task.create_date:
-                        create_date = task.create_date.date()
-                        days = (task.date_deadline - create_date).days
-                        if days >= 0:
-                            total_days += days
-                            count += 1
-                record.avg_completion_time = total_days / count if count > 0 else 0
-            else:
-                record.avg_completion_time = 0.0
-            
-            # Average score (from task_score_card)
-            ScoreCard = self.env['task.score.card']
-            score_domain = [('task_id', 'in', tasks.ids)]
-            scores = ScoreCard.search(score_domain)
-            if scores:
-                record.avg_score = sum(scores.mapped('final_score')) / len(scores)
-            else:
-                record.avg_score = 0.0
+            # Completion Trend
+            trend_data = record._get_completion_trend_data(
+                days=int(record.trend_days or 7),
+                granularity=record.trend_granularity or 'day',
+            )
+            record.completion_trend_chart = json.dumps(trend_data)
     
-    @api.depends('date_from', 'date_to', 'user_ids', 'project_ids')
-    def _compute_charts(self):
-        for record in self:
-            domain = record._get_base_domain()
-            tasks = self.env['project.task'].search(domain)
-            
-            # Tasks by Stage
-            stages_data = {}
-            for task in tasks:
-                stage_name = task.stage_id.name if task.stage_id else 'No Stage'
-                stages_data[stage_name] = stages_data.get(stage_name, 0) + 1
-            
-            record.tasks_by_stage_chart = json.dumps({
+    def _get_workload_kpis(self):
+        """(tổng giờ dự kiến đang mở, số user có >= OVERLOAD_OPEN_TASKS task mở)"""
+        self.ensure_one()
+        params = [self.OVERLOAD_OPEN_TASKS]
+        where = ''
+        if self.user_ids:
+            where = 'WHERE user_id IN %s'
+            params.append(tuple(self.user_ids.ids))
+        self.env.cr.execute("""
+            SELECT COALESCE(SUM(open_planned_hours), 0),
+                   COUNT(*) FILTER (WHERE open_task_count >= %s)
+              FROM task_user_workload
+            {where}
+        """.format(where=where), params)
+        hours, overloaded = self.env.cr.fetchone()
+        return hours, overloaded
+    
+    def _get_task_base_query(self):
+        """
+        Build câu SELECT (id, seq) cho các task thuộc bộ lọc hiện tại.
+        Dùng chung domain, active_test và record rules như project.task.search(),
+        seq giữ đúng thứ tự _order của project.task.
+        """
+        Task = self.env['project.task']
+        Task.check_access_rights('read')
+        
+        query = Task._where_calc(self._get_base_domain())
+        Task._apply_ir_rules(query, 'read')
+        order_by = Task._generate_order_by(None, query).replace(' ORDER BY ', '', 1)
+        
+        return query.select(
+            '"project_task"."id" AS id',
+            'ROW_NUMBER() OVER (ORDER BY %s) AS seq' % (order_by or '"project_task"."id"'),
+        )
+    
+    def _get_dashboard_aggregates(self):
+        """
+        Tổng hợp KPI, stage, priority, team và top performers trong MỘT câu SQL.
+        Kết quả giống hệt _get_dashboard_aggregates_orm() (thứ tự label theo
+        lần xuất hiện đầu tiên của task trong _order).
+        """
+        self.ensure_one()
+        base_sql, base_params = self._get_task_base_query()
+        
+        query = """
+            WITH base AS ({base}),
+            tasks AS (
+                SELECT b.seq, t.id, t.priority, t.stage_id,
+                       t.date_deadline, t.create_date::date AS create_day,
+                       COALESCE(s.is_closed, FALSE) AS is_closed,
+                       COALESCE(s.fold, FALSE) AS fold
+                  FROM base b
+                  JOIN project_task t ON t.id = b.id
+             LEFT JOIN project_task_type s ON s.id = t.stage_id
+            ),
+            stages AS (
+                SELECT stage_id, MIN(seq) AS first_seq, COUNT(*) AS cnt
+                  FROM tasks
+              GROUP BY stage_id
+            ),
+            priorities AS (
+                SELECT priority, COUNT(*) AS cnt
+                  FROM tasks
+              GROUP BY priority
+            ),
+            members AS (
+                SELECT rel.user_id, MIN(t.seq) AS first_seq, COUNT(*) AS total,
+                       COUNT(*) FILTER (WHERE t.is_closed) AS completed
+                  FROM tasks t
+                  JOIN project_task_user_rel rel ON rel.task_id = t.id
+              GROUP BY rel.user_id
+            )
+            SELECT
+                (SELECT COUNT(*) FROM tasks),
+                (SELECT COUNT(*) FROM tasks WHERE is_closed),
+                (SELECT COUNT(*) FROM tasks WHERE NOT is_closed AND NOT fold),
+                (SELECT COUNT(*) FROM tasks WHERE NOT is_closed AND date_deadline < %s),
+                (SELECT COALESCE(SUM(date_deadline - create_day), 0) FROM tasks
+                  WHERE is_closed AND date_deadline >= create_day),
+                (SELECT COUNT(*) FROM tasks
+                  WHERE is_closed AND date_deadline >= create_day),
+                (SELECT COALESCE(SUM(sc.final_score), 0) FROM task_score_card sc
+                  JOIN tasks t ON t.id = sc.task_id),
+                (SELECT COUNT(*) FROM task_score_card sc
+                  JOIN tasks t ON t.id = sc.task_id),
+                (SELECT json_agg(json_build_array(stage_id, cnt) ORDER BY first_seq)
+                   FROM stages),
+                (SELECT json_agg(json_build_array(priority, cnt)) FROM priorities),
+                (SELECT json_agg(json_build_array(m.user_id, p.name, m.total, m.completed)
+                                 ORDER BY m.first_seq, p.name, u.login)
+                   FROM members m
+                   JOIN res_users u ON u.id = m.user_id
+                   JOIN res_partner p ON p.id = u.partner_id)
+        """.format(base=base_sql)
+        
+        self.env.cr.execute(query, base_params + [fields.Date.today()])
+        (total, completed, in_progress, overdue,
+         total_days, days_count, score_sum, score_count,
+         stage_rows, priority_rows, member_rows) = self.env.cr.fetchone()
+        
+        # Tasks by Stage - gộp theo tên (đã dịch) như bản ORM
+        stage_ids = [stage_id for stage_id, _count in stage_rows or [] if stage_id]
+        stage_names = {
+            stage.id: stage.name
+            for stage in self.env['project.task.type'].browse(stage_ids)
+        }
+        stages_data = {}
+        for stage_id, count in stage_rows or []:
+            stage_name = stage_names[stage_id] if stage_id else 'No Stage'
+            stages_data[stage_name] = stages_data.get(stage_name, 0) + count
+        
+        # Tasks by Priority
+        priority_data = {'Normal': 0, 'Low': 0, 'High': 0, 'Urgent': 0}
+        for priority, count in priority_rows or []:
+            priority_data[self.PRIORITY_LABELS.get(priority, 'Normal')] += count
+        
+        user_stats = [{
+            'name': name,
+            'total': total_count,
+            'completed': completed_count,
+        } for _user_id, name, total_count, completed_count in member_rows or []]
+        
+        return self._format_dashboard_aggregates(
+            total=total,
+            completed=completed,
+            in_progress=in_progress,
+            overdue=overdue,
+            avg_completion_time=total_days / days_count if days_count > 0 else 0,
+            avg_score=score_sum / score_count if score_count else 0.0,
+            stages_data=stages_data,
+            priority_data=priority_data,
+            user_stats=user_stats,
+        )
+    
+    def _get_dashboard_aggregates_orm(self):
+        """
+        Bản tham chiếu (ORM/Python) của _get_dashboard_aggregates().
+        Chỉ dùng để đối chiếu kết quả và benchmark (scripts/bench_dashboard.py).
+        """
+        self.ensure_one()
+        tasks = self.env['project.task'].search(self._get_base_domain())
+        
+        completed = len(tasks.filtered(lambda t: t.stage_id.is_closed))
+        in_progress = len(tasks.filtered(lambda t: not t.stage_id.is_closed and not t.stage_id.fold))
+        today = fields.Date.today()
+        overdue = len(tasks.filtered(lambda t: t.date_deadline and t.date_deadline < today and not t.stage_id.is_closed))
+        
+        total_days = 0
+        count = 0
+        for task in tasks.filtered(lambda t: t.stage_id.is_closed and t.date_deadline and t.create_date):
+            days = (task.date_deadline - task.create_date.date()).days
+            if days >= 0:
+                total_days += days
+                count += 1
+        
+        scores = self.env['task.score.card'].search([('task_id', 'in', tasks.ids)])
+        
+        stages_data = {}
+        priority_data = {'Normal': 0, 'Low': 0, 'High': 0, 'Urgent': 0}
+        user_stats = {}
+        for task in tasks:
+            stage_name = task.stage_id.name if task.stage_id else 'No Stage'
+            stages_data[stage_name] = stages_data.get(stage_name, 0) + 1
+            priority_data[self.PRIORITY_LABELS.get(task.priority, 'Normal')] += 1
+            for user in task.user_ids:
+                if user.id not in user_stats:
+                    user_stats[user.id] = {'name': user.name, 'total': 0, 'completed': 0}
+                user_stats[user.id]['total'] += 1
+                if task.stage_id.is_closed:
+                    user_stats[user.id]['completed'] += 1
+        
+        return self._format_dashboard_aggregates(
+            total=len(tasks),
+            completed=completed,
+            in_progress=in_progress,
+            overdue=overdue,
+            avg_completion_time=total_days / count if count > 0 else 0,
+            avg_score=sum(scores.mapped('final_score')) / len(scores) if scores else 0.0,
+            stages_data=stages_data,
+            priority_data=priority_data,
+            user_stats=list(user_stats.values()),
+        )
+    
+    def _format_dashboard_aggregates(self, total, completed, in_progress, overdue,
+                                     avg_completion_time, avg_score,
+                                     stages_data, priority_data, user_stats):
+        """Đưa số liệu tổng hợp về đúng format JSON mà dashboard đang dùng"""
+        # Sort by completed tasks (sorted() ổn định → giữ thứ tự xuất hiện khi bằng điểm)
+        top_performers = sorted(user_stats, key=lambda x: x['completed'], reverse=True)[:5]
+        
+        return {
+            'total_tasks': total,
+            'tasks_completed': completed,
+            'tasks_in_progress': in_progress,
+            'tasks_overdue': overdue,
+            'completion_rate': (completed / total) * 100 if total > 0 else 0.0,
+            'avg_completion_time': avg_completion_time,
+            'avg_score': avg_score,
+            'tasks_by_stage': {
                 'labels': list(stages_data.keys()),
                 'data': list(stages_data.values()),
                 'type': 'pie'
-            })
-            
-            # Tasks by Priority
-            priority_map = {'0': 'Normal', '1': 'Low', '2': 'High', '3': 'Urgent'}
-            priority_data = {'Normal': 0, 'Low': 0, 'High': 0, 'Urgent': 0}
-            for task in tasks:
-                priority_name = priority_map.get(task.priority, 'Normal')
-                priority_data[priority_name] += 1
-            
-            record.tasks_by_priority_chart = json.dumps({
+            },
+            'tasks_by_priority': {
                 'labels': list(priority_data.keys()),
                 'data': list(priority_data.values()),
                 'type': 'bar'
-            })
-            
-            # Completion Trend (last 7 days)
-            trend_data = record._get_completion_trend_data()
-            record.completion_trend_chart = json.dumps(trend_data)
-            
-            # Team Performance
-            team_data = record._get_team_performance_data()
-            record.team_performance_chart = json.dumps(team_data)
-    
-    @api.depends('date_from', 'date_to', 'user_ids', 'project_ids')
-    def _compute_top_performers(self):
-        for record in self:
-            domain = record._get_base_domain()
-            tasks = self.env['project.task'].search(domain)
-            
-            # Count completed tasks per user
-            user_stats = {}
-            for task in tasks:
-                for user in task.user_ids:
-                    if user.id not in user_stats:
-                        user_stats[user.id] = {
-                            'name': user.name,
-                            'total': 0,
-                            'completed': 0,
-                        }
-                    user_stats[user.id]['total'] += 1
-                    if task.stage_id.is_closed:
-                        user_stats[user.id]['completed'] += 1
-            
-            # Sort by completed tasks
-            sorted_users = sorted(user_stats.values(), key=lambda x: x['completed'], reverse=True)[:5]
-            
-            record.top_performers_data = json.dumps(sorted_users)
+            },
+            'team_performance': {
+                'labels': [stat['name'] for stat in user_stats],
+                'datasets': [
+                    {'label': 'Completed', 'data': [stat['completed'] for stat in user_stats]},
+                    {'label': 'In Progress', 'data': [stat['total'] - stat['completed'] for stat in user_stats]},
+                ],
+                'type': 'bar'
+            },
+            'top_performers': [dict(stat) for stat in top_performers],
+        }
     
     def _get_base_domain(self):
         """Get base domain for filtering tasks"""
@@ -162,29 +343,46 @@ class TaskUnifiedDashboard(models.Model):
         
         return domain
     
-    def _get_completion_trend_data(self):
-        """Get completion trend for last 7 days"""
+    def _get_completion_trend_data(self, days=7, granularity='day'):
+        """
+        Completion trend cho `days` ngày gần nhất, gom theo day/week/month.
+        Dựa trên date_completed (thời điểm task vào stage đóng) nên các lần
+        sửa task sau khi hoàn thành không làm task nhảy sang bucket khác.
+        Chỉ chạy 1 câu SQL GROUP BY date_trunc.
+        """
+        if granularity not in TREND_LABEL_FORMATS:
+            raise ValueError("Invalid granularity: %s" % granularity)
+        
+        today = fields.Date.today()
+        start = today - timedelta(days=days - 1)
+        
+        domain = [
+            ('date_completed', '>=', datetime.combine(start, datetime.min.time())),
+            ('date_completed', '<', datetime.combine(today + timedelta(days=1), datetime.min.time())),
+        ]
+        if self.user_ids:
+            domain.append(('user_ids', 'in', self.user_ids.ids))
+        if self.project_ids:
+            domain.append(('project_id', 'in', self.project_ids.ids))
+        
+        Task = self.env['project.task']
+        Task.check_access_rights('read')
+        query = Task._where_calc(domain)
+        Task._apply_ir_rules(query, 'read')
+        sub_sql, sub_params = query.select(
+            """date_trunc('%s', "project_task"."date_completed")::date AS bucket""" % granularity
+        )
+        self.env.cr.execute(
+            "SELECT bucket, COUNT(*) FROM (%s) sub GROUP BY bucket" % sub_sql,
+            sub_params
+        )
+        counts = dict(self.env.cr.fetchall())
+        
         trend_labels = []
         trend_data = []
-        
-        for i in range(6, -1, -1):
-            date = fields.Date.today() - timedelta(days=i)
-            trend_labels.append(date.strftime('%m/%d'))
-            
-            # Count tasks completed on this date
-            domain = [
-                ('stage_id.is_closed', '=', True),
-                ('write_date', '>=', datetime.combine(date, datetime.min.time())),
-                ('write_date', '<=', datetime.combine(date, datetime.max.time())),
-            ]
-            
-            if self.user_ids:
-                domain.append(('user_ids', 'in', self.user_ids.ids))
-            if self.project_ids:
-                domain.append(('project_id', 'in', self.project_ids.ids))
-            
-            count = self.env['project.task'].search_count(domain)
-            trend_data.append(count)
+        for bucket in _trend_buckets(start, today, granularity):
+            trend_labels.append(bucket.strftime(TREND_LABEL_FORMATS[granularity]))
+            trend_data.append(counts.get(bucket, 0))
         
         return {
             'labels': trend_labels,
@@ -192,47 +390,11 @@ class TaskUnifiedDashboard(models.Model):
             'type': 'line'
         }
     
-    def _get_team_performance_data(self):
-        """Get team performance comparison"""
-        domain = self._get_base_domain()
-        tasks = self.env['project.task'].search(domain)
-        
-        team_stats = {}
-        for task in tasks:
-            for user in task.user_ids:
-                if user.id not in team_stats:
-                    team_stats[user.id] = {
-                        'name': user.name,
-                        'completed': 0,
-                        'in_progress': 0,
-                    }
-                
-                if task.stage_id.is_closed:
-                    team_stats[user.id]['completed'] += 1
-                else:
-                    team_stats[user.id]['in_progress'] += 1
-        
-        # Prepare chart data
-        labels = [stat['name'] for stat in team_stats.values()]
-        completed = [stat['completed'] for stat in team_stats.values()]
-        in_progress = [stat['in_progress'] for stat in team_stats.values()]
-        
-        return {
-            'labels': labels,
-            'datasets': [
-                {'label': 'Completed', 'data': completed},
-                {'label': 'In Progress', 'data': in_progress},
-            ],
-            'type': 'bar'
-        }
-    
     def action_refresh_dashboard(self):
         """Refresh dashboard data"""
         self.ensure_one()
         # Recompute all computed fields
-        self._compute_kpis()
-        self._compute_charts()
-        self._compute_top_performers()
+        self._compute_dashboard()
         
         return {
             'type': 'ir.actions.client',
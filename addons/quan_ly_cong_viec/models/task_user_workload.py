@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, tools
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Field của project.task làm thay đổi bộ đếm workload
+WORKLOAD_FIELDS = {'stage_id', 'user_ids', 'active', 'planned_hours'}
+
+
+class TaskUserWorkload(models.Model):
+    """
+    Bộ đếm task đang mở theo người dùng (task active, stage chưa fold).
+
+    Bảng được cập nhật tăng dần khi task đổi stage / người giao / planned_hours /
+    active và khi stage đổi fold, nên kiểm tra workload chỉ là một lookup theo user_id.
+    """
+    _name = 'task.user.workload'
+    _description = 'Workload theo Người dùng'
+    _auto = False
+    _rec_name = 'user_id'
+    _order = 'open_task_count desc'
+
+    user_id = fields.Many2one('res.users', string='Người dùng', readonly=True)
+    open_task_count = fields.Integer('# Task đang mở', readonly=True)
+    open_planned_hours = fields.Float('Giờ dự kiến đang mở', readonly=True)
+
+    _WORKLOAD_SELECT = """
+        SELECT r.user_id,
+               COUNT(*) AS open_task_count,
+               COALESCE(SUM(t.planned_hours), 0) AS open_planned_hours
+          FROM project_task_user_rel r
+          JOIN project_task t ON t.id = r.task_id
+          LEFT JOIN project_task_type s ON s.id = t.stage_id
+         WHERE t.active
+           AND NOT COALESCE(s.fold, FALSE)
+           {where}
+         GROUP BY r.user_id
+    """
+
+    def init(self):
+        cr = self.env.cr
+        if tools.table_exists(cr, self._table):
+            return
+
+        cr.execute("""
+            CREATE TABLE task_user_workload (
+                id SERIAL PRIMARY KEY,
+                user_id INTEGER NOT NULL,
+                open_task_count INTEGER NOT NULL DEFAULT 0,
+                open_planned_hours DOUBLE PRECISION NOT NULL DEFAULT 0
+            )
+        """)
+        cr.execute("CREATE UNIQUE INDEX task_user_workload_user_uniq ON task_user_workload (user_id)")
+
+        self._refresh_workload()
+
+    @api.model
+    def _refresh_workload(self, user_ids=None):
+        """
+        Tính lại bộ đếm cho `user_ids` (None = toàn bộ) bằng một câu SQL
+        (DELETE user không còn task mở + UPSERT giá trị mới).
+        """
+        params = []
+        if user_ids is None:
+            where = ''
+            scope = 'TRUE'
+        else:
+            user_ids = tuple(uid for uid in user_ids if uid)
+            if not user_ids:
+                return
+            where = 'AND r.user_id IN %s'
+            scope = 'w.user_id IN %s'
+            params = [user_ids, user_ids]
+
+        self.env['project.task'].flush(list(WORKLOAD_FIELDS))
+        self.env['project.task.type'].flush(['fold'])
+
+        self.env.cr.execute("""
+            WITH fresh AS ({select}),
+            stale AS (
+                DELETE FROM task_user_workload w
+                 WHERE {scope}
+                   AND NOT EXISTS (SELECT 1 FROM fresh f WHERE f.user_id = w.user_id)
+            )
+            INSERT INTO task_user_workload (user_id, open_task_count, open_planned_hours)
+            SELECT user_id, open_task_count, open_planned_hours FROM fresh
+            ON CONFLICT (user_id) DO UPDATE
+               SET open_task_count = EXCLUDED.open_task_count,
+                   open_planned_hours = EXCLUDED.open_planned_hours
+             WHERE task_user_workload.open_task_count IS DISTINCT FROM EXCLUDED.open_task_count
+                OR task_user_workload.open_planned_hours IS DISTINCT FROM EXCLUDED.open_planned_hours
+        """.format(
+            select=self._WORKLOAD_SELECT.format(where=where),
+            scope=scope,
+        ), params)
+
+        self.invalidate_cache()
+
+    @api.model
+    def _get_counters(self, users):
+        """{user_id: (số task đang mở, tổng giờ dự kiến)} — user không có task mở → (0, 0.0)"""
+        counters = {user_id: (0, 0.0) for user_id in users.ids}
+        if counters:
+            self.env.cr.execute("""
+                SELECT user_id, open_task_count, open_planned_hours
+                  FROM task_user_workload
+                 WHERE user_id IN %s
+            """, [tuple(counters)])
+            for user_id, count, hours in self.env.cr.fetchall():
+                counters[user_id] = (count, hours)
+        return counters
+
+    @api.model
+    def _cron_rebuild_workload(self):
+        """Cron: dựng lại toàn bộ bộ đếm (sửa sai lệch nếu có ghi SQL trực tiếp)"""
+        _logger.info('Rebuilding task user workload counters')
+        self._refresh_workload()
+
+
+class ProjectTaskTypeWorkload(models.Model):
+    _inherit = 'project.task.type'
+
+    def write(self, vals):
+        res = super().write(vals)
+        if 'fold' in vals:
+            # Stage đóng/mở lại → workload của mọi người có task ở stage này thay đổi
+            tasks = self.env['project.task'].sudo().search([('stage_id', 'in', self.ids)])
+            self.env['task.user.workload']._refresh_workload(tasks.mapped('user_ids').ids)
+        return res
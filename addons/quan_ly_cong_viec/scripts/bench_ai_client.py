@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+bench_ai_client.py
+Chạy ChatClient (models/ai_http_client.py) với stub server cục bộ, không cần Odoo:
+  - Kịch bản 1: độ trễ + tỷ lệ 429/500 → đo throughput, retry, latency, token
+  - Kịch bản 2: server lỗi toàn bộ → circuit breaker ngắt mạch, lời gọi bị từ chối ngay
+
+Usage:
+  python3 bench_ai_client.py --calls 200 --threads 16 --rpm 1200 --rate-429 0.2
+"""
+from __future__ import print_function
+import argparse
+import importlib.util
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from stub_openai_server import StubConfig, start_server
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_client_module():
+    """Import models/ai_http_client.py theo đường dẫn (không qua package Odoo)"""
+    path = os.path.join(HERE, '..', 'models', 'ai_http_client.py')
+    spec = importlib.util.spec_from_file_location('ai_http_client', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def run(client_module, client, calls, threads):
+    payload = {'model': 'stub', 'messages': [{'role': 'user', 'content': 'ping ' * 20}]}
+    errors = {}
+
+    def one(_):
+        try:
+            client.chat('stub-key', payload)
+        except client_module.AIClientError as e:
+            key = type(e).__name__ + (':%s' % e.status if e.status else '')
+            errors[key] = errors.get(key, 0) + 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(one, range(calls)))
+    elapsed = time.perf_counter() - started
+    return elapsed, errors
+
+
+def report(title, elapsed, calls, errors, client, stub):
+    metrics = client.metrics.snapshot()
+    print('== %s ==' % title)
+    print('  %d calls in %.2fs (%.1f calls/s)' % (calls, elapsed, calls / elapsed if elapsed else 0))
+    print('  metrics: %s' % ', '.join('%s=%s' % (k, round(v, 1)) for k, v in metrics.items()))
+    print('  errors : %s' % (errors or '-'))
+    print('  breaker: %s' % client.breaker.state)
+    print('  stub   : %s' % stub.counts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark ChatClient against a stub server')
+    parser.add_argument('--calls', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--rpm', type=int, default=1200, help='requests_per_minute of the client')
+    parser.add_argument('--concurrency', type=int, default=8, help='max concurrent requests of the client')
+    parser.add_argument('--latency-min', type=float, default=0.02)
+    parser.add_argument('--latency-max', type=float, default=0.1)
+    parser.add_argument('--rate-429', type=float, default=0.2)
+    parser.add_argument('--rate-500', type=float, default=0.05)
+    args = parser.parse_args()
+
+    client_module = load_client_module()
+
+    # Kịch bản 1: độ trễ + 429/500
+    stub = StubConfig(args.latency_min, args.latency_max, args.rate_429, args.rate_500)
+    server, base_url = start_server(stub)
+    client = client_module.ChatClient(
+        base_url, requests_per_minute=args.rpm, max_concurrency=args.concurrency,
+        timeout=5.0, max_retries=4, backoff_base=0.05, backoff_max=0.5,
+    )
+    elapsed, errors = run(client_module, client, args.calls, args.threads)
+    report('latency + 429/500', elapsed, args.calls, errors, client, stub)
+    server.shutdown()
+
+    # Kịch bản 2: server hỏng → circuit breaker
+    stub = StubConfig(0.0, 0.01, fail_all=True)
+    server, base_url = start_server(stub)
+    client = client_module.ChatClient(
+        base_url, requests_per_minute=6000, max_concurrency=4, timeout=5.0,
+        max_retries=1, backoff_base=0.01, backoff_max=0.05,
+        failure_threshold=5, reset_timeout=60.0,
+    )
+    elapsed, errors = run(client_module, client, 50, 4)
+    report('server down (circuit breaker)', elapsed, 50, errors, client, stub)
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
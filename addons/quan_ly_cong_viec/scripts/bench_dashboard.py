@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+bench_dashboard.py
+So sánh 2 đường tính KPI của task.unified.dashboard:
+  - SQL : _get_dashboard_aggregates()      (1 câu SQL gom nhóm)
+  - ORM : _get_dashboard_aggregates_orm()  (search + vòng lặp Python, bản cũ)
+
+Dữ liệu giả (task, assignee, score card) được sinh bằng SQL trong một transaction
+và ROLLBACK khi kết thúc, không để lại gì trong database.
+
+Usage:
+  python3 bench_dashboard.py -c /etc/odoo/odoo.conf -d <database>
+  python3 bench_dashboard.py -c odoo.conf -d db --sizes 10000 100000 1000000 --skip-orm-above 100000
+"""
+from __future__ import print_function
+import sys
+import time
+import argparse
+from datetime import timedelta
+
+try:
+    import odoo
+    from odoo import api, fields, SUPERUSER_ID
+except Exception:
+    print("ERROR: Không import được odoo. Chạy script bằng python của môi trường Odoo.", file=sys.stderr)
+    raise
+
+
+def ensure_stages(env, project):
+    """Tạo 4 stage chuẩn cho project benchmark"""
+    Stage = env['project.task.type']
+    stages = Stage
+    for seq, (name, fold, closed) in enumerate([
+        ('Bench New', False, False),
+        ('Bench In Progress', False, False),
+        ('Bench Review', True, False),
+        ('Bench Done', True, True),
+    ]):
+        stages |= Stage.create({
+            'name': name,
+            'sequence': seq,
+            'fold': fold,
+            'is_closed': closed,
+            'project_ids': [(4, project.id)],
+        })
+    return stages
+
+
+def seed_tasks(env, project, stages, size):
+    """Sinh `size` task bằng INSERT ... SELECT generate_series"""
+    cr = env.cr
+    user_ids = env['res.users'].search([('share', '=', False)], limit=20).ids
+    params = {
+        'size': size,
+        'project': project.id,
+        'company': project.company_id.id or env.company.id,
+        'stages': stages.ids,
+        'n_stages': len(stages),
+        'users': user_ids,
+        'n_users': len(user_ids),
+    }
+
+    cr.execute("""
+        INSERT INTO project_task (name, active, project_id, company_id, stage_id, priority,
+                                  sequence, kanban_state, date_deadline,
+                                  create_date, write_date, create_uid, write_uid)
+        SELECT 'Bench task ' || g, TRUE, %(project)s, %(company)s,
+               (%(stages)s)[1 + g %% %(n_stages)s], (g %% 2)::varchar, g %% 10, 'normal',
+               (now() - (g %% 28) * INTERVAL '1 day' + (g %% 15 - 5) * INTERVAL '1 day')::date,
+               now() - (g %% 28) * INTERVAL '1 day', now(), 1, 1
+          FROM generate_series(1, %(size)s) g
+    """, params)
+
+    cr.execute("""
+        INSERT INTO project_task_user_rel (task_id, user_id)
+        SELECT t.id, (%(users)s)[1 + t.id %% %(n_users)s]
+          FROM project_task t WHERE t.project_id = %(project)s
+        UNION
+        SELECT t.id, (%(users)s)[1 + (t.id + 1) %% %(n_users)s]
+          FROM project_task t WHERE t.project_id = %(project)s AND t.id %% 3 = 0
+    """, params)
+
+    cr.execute("""
+        INSERT INTO task_score_card (task_id, project_id, timeliness_score, efficiency_score,
+                                     quality_score, final_score, grade,
+                                     create_date, write_date, create_uid, write_uid)
+        SELECT t.id, t.project_id, 100, 70 + t.id %% 31, 100,
+               40 + 0.3 * (70 + t.id %% 31) + 30, 'A', now(), now(), 1, 1
+          FROM project_task t
+          JOIN project_task_type s ON s.id = t.stage_id
+         WHERE t.project_id = %(project)s AND s.is_closed
+    """, params)
+
+    env['project.task'].invalidate_cache()
+
+
+def results_match(left, right):
+    for key in left:
+        if isinstance(left[key], float) or isinstance(right[key], float):
+            if abs(left[key] - right[key]) > 1e-6:
+                return False
+        elif left[key] != right[key]:
+            return False
+    return True
+
+
+def timed(env, func):
+    env['project.task'].invalidate_cache()
+    start = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def run(env, sizes, skip_orm_above):
+    today = fields.Date.today()
+    print('%10s | %12s | %12s | %8s | %s' % ('tasks', 'SQL (ms)', 'ORM (ms)', 'speedup', 'match'))
+    print('-' * 62)
+    for size in sizes:
+        env.cr.execute('SAVEPOINT bench_dashboard')
+        project = env['project.project'].create({'name': 'Bench Dashboard %d' % size})
+        stages = ensure_stages(env, project)
+        seed_tasks(env, project, stages, size)
+
+        dashboard = env['task.unified.dashboard'].new({
+            'date_from': today - timedelta(days=30),
+            'date_to': today,
+            'project_ids': [(6, 0, [project.id])],
+        })
+
+        sql_result, sql_ms = timed(env, dashboard._get_dashboard_aggregates)
+        if skip_orm_above and size > skip_orm_above:
+            print('%10d | %12.1f | %12s | %8s | %s' % (size, sql_ms, 'skipped', '-', '-'))
+        else:
+            orm_result, orm_ms = timed(env, dashboard._get_dashboard_aggregates_orm)
+            print('%10d | %12.1f | %12.1f | %7.1fx | %s' % (
+                size, sql_ms, orm_ms, orm_ms / sql_ms if sql_ms else 0,
+                'OK' if results_match(sql_result, orm_result) else 'MISMATCH',
+            ))
+        env.cr.execute('ROLLBACK TO SAVEPOINT bench_dashboard')
+        env.clear()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark task.unified.dashboard: SQL vs ORM')
+    parser.add_argument('-c', '--config', required=True, help='File cấu hình Odoo')
+    parser.add_argument('-d', '--database', required=True, help='Database đã cài quan_ly_cong_viec')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--skip-orm-above', type=int, default=0,
+                        help='Bỏ qua đường ORM khi số task lớn hơn giá trị này (0 = luôn chạy)')
+    args = parser.parse_args()
+
+    odoo.tools.config.parse_config(['-c', args.config, '-d', args.database])
+    registry = odoo.registry(args.database)
+    with registry.cursor() as cr:
+        env = api.Environment(cr, SUPERUSER_ID, {})
+        try:
+            run(env, args.sizes, args.skip_orm_above)
+        finally:
+            cr.rollback()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+bench_git_log_reader.py
+Đo LocalGitReader (models/git_local_reader.py) trên repository tổng hợp, không cần Odoo:
+  - Tạo repository N commit bằng `git fast-import` (mỗi commit sửa vài file)
+  - Đọc toàn bộ lịch sử qua `git log --numstat` dạng stream: thời gian, commit/giây,
+    bộ nhớ cao nhất của process (max RSS)
+  - Đọc tiếp từ sha cuối sau khi thêm commit mới (chỉ đọc phần mới)
+
+Usage:
+  python3 bench_git_log_reader.py --commits 100000
+  python3 bench_git_log_reader.py --repo /path/to/clone   # repository có sẵn
+"""
+from __future__ import print_function
+import argparse
+import importlib
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import types
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_reader_module():
+    """Import models/git_local_reader.py (và git_sync_client.py) không qua package Odoo"""
+    package = types.ModuleType('git_models')
+    package.__path__ = [os.path.join(HERE, '..', 'models')]
+    sys.modules['git_models'] = package
+    return importlib.import_module('git_models.git_local_reader')
+
+
+def fast_import(path, start, count, files=50):
+    """Thêm `count` commit vào branch main bằng git fast-import"""
+    lines = []
+    for i in range(start, start + count):
+        message = 'TASK-%d: update module %d\n\nChi tiết thay đổi %d\n' % (i % 500, i % files, i)
+        data = ('line %d\n' % i) * (1 + i % 7)
+        lines.append('commit refs/heads/main\n')
+        lines.append('committer Dev %d <dev%d@example.com> %d +0700\n' % (i % 20, i % 20, 1700000000 + i * 60))
+        lines.append('data %d\n%s\n' % (len(message.encode('utf-8')), message))
+        if i == start and start > 0:
+            lines.append('from refs/heads/main^0\n')
+        for f in (i % files, (i * 7) % files):
+            lines.append('M 644 inline src/file_%d.py\ndata %d\n%s\n' % (f, len(data), data))
+    subprocess.run(['git', '-C', path, 'fast-import', '--quiet'], input=''.join(lines).encode('utf-8'), check=True)
+
+
+def read_all(reader, since_sha=None):
+    started = time.perf_counter()
+    count = files = additions = 0
+    last_sha = None
+    for commit in reader.iter_commits(since_sha=since_sha):
+        count += 1
+        files += commit['files_changed']
+        additions += commit['additions']
+        last_sha = commit['sha']
+    elapsed = time.perf_counter() - started
+    # ru_maxrss tính bằng KB trên Linux
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return count, files, additions, last_sha, elapsed, peak
+
+
+def report(title, count, files, additions, elapsed, peak):
+    print('== %s ==' % title)
+    print('  %d commits, %d file changes, +%d lines' % (count, files, additions))
+    print('  %.2fs (%.0f commits/s), max RSS %.1f MB' % (
+        elapsed, count / elapsed if elapsed else 0, peak / 1e6))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the streaming git log reader')
+    parser.add_argument('--commits', type=int, default=100000)
+    parser.add_argument('--repo', help='existing repository (skip synthetic repository creation)')
+    args = parser.parse_args()
+
+    module = load_reader_module()
+    tmp = None
+    path = args.repo
+    if not path:
+        tmp = tempfile.TemporaryDirectory()
+        path = tmp.name
+        subprocess.run(['git', 'init', '--quiet', '--initial-branch=main', path], check=True)
+        started = time.perf_counter()
+        fast_import(path, 0, args.commits)
+        subprocess.run(['git', '-C', path, 'symbolic-ref', 'HEAD', 'refs/heads/main'], check=True)
+        print('created %d commits in %.2fs' % (args.commits, time.perf_counter() - started))
+
+    reader = module.LocalGitReader(path)
+    count, files, additions, last_sha, elapsed, peak = read_all(reader)
+    report('full history', count, files, additions, elapsed, peak)
+
+    if tmp:
+        fast_import(path, args.commits, 100)
+        count, files, additions, _sha, elapsed, peak = read_all(reader, since_sha=last_sha)
+        report('resume from last sha (+100 commits)', count, files, additions, elapsed, peak)
+        tmp.cleanup()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+bench_search_index.py
+Đo task.search.index.search_task_ids (to_tsquery tiền tố ':*' + ts_rank_cd) trên
+N task giả, mục tiêu < 50 ms mỗi truy vấn ở 500k task:
+  - AND : mọi từ đều khớp (đường thường gặp)
+  - OR  : không task nào khớp đủ mọi từ → truy vấn thứ hai khớp bất kỳ từ nào
+          và sắp theo ts_rank_cd trên toàn bộ tập khớp (đường chậm nhất)
+  - 1 từ tiền tố ngắn: 'ap' → 'ap:*' khớp rất nhiều tài liệu
+
+Task và tài liệu chỉ mục được sinh bằng SQL trong một transaction và ROLLBACK khi
+kết thúc, không để lại gì trong database.
+
+Usage:
+  python3 bench_search_index.py -c /etc/odoo/odoo.conf -d <database>
+  python3 bench_search_index.py -c odoo.conf -d db --sizes 100000 500000 --repeat 20
+"""
+from __future__ import print_function
+import sys
+import time
+import argparse
+
+try:
+    import odoo
+    from odoo import api, SUPERUSER_ID
+except Exception:
+    print("ERROR: Không import được odoo. Chạy script bằng python của môi trường Odoo.", file=sys.stderr)
+    raise
+
+# Từ vựng đã bỏ dấu (như fold_text), phân bố lệch: từ đầu danh sách xuất hiện nhiều hơn
+VOCABULARY = [
+    'hoan', 'thanh', 'api', 'loi', 'dang', 'nhap', 'bao', 'cao', 'khach', 'hang', 'toan',
+    'don', 'giao', 'dien', 'kiem', 'thu', 'hieu', 'nang', 'du', 'lieu', 'dong', 'bo', 'email',
+    'thong', 'quyen', 'truy', 'cap', 'xuat', 'excel', 'tim', 'cache', 'cron',
+    'webhook', 'github', 'jira', 'migration', 'postgres', 'index', 'invoice', 'payment', 'mobile',
+    'login', 'session', 'upload', 'report', 'dashboard', 'schedule', 'backup', 'restore',
+]
+
+QUERIES = [
+    ('AND', 'loi dang nhap'),
+    ('AND', 'bao cao thanh toan'),
+    ('AND', 'Đồng bộ dữ liệu'),
+    ('OR', 'webhook restore zzzkhongco'),
+    ('OR', 'invoice mobile backup qqqkhongco'),
+    ('prefix', 'ap'),
+]
+
+
+def seed(env, size):
+    """Sinh `size` task + dòng task_search_index (tên / mô tả ghép từ VOCABULARY)"""
+    cr = env.cr
+    project = env['project.project'].create({'name': 'Bench Search %d' % size})
+    params = {'size': size, 'project': project.id, 'vocab': VOCABULARY, 'n': len(VOCABULARY)}
+    cr.execute("""
+        INSERT INTO project_task (name, active, project_id, company_id, sequence, kanban_state,
+                                  create_date, write_date, create_uid, write_uid)
+        SELECT 'Bench search ' || g, TRUE, %(project)s, %(company)s, 10, 'normal', now(), now(), 1, 1
+          FROM generate_series(1, %(size)s) g
+    """, dict(params, company=project.company_id.id or env.company.id))
+    # Tên: 3 từ, mô tả: 12 từ; chỉ số từ = bình phương của số ngẫu nhiên → lệch về đầu
+    cr.execute("""
+        INSERT INTO task_search_index (id, task_id, document)
+        SELECT t.id, t.id,
+               setweight(to_tsvector('simple', w.name), 'A') ||
+               setweight(to_tsvector('simple', w.description), 'C')
+          FROM project_task t
+         CROSS JOIN LATERAL (
+               SELECT string_agg(%(vocab)s[1 + floor(power(random(), 2) * %(n)s)::int], ' ')
+                          FILTER (WHERE i <= 3) AS name,
+                      string_agg(%(vocab)s[1 + floor(power(random(), 2) * %(n)s)::int], ' ')
+                          FILTER (WHERE i > 3) AS description
+                 FROM generate_series(1, 15) i
+                WHERE t.id IS NOT NULL  -- tham chiếu t: random() được tính lại cho từng task
+               ) w
+         WHERE t.project_id = %(project)s
+        ON CONFLICT (id) DO UPDATE SET document = EXCLUDED.document
+    """, params)
+    cr.execute('ANALYZE task_search_index')
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))]
+
+
+def run(env, sizes, repeat):
+    Index = env['task.search.index']
+    print('%9s | %-6s | %-34s | %6s | %8s | %8s | %8s' % ('tasks', 'kind', 'query', 'hits', 'p50 ms', 'p95 ms', 'max ms'))
+    print('-' * 98)
+    for size in sizes:
+        env.cr.execute('SAVEPOINT bench_search')
+        seed(env, size)
+        for kind, query in QUERIES:
+            Index.search_task_ids(query)  # làm nóng cache của PostgreSQL
+            timings = []
+            for _i in range(repeat):
+                start = time.perf_counter()
+                hits = Index.search_task_ids(query, limit=20)
+                timings.append((time.perf_counter() - start) * 1000)
+            print('%9d | %-6s | %-34s | %6d | %8.1f | %8.1f | %8.1f' % (
+                size, kind, query, len(hits), percentile(timings, 50), percentile(timings, 95), max(timings)))
+        env.cr.execute('ROLLBACK TO SAVEPOINT bench_search')
+        env.clear()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark task.search.index.search_task_ids')
+    parser.add_argument('-c', '--config', required=True, help='File cấu hình Odoo')
+    parser.add_argument('-d', '--database', required=True, help='Database đã cài quan_ly_cong_viec')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100000, 500000])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    odoo.tools.config.parse_config(['-c', args.config, '-d', args.database])
+    registry = odoo.registry(args.database)
+    with registry.cursor() as cr:
+        env = api.Environment(cr, SUPERUSER_ID, {})
+        try:
+            run(env, args.sizes, args.repeat)
+        finally:
+            cr.rollback()
+
+
+if __name__ == '__main__':
+    main()
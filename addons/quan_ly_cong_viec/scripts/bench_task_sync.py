@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+bench_task_sync.py
+Đo ExternalTaskClient (models/external_task_client.py) với stub_task_api_server.py, không cần Odoo:
+  - Tuần tự từng item (như sync_tasks cũ): đo trên --sample item rồi ngoại suy
+  - Từng item qua thread pool (bulk=False)
+  - Hàng loạt: Jira JQL search, GitHub GraphQL (song song theo batch)
+  - Lần sync thứ hai: số issue bỏ qua vì thời điểm cập nhật không đổi
+
+Usage:
+  python3 bench_task_sync.py --issues 5000 --workers 8 --latency-min 0.05 --latency-max 0.15
+"""
+from __future__ import print_function
+import argparse
+import importlib
+import os
+import sys
+import time
+import types
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+import stub_task_api_server  # noqa: E402
+
+
+def load_client_module():
+    """Import models/external_task_client.py (và git_sync_client.py) không qua package Odoo"""
+    package = types.ModuleType('task_models')
+    package.__path__ = [os.path.join(HERE, '..', 'models')]
+    sys.modules['task_models'] = package
+    return importlib.import_module('task_models.external_task_client')
+
+
+def run(module, api_type, base_url, refs, workers, bulk):
+    client = module.ExternalTaskClient(api_type, base_url, {}, max_workers=workers, bulk=bulk)
+    started = time.perf_counter()
+    found, errors = client.fetch(refs)
+    elapsed = time.perf_counter() - started
+    client.close()
+    return found, errors, elapsed, client.requests_made
+
+
+def report(title, count, found, errors, elapsed, requests_made, extrapolated=False):
+    print('  %-28s %7.2fs%s  %6d requests  %5d found  %d errors  (%.0f items/s)' % (
+        title, elapsed, '*' if extrapolated else ' ', requests_made, len(found), len(errors),
+        count / elapsed if elapsed else 0))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark bulk/concurrent external task sync')
+    parser.add_argument('--issues', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--sample', type=int, default=100, help='items fetched sequentially to extrapolate')
+    parser.add_argument('--latency-min', type=float, default=0.05)
+    parser.add_argument('--latency-max', type=float, default=0.15)
+    args = parser.parse_args()
+
+    module = load_client_module()
+    config = stub_task_api_server.StubConfig(args.issues, args.latency_min, args.latency_max,
+                                             changed_every=10, change_interval=0.5)
+    server, base_url = stub_task_api_server.start_server(config)
+
+    targets = {
+        'jira': (base_url + '/rest/api/2', ['PROJ-%d' % n for n in range(1, args.issues + 1)]),
+        'github': (base_url, [('stub', 'repo', n) for n in range(1, args.issues + 1)]),
+    }
+    for api_type, (url, refs) in targets.items():
+        print('== %s: %d issues, latency %.2f-%.2fs ==' % (api_type, len(refs), args.latency_min, args.latency_max))
+
+        sample = refs[:args.sample]
+        found, errors, elapsed, requests_made = run(module, api_type, url, sample, 1, False)
+        scale = len(refs) / float(len(sample))
+        report('sequential (old)', len(refs), dict.fromkeys(range(int(len(found) * scale))), errors,
+               elapsed * scale, int(requests_made * scale), extrapolated=True)
+
+        found, errors, elapsed, requests_made = run(module, api_type, url, refs, args.workers, False)
+        report('per item, %d threads' % args.workers, len(refs), found, errors, elapsed, requests_made)
+
+        found, errors, elapsed, requests_made = run(module, api_type, url, refs, args.workers, True)
+        report('bulk, %d threads' % args.workers, len(refs), found, errors, elapsed, requests_made)
+
+        # Lần sync sau: chỉ issue có thời điểm cập nhật mới cần ghi
+        time.sleep(1.0)
+        again, _errors, _elapsed, _requests = run(module, api_type, url, refs, args.workers, True)
+        changed = sum(1 for ref, item in again.items() if item['updated'] > found[ref]['updated'])
+        print('  second sync: %d changed, %d skipped as unchanged' % (changed, len(again) - changed))
+
+    server.shutdown()
+    print('(* extrapolated from %d items)' % args.sample)
+    print('stub requests: %s' % config.counts)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+replay_git_webhooks.py
+Phát lại payload webhook GitHub / GitLab đã ghi (scripts/fixtures/git_webhooks/*.json):
+  - Gửi tới endpoint của một task.git.integration (application/json), ký bằng secret
+    như GitHub / GitLab; in trạng thái trả về (queued / duplicate / invalid signature...)
+  - --dry-run: không cần Odoo, in thay đổi suy ra từ từng payload (models/git_webhook.py)
+
+Mỗi fixture: {"platform": "github" | "gitlab", "headers": {...}, "payload": {...}}
+
+Usage:
+  python3 replay_git_webhooks.py --dry-run
+  python3 replay_git_webhooks.py --url http://localhost:8069/quan_ly_cong_viec/git/webhook/1 \\
+      --secret s3cr3t --platform github --fresh-ids
+"""
+from __future__ import print_function
+import argparse
+import glob
+import importlib
+import json
+import os
+import sys
+import types
+import uuid
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FIXTURES = os.path.join(HERE, 'fixtures', 'git_webhooks')
+
+
+def load_webhook_module():
+    """Import models/git_webhook.py (và git_sync_client.py) không qua package Odoo"""
+    package = types.ModuleType('git_models')
+    package.__path__ = [os.path.join(HERE, '..', 'models')]
+    sys.modules['git_models'] = package
+    return importlib.import_module('git_models.git_webhook')
+
+
+def load_fixtures(paths, platform=None):
+    fixtures = []
+    for path in paths or sorted(glob.glob(os.path.join(FIXTURES, '*.json'))):
+        with open(path) as f:
+            fixture = json.load(f)
+        if platform and fixture['platform'] != platform:
+            continue
+        fixtures.append((os.path.basename(path), fixture))
+    return fixtures
+
+
+def dry_run(module, fixtures):
+    for name, fixture in fixtures:
+        platform = fixture['platform']
+        event, delivery_id = module.event_headers(platform, fixture['headers'])
+        change = module.parse_event(platform, event, fixture['payload'])
+        print('== %s (%s %s, repository %s) ==' % (
+            name, platform, event, module.repository_name(platform, fixture['payload'])))
+        if not change:
+            print('  ignored')
+        for result in change.results:
+            for item in result.items:
+                print('  upsert %-8s %s' % (result.resource, json.dumps(item, default=str, ensure_ascii=False)))
+        for branch in change.deleted_branches:
+            print('  delete branch   %s' % branch)
+
+
+def send(module, fixtures, url, secret, fresh_ids):
+    import requests
+
+    for name, fixture in fixtures:
+        platform = fixture['platform']
+        headers = dict(fixture['headers'], **{'Content-Type': 'application/json'})
+        if fresh_ids:
+            # Delivery id mới để server không bỏ qua như bản trùng
+            headers['X-GitHub-Delivery' if platform == 'github' else 'X-Gitlab-Event-UUID'] = str(uuid.uuid4())
+        body = json.dumps(fixture['payload']).encode('utf-8')
+        if platform == 'github':
+            headers['X-Hub-Signature-256'] = module.sign(secret, body)
+        else:
+            headers['X-Gitlab-Token'] = secret
+        response = requests.post(url, data=body, headers=headers, timeout=30)
+        # Route type='json': kết quả nằm trong 'result' (hoặc 'error') của phản hồi JSON-RPC
+        try:
+            reply = response.json()
+        except ValueError:
+            reply = {}
+        if 'result' in reply:
+            outcome = (reply['result'] or {}).get('status')
+        else:
+            outcome = (reply.get('error') or {}).get('message') or response.text.strip()[:200]
+        print('%-36s %s %s' % (name, response.status_code, outcome))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay recorded GitHub/GitLab webhook payloads')
+    parser.add_argument('fixtures', nargs='*', help='fixture files (default: all in fixtures/git_webhooks)')
+    parser.add_argument('--url', help='webhook URL of the integration')
+    parser.add_argument('--secret', help='webhook secret of the integration')
+    parser.add_argument('--platform', choices=('github', 'gitlab'), help='only replay fixtures of this platform')
+    parser.add_argument('--fresh-ids', action='store_true', help='send new delivery ids')
+    parser.add_argument('--dry-run', action='store_true', help='parse locally, do not send')
+    args = parser.parse_args()
+
+    module = load_webhook_module()
+    fixtures = load_fixtures(args.fixtures, args.platform)
+    if args.dry_run:
+        dry_run(module, fixtures)
+    elif not args.url or not args.secret:
+        parser.error('--url and --secret are required unless --dry-run')
+    else:
+        send(module, fixtures, args.url, args.secret, args.fresh_ids)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+stub_openai_server.py
+Server giả lập endpoint POST /v1/chat/completions để thử ChatClient / task.ai.assistant
+mà không gọi OpenAI thật.
+
+  - Độ trễ ngẫu nhiên trong [--latency-min, --latency-max] giây
+  - Tỷ lệ --rate-429 request trả về 429 (kèm Retry-After), --rate-500 trả về 500
+  - --fail-all: mọi request trả về 503 (thử circuit breaker)
+
+Usage:
+  python3 stub_openai_server.py --port 8099 --latency-min 0.05 --latency-max 0.3 --rate-429 0.2
+  # Trong Odoo: đặt API Base URL của AI Assistant = http://127.0.0.1:8099/v1
+"""
+from __future__ import print_function
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubConfig(object):
+    def __init__(self, latency_min=0.0, latency_max=0.0, rate_429=0.0, rate_500=0.0,
+                 fail_all=False, retry_after=None):
+        self.latency_min = latency_min
+        self.latency_max = latency_max
+        self.rate_429 = rate_429
+        self.rate_500 = rate_500
+        self.fail_all = fail_all
+        self.retry_after = retry_after
+        self.lock = threading.Lock()
+        self.counts = {'requests': 0, '200': 0, '429': 0, '500': 0, '503': 0}
+
+    def count(self, key):
+        with self.lock:
+            self.counts[key] += 1
+
+
+def make_handler(config):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # keep-alive
+
+        def log_message(self, fmt, *args):
+            pass
+
+        def _reply(self, status, payload, headers=None):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+            config.count(str(status))
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            request = json.loads(self.rfile.read(length) or b'{}')
+            config.count('requests')
+
+            if not self.path.rstrip('/').endswith('/chat/completions'):
+                self._reply(404, {'error': {'message': 'not found'}})
+                return
+
+            time.sleep(random.uniform(config.latency_min, config.latency_max))
+
+            if config.fail_all:
+                self._reply(503, {'error': {'message': 'stub: service unavailable'}})
+                return
+            roll = random.random()
+            if roll < config.rate_429:
+                headers = {'Retry-After': str(config.retry_after)} if config.retry_after is not None else {}
+                self._reply(429, {'error': {'message': 'stub: rate limit exceeded'}}, headers)
+                return
+            if roll < config.rate_429 + config.rate_500:
+                self._reply(500, {'error': {'message': 'stub: internal error'}})
+                return
+
+            prompt = ' '.join(m.get('content', '') for m in request.get('messages', []))
+            content = 'stub reply (%d chars)' % len(prompt)
+            self._reply(200, {
+                'id': 'chatcmpl-stub',
+                'object': 'chat.completion',
+                'model': request.get('model', 'stub'),
+                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content},
+                             'finish_reason': 'stop'}],
+                'usage': {
+                    'prompt_tokens': max(1, len(prompt) // 4),
+                    'completion_tokens': max(1, len(content) // 4),
+                    'total_tokens': max(1, len(prompt) // 4) + max(1, len(content) // 4),
+                },
+            })
+
+    return Handler
+
+
+def start_server(config, host='127.0.0.1', port=0):
+    """Chạy server trong thread nền, trả về (server, base_url)"""
+    server = ThreadingHTTPServer((host, port), make_handler(config))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, 'http://%s:%d/v1' % (host, server.server_address[1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stub OpenAI chat completions server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--latency-min', type=float, default=0.05)
+    parser.add_argument('--latency-max', type=float, default=0.2)
+    parser.add_argument('--rate-429', type=float, default=0.0)
+    parser.add_argument('--rate-500', type=float, default=0.0)
+    parser.add_argument('--retry-after', type=float, default=None)
+    parser.add_argument('--fail-all', action='store_true')
+    args = parser.parse_args()
+
+    config = StubConfig(args.latency_min, args.latency_max, args.rate_429, args.rate_500,
+                        args.fail_all, args.retry_after)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(config))
+    print('Stub OpenAI server on http://%s:%d/v1' % (args.host, args.port))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(config.counts)
+
+
+if __name__ == '__main__':
+    main()
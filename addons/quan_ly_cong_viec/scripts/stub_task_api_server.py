@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+stub_task_api_server.py
+Server giả lập Jira / GitHub để thử task.api.connector.sync_tasks offline:
+  - Jira:   POST /rest/api/2/search (JQL key in (...)), GET /rest/api/2/issue/<KEY>
+  - GitHub: POST /graphql (alias repository / issueOrPullRequest), GET /repos/<o>/<r>/issues/<n>
+  - Issue PROJ-1..N và stub/repo#1..N, --changed-every k: mỗi issue thứ k có thời điểm
+    cập nhật mới sau mỗi --change-interval giây
+  - Độ trễ ngẫu nhiên [--latency-min, --latency-max] giây mỗi request
+  - --no-bulk: search / graphql trả 404 (thử chế độ tải từng item)
+
+Usage:
+  python3 stub_task_api_server.py --port 8098 --issues 5000 --latency-min 0.05 --latency-max 0.15
+  # Trong Odoo: Base URL của connector Jira   = http://127.0.0.1:8098/rest/api/2
+  #                                    GitHub = http://127.0.0.1:8098
+  # Task: jira_ticket = PROJ-<n> hoặc github_link = https://github.com/stub/repo/issues/<n>,
+  #       external_task_id khác rỗng
+"""
+from __future__ import print_function
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+JQL_KEY_RE = re.compile(r'"([^"]+)"')
+GRAPHQL_REPO_RE = re.compile(r'(r\d+): repository\(owner: "([^"]*)", name: "([^"]*)"\)')
+GRAPHQL_ISSUE_RE = re.compile(r'(i\d+): issueOrPullRequest\(number: (\d+)\)')
+BASE_TIME = datetime(2026, 1, 1)
+
+
+class StubConfig(object):
+    def __init__(self, issues=1000, latency_min=0.0, latency_max=0.0, changed_every=0,
+                 change_interval=60.0, bulk=True, max_results=100):
+        self.issues = issues
+        self.latency_min = latency_min
+        self.latency_max = latency_max
+        self.changed_every = changed_every
+        self.change_interval = change_interval
+        self.bulk = bulk
+        # Jira Cloud giới hạn maxResults của search
+        self.max_results = max_results
+        self.started = time.time()
+        self.lock = threading.Lock()
+        self.counts = {'requests': 0, 'search': 0, 'graphql': 0, 'issue': 0}
+
+    def count(self, key):
+        with self.lock:
+            self.counts['requests'] += 1
+            self.counts[key] += 1
+
+    def updated(self, number):
+        """Thời điểm cập nhật của issue số `number` (đổi theo thời gian nếu changed_every)"""
+        updated = BASE_TIME + timedelta(minutes=number)
+        if self.changed_every and number % self.changed_every == 0:
+            updated += timedelta(seconds=int((time.time() - self.started) / self.change_interval))
+        return updated
+
+    def exists(self, number):
+        return 1 <= number <= self.issues
+
+    def jira_issue(self, number):
+        return {
+            'key': 'PROJ-%d' % number,
+            'fields': {
+                'summary': 'Stub issue %d' % number,
+                'description': 'Mô tả issue %d' % number,
+                'updated': self.updated(number).strftime('%Y-%m-%dT%H:%M:%S.000+0000'),
+            },
+        }
+
+    def github_issue(self, number):
+        return {'title': 'Stub issue %d' % number, 'updatedAt': self.updated(number).strftime('%Y-%m-%dT%H:%M:%SZ')}
+
+
+def _number(key):
+    try:
+        return int(key.rsplit('-', 1)[-1])
+    except ValueError:
+        return 0
+
+
+def make_handler(config):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # keep-alive
+
+        def log_message(self, fmt, *args):
+            pass
+
+        def _reply(self, status, payload):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _wait(self):
+            time.sleep(random.uniform(config.latency_min, config.latency_max))
+
+        def do_GET(self):
+            path = self.path.split('?', 1)[0].rstrip('/')
+            match = re.match(r'^/rest/api/2/issue/([A-Za-z0-9_]+-\d+)$', path)
+            if match:
+                config.count('issue')
+                self._wait()
+                number = _number(match.group(1))
+                if not match.group(1).upper().startswith('PROJ-') or not config.exists(number):
+                    self._reply(404, {'errorMessages': ['Issue does not exist']})
+                    return
+                self._reply(200, config.jira_issue(number))
+                return
+            match = re.match(r'^/repos/stub/repo/issues/(\d+)$', path)
+            if match:
+                config.count('issue')
+                self._wait()
+                number = int(match.group(1))
+                if not config.exists(number):
+                    self._reply(404, {'message': 'Not Found'})
+                    return
+                issue = config.github_issue(number)
+                self._reply(200, {'number': number, 'title': issue['title'], 'updated_at': issue['updatedAt']})
+                return
+            self._reply(200 if path in ('', '/rest/api/2') else 404, {})
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            request = json.loads(self.rfile.read(length) or b'{}')
+            path = self.path.split('?', 1)[0].rstrip('/')
+
+            if path == '/rest/api/2/search' and config.bulk:
+                config.count('search')
+                self._wait()
+                keys = [key.upper() for key in JQL_KEY_RE.findall(request.get('jql') or '')]
+                matched = [_number(key) for key in keys if key.startswith('PROJ-') and config.exists(_number(key))]
+                start = int(request.get('startAt') or 0)
+                page = matched[start:start + min(int(request.get('maxResults') or 50), config.max_results)]
+                self._reply(200, {
+                    'startAt': start, 'maxResults': len(page), 'total': len(matched),
+                    'issues': [config.jira_issue(number) for number in page],
+                })
+                return
+
+            if path == '/graphql' and config.bulk:
+                config.count('graphql')
+                self._wait()
+                query = request.get('query') or ''
+                data, errors = {}, []
+                repos = list(GRAPHQL_REPO_RE.finditer(query))
+                for index, repo in enumerate(repos):
+                    end = repos[index + 1].start() if index + 1 < len(repos) else len(query)
+                    alias, owner, name = repo.groups()
+                    data[alias] = {}
+                    for issue_alias, number in GRAPHQL_ISSUE_RE.findall(query[repo.end():end]):
+                        number = int(number)
+                        if (owner, name) == ('stub', 'repo') and config.exists(number):
+                            data[alias][issue_alias] = config.github_issue(number)
+                        else:
+                            data[alias][issue_alias] = None
+                            errors.append({'type': 'NOT_FOUND', 'path': [alias, issue_alias]})
+                payload = {'data': data}
+                if errors:
+                    payload['errors'] = errors
+                self._reply(200, payload)
+                return
+
+            self._reply(404, {'message': 'Not Found'})
+
+    return Handler
+
+
+def start_server(config, host='127.0.0.1', port=0):
+    """Chạy server trong thread nền, trả về (server, 'http://host:port')"""
+    server = ThreadingHTTPServer((host, port), make_handler(config))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, 'http://%s:%d' % (host, server.server_address[1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stub Jira / GitHub server for task sync')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8098)
+    parser.add_argument('--issues', type=int, default=5000)
+    parser.add_argument('--latency-min', type=float, default=0.05)
+    parser.add_argument('--latency-max', type=float, default=0.15)
+    parser.add_argument('--changed-every', type=int, default=0)
+    parser.add_argument('--change-interval', type=float, default=60.0)
+    parser.add_argument('--no-bulk', action='store_true')
+    args = parser.parse_args()
+
+    config = StubConfig(args.issues, args.latency_min, args.latency_max, args.changed_every,
+                        args.change_interval, bulk=not args.no_bulk)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(config))
+    print('Stub Jira / GitHub server on http://%s:%d' % (args.host, args.port))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(config.counts)
+
+
+if __name__ == '__main__':
+    main()
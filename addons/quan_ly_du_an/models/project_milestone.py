@@ -53,7 +53,8 @@ class ProjectMilestone(models.Model):
     # === PROGRESS ===
     completion_percentage = fields.Float(
         string='% Hoàn thành',
-        compute='_compute_completion_percentage'
+        compute='_compute_completion_percentage',
+        store=True
     )
     
     is_completed = fields.Boolean(
@@ -75,7 +76,7 @@ class ProjectMilestone(models.Model):
         for milestone in self:
             milestone.task_count = len(milestone.task_ids)
     
-    @api.depends('task_ids', 'task_ids.stage_id')
+    @api.depends('task_ids', 'task_ids.stage_id.fold', 'task_ids.latest_report_id', 'task_ids.latest_report_progress')
     def _compute_completion_percentage(self):
         """Tính % hoàn thành dựa trên báo cáo mới nhất của các task"""
         for milestone in self:
@@ -83,19 +84,13 @@ class ProjectMilestone(models.Model):
             if total == 0:
                 milestone.completion_percentage = 0.0
             else:
-                # Lấy % hoàn thành từ báo cáo mới nhất của mỗi task
-                SmartReport = self.env['task.smart.report']
+                # Lấy % hoàn thành từ báo cáo mới nhất của mỗi task (field stored trên task)
                 total_progress = 0.0
                 tasks_with_reports = 0
                 
                 for task in milestone.task_ids:
-                    # Tìm báo cáo mới nhất của task này
-                    latest_report = SmartReport.search([
-                        ('task_id', '=', task.id)
-                    ], order='create_date desc', limit=1)
-                    
-                    if latest_report:
-                        total_progress += latest_report.progress_percentage
+                    if task.latest_report_id:
+                        total_progress += task.latest_report_progress
                         tasks_with_reports += 1
                     elif task.stage_id.fold:
                         # Nếu task đã done nhưng không có báo cáo → coi như 100%
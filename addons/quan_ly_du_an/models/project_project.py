@@ -44,7 +44,7 @@ class Project(models.Model):
     actual_cost = fields.Monetary(
         string='Chi phí Thực tế',
         currency_field='currency_id',
-        compute='_compute_actual_cost',
+        compute='_compute_task_rollups',
         store=True,
         help='Tổng chi phí từ Timesheet'
     )
@@ -52,6 +52,8 @@ class Project(models.Model):
     budget_usage_percentage = fields.Float(
         string='% Sử dụng Ngân sách',
         compute='_compute_budget_usage',
+        store=True,
+        index=True,
         help='(Actual / Planned) * 100'
     )
     
@@ -59,7 +61,7 @@ class Project(models.Model):
         ('safe', 'An toàn (<70%)'),
         ('warning', 'Cảnh báo (70-90%)'),
         ('critical', 'Nguy hiểm (>90%)'),
-    ], string='Trạng thái Ngân sách', compute='_compute_budget_status')
+    ], string='Trạng thái Ngân sách', compute='_compute_budget_status', store=True, index=True)
     
     currency_id = fields.Many2one(
         'res.currency',
@@ -76,13 +78,15 @@ class Project(models.Model):
     
     current_team_size = fields.Integer(
         string='Quy mô Team Hiện tại',
-        compute='_compute_current_team_size'
+        compute='_compute_task_rollups',
+        store=True
     )
     
     # === HEALTH METRICS ===
     completion_percentage = fields.Float(
         string='% Hoàn thành',
-        compute='_compute_completion_percentage',
+        compute='_compute_task_rollups',
+        store=True,
         help='Dựa trên Task hoàn thành'
     )
     
@@ -91,7 +95,7 @@ class Project(models.Model):
         ('good', 'Tốt'),
         ('at_risk', 'Có rủi ro'),
         ('critical', 'Nghiêm trọng'),
-    ], string='Sức khỏe Dự án', compute='_compute_project_health')
+    ], string='Sức khỏe Dự án', compute='_compute_project_health', store=True, index=True)
 
     # ==================
     # COMPUTED FIELDS
@@ -106,21 +110,52 @@ class Project(models.Model):
         for project in self:
             project.okr_count = len(project.okr_ids)
     
-    @api.depends('user_id', 'partner_id')
-    def _compute_current_team_size(self):
-        for project in self:
-            # Đếm số thành viên từ tasks
-            members = project.tasks.mapped('user_ids')
-            project.current_team_size = len(set(members.ids))
-    
-    @api.depends('tasks.actual_hours')
-    def _compute_actual_cost(self):
-        """Tính chi phí thực tế từ timesheet (giả định $50/h)"""
+    @api.depends('tasks', 'tasks.active', 'tasks.stage_id.fold', 'tasks.actual_hours', 'tasks.user_ids')
+    def _compute_task_rollups(self):
+        """
+        % hoàn thành, chi phí thực tế và quy mô team từ task của dự án.
+        Gom nhóm bằng một câu SQL cho cả recordset thay vì nạp toàn bộ task.
+        """
+        rollups = self._get_task_rollups()
+        # TODO: Lấy hourly rate từ HR module
+        hourly_rate = 50.0
         for project in self:
-            total_hours = sum(project.tasks.mapped('actual_hours'))
-            # TODO: Lấy hourly rate từ HR module
-            hourly_rate = 50.0
+            total, done, total_hours, members = rollups.get(project._origin.id, (0, 0, 0.0, 0))
+            project.completion_percentage = (done / total) * 100 if total else 0.0
             project.actual_cost = total_hours * hourly_rate
+            project.current_team_size = members
+    
+    def _get_task_rollups(self):
+        """{project_id: (số task, số task xong, tổng giờ thực tế, số thành viên)} của task đang hoạt động"""
+        project_ids = [project_id for project_id in self._origin.ids if project_id]
+        if not project_ids:
+            return {}
+        
+        self.env['project.task'].flush(['project_id', 'active', 'stage_id', 'actual_hours', 'user_ids'])
+        self.env['project.task.type'].flush(['fold'])
+        self.env.cr.execute("""
+            WITH task_stats AS (
+                SELECT t.project_id,
+                       COUNT(*) AS total,
+                       COUNT(*) FILTER (WHERE s.fold) AS done,
+                       COALESCE(SUM(t.actual_hours), 0) AS total_hours
+                  FROM project_task t
+                  LEFT JOIN project_task_type s ON s.id = t.stage_id
+                 WHERE t.active AND t.project_id IN %(ids)s
+                 GROUP BY t.project_id
+            ),
+            team AS (
+                SELECT t.project_id, COUNT(DISTINCT r.user_id) AS members
+                  FROM project_task t
+                  JOIN project_task_user_rel r ON r.task_id = t.id
+                 WHERE t.active AND t.project_id IN %(ids)s
+                 GROUP BY t.project_id
+            )
+            SELECT ts.project_id, ts.total, ts.done, ts.total_hours, COALESCE(team.members, 0)
+              FROM task_stats ts
+              LEFT JOIN team ON team.project_id = ts.project_id
+        """, {'ids': tuple(project_ids)})
+        return {row[0]: row[1:] for row in self.env.cr.fetchall()}
     
     @api.depends('planned_budget', 'actual_cost')
     def _compute_budget_usage(self):
@@ -141,16 +176,6 @@ class Project(models.Model):
             else:
                 project.budget_status = 'critical'
     
-    @api.depends('tasks', 'tasks.stage_id')
-    def _compute_completion_percentage(self):
-        for project in self:
-            total = len(project.tasks)
-            if total == 0:
-                project.completion_percentage = 0.0
-            else:
-                done = len(project.tasks.filtered(lambda t: t.stage_id.fold))
-                project.completion_percentage = (done / total) * 100
-    
     @api.depends('completion_percentage', 'budget_status')
     def _compute_project_health(self):
         for project in self:
@@ -7,6 +7,7 @@ from . import cham_cong
 from . import bang_luong
 from . import hr_bonus_log
 from . import hr_integration
+from . import nhan_vien_resolver
 from . import hr_id_ocr_connector
 from . import id_ocr_service
 from . import id_ocr_log
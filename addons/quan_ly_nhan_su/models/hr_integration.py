@@ -124,6 +124,11 @@ class NhanVienIntegration(models.Model):
     
     def _compute_skill_gaps(self):
         """Tính kỹ năng thiếu - không dùng depends"""
+        # Dựng chỉ mục kỹ năng + ánh xạ hr.skill → ky.nang một lần cho cả recordset
+        SkillIndex = self.env['ky.nang.index']
+        skill_index = SkillIndex.build(self)
+        skill_map = SkillIndex.map_skills(self.mapped('task_ids.required_skill_ids'))
+        
         for nv in self:
             if not nv.task_ids:
                 nv.skill_gap_count = 0
@@ -132,19 +137,30 @@ class NhanVienIntegration(models.Model):
             # Kỹ năng yêu cầu từ tasks
             required_skills = nv.task_ids.mapped('required_skill_ids')
             # Kỹ năng nhân viên có
-            employee_skills = nv.ky_nang_ids.mapped('ky_nang_id') if hasattr(nv, 'ky_nang_ids') else self.env['hr.skill'].browse()
+            employee_skills = skill_index.get(nv.id, {})
             
             # Kỹ năng thiếu
-            missing_skills = required_skills - employee_skills
-            nv.skill_gap_count = len(missing_skills)
+            nv.skill_gap_count = len([
+                skill for skill in required_skills
+                if skill_map.get(skill.id) not in employee_skills
+            ])
     
     def _compute_workload(self):
         """Tính khối lượng công việc hiện tại - không dùng depends"""
-        """Tính khối lượng công việc hiện tại"""
+        hours = {}
+        nv_ids = [nv_id for nv_id in self.ids if isinstance(nv_id, int)]
+        if 'nhan_vien_assigned_id' in self.env['project.task']._fields and nv_ids:
+            # Cùng nguồn với task_ids / task_count: tổng planned_hours của task đang mở
+            # theo nhan_vien_assigned_id, một câu GROUP BY cho cả recordset
+            groups = self.env['project.task'].read_group(
+                [('nhan_vien_assigned_id', 'in', nv_ids),
+                 '|', ('stage_id', '=', False), ('stage_id.fold', '=', False)],
+                ['planned_hours:sum'], ['nhan_vien_assigned_id'],
+            )
+            hours = {g['nhan_vien_assigned_id'][0]: g['planned_hours'] or 0.0 for g in groups}
+        
         for nv in self:
-            # Tasks chưa hoàn thành
-            active_tasks = nv.task_ids.filtered(lambda t: not t.stage_id.fold)
-            nv.current_workload_hours = sum(active_tasks.mapped('planned_hours'))
+            nv.current_workload_hours = hours.get(nv.id, 0.0)
             
             # Cảnh báo nếu >160h/tháng (40h/tuần * 4 tuần)
             nv.overload_warning = nv.current_workload_hours > 160
@@ -262,14 +278,10 @@ class BangLuongIntegration(models.Model):
         self.ensure_one()
         
         # Tìm res.users tương ứng với nhân viên
-        user = self.env['res.users'].search([
-            '|',
-            ('login', '=', self.email),
-            ('name', '=', self.name)
-        ], limit=1)
+        user = self.env['nhan_vien.resolver'].resolve_user(self.nhan_vien_id)
         
         return {
-            'name': f'Tasks của {self.name}',
+            'name': f'Tasks của {self.nhan_vien_id.name}',
             'type': 'ir.actions.act_window',
             'res_model': 'project.task',
             'view_mode': 'tree,form,kanban',
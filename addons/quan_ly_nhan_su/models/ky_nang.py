@@ -2,6 +2,16 @@
 
 from odoo import models, fields, api
 
+# Trình độ → cấp độ số (so với project.task.skill_level_required)
+TRINH_DO_LEVELS = {
+    'moi_hoc': 1,
+    'co_ban': 2,
+    'trung_binh': 3,
+    'kha': 4,
+    'gioi': 5,
+    'chuyen_gia': 6,
+}
+
 
 class KyNang(models.Model):
     """Danh mục kỹ năng/chuyên môn"""
@@ -53,6 +63,57 @@ class KyNangNhanVien(models.Model):
     ]
 
 
+class KyNangIndex(models.AbstractModel):
+    """
+    Chỉ mục kỹ năng theo nhân viên: {nhan_vien_id: {ky_nang_id: trinh_do}}.
+    Dựng một lần cho cả recordset để tránh duyệt ky_nang_ids từng nhân viên.
+    """
+    _name = 'ky.nang.index'
+    _description = 'Chỉ mục Kỹ năng Nhân viên'
+
+    @api.model
+    def build(self, employees):
+        """Đọc kỹ năng của tất cả `employees` bằng một câu truy vấn"""
+        index = {nhan_vien_id: {} for nhan_vien_id in employees.ids}
+        if not index:
+            return index
+        rows = self.env['ky.nang.nhan.vien'].search_read(
+            [('nhan_vien_id', 'in', employees.ids)],
+            ['nhan_vien_id', 'ky_nang_id', 'trinh_do'],
+            load=None,
+        )
+        for row in rows:
+            index[row['nhan_vien_id']][row['ky_nang_id']] = row['trinh_do']
+        return index
+
+    @api.model
+    def map_skills(self, skills):
+        """
+        Ánh xạ kỹ năng của module khác (vd. hr.skill) sang ky.nang theo tên.
+
+        Returns:
+            dict {skill.id: ky_nang_id} chỉ gồm các kỹ năng có ky.nang trùng tên
+        """
+        names = {skill.id: skill.name for skill in skills}
+        if not names:
+            return {}
+        ky_nang_ids = {
+            row['name']: row['id']
+            for row in self.env['ky.nang'].with_context(active_test=False).search_read(
+                [('name', 'in', list(set(names.values())))], ['name']
+            )
+        }
+        return {
+            skill_id: ky_nang_ids[name]
+            for skill_id, name in names.items()
+            if name in ky_nang_ids
+        }
+
+    @api.model
+    def level_of(self, trinh_do):
+        return TRINH_DO_LEVELS.get(trinh_do, 0)
+
+
 class LichSuHieuSuat(models.Model):
     """Ghi lại lịch sử hiệu suất làm việc của nhân viên"""
     _name = 'lich.su.hieu.suat'
@@ -0,0 +1,314 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api, tools
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Khóa trong cr.cache: phiên bản dữ liệu tra cứu đã đọc trong transaction hiện tại
+RESOLVER_VERSION_KEY = 'nhan_vien_resolver_version'
+
+
+class NhanVienUserLink(models.Model):
+    """Liên kết lưu sẵn nhan_vien ↔ res.users"""
+    _inherit = 'nhan_vien'
+
+    user_id = fields.Many2one(
+        'res.users',
+        string='Tài khoản người dùng',
+        index=True,
+        copy=False,
+        ondelete='set null',
+        tracking=True,
+        help='Tài khoản Odoo của nhân viên. Tự liên kết theo email = login nếu để trống.'
+    )
+
+    _sql_constraints = [
+        ('user_id_unique', 'UNIQUE(user_id)', 'Mỗi tài khoản người dùng chỉ gắn với một nhân viên!')
+    ]
+
+    # Các field ảnh hưởng tới kết quả của nhan_vien.resolver
+    _RESOLVER_FIELDS = {'user_id', 'email', 'name', 'active'}
+
+    def init(self):
+        super().init()
+        # Backfill liên kết cho dữ liệu cũ
+        self._link_users_by_email()
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        unlinked = records.filtered(lambda r: r.email and not r.user_id)
+        if unlinked:
+            unlinked._link_users_by_email()
+        self.env['nhan_vien.resolver']._bump_cache_version()
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        if self._RESOLVER_FIELDS.intersection(vals):
+            unlinked = self.filtered(lambda r: r.email and not r.user_id)
+            if 'email' in vals and unlinked:
+                unlinked._link_users_by_email()
+            self.env['nhan_vien.resolver']._bump_cache_version()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env['nhan_vien.resolver']._bump_cache_version()
+        return res
+
+    def _link_users_by_email(self):
+        """
+        Gắn user_id cho nhân viên chưa có liên kết, theo email = login.
+        Gọi trên recordset rỗng của model = áp dụng cho toàn bộ bảng.
+        """
+        self.flush(['email', 'user_id'])
+        self.env['res.users'].flush(['login'])
+
+        where_ids = ''
+        params = []
+        if self.ids:
+            where_ids = 'AND nv.id IN %s'
+            params.append(tuple(self.ids))
+
+        self.env.cr.execute("""
+            UPDATE nhan_vien nv
+               SET user_id = m.user_id
+              FROM (
+                    SELECT DISTINCT ON (u.id) nv.id AS nhan_vien_id, u.id AS user_id
+                      FROM nhan_vien nv
+                      JOIN res_users u ON u.login = nv.email
+                     WHERE nv.user_id IS NULL
+                       AND NOT EXISTS (SELECT 1 FROM nhan_vien o WHERE o.user_id = u.id)
+                       {where_ids}
+                     ORDER BY u.id, nv.ma_dinh_danh
+                   ) m
+             WHERE nv.id = m.nhan_vien_id
+         RETURNING nv.id
+        """.format(where_ids=where_ids), params)
+        linked_ids = [row[0] for row in self.env.cr.fetchall()]
+        if linked_ids:
+            _logger.info('Linked %d employees to users by email', len(linked_ids))
+            self.invalidate_cache(['user_id'], linked_ids)
+        return linked_ids
+
+
+class ResUsersResolver(models.Model):
+    _inherit = 'res.users'
+
+    # Các field ảnh hưởng tới kết quả của nhan_vien.resolver
+    _RESOLVER_FIELDS = {'login', 'name', 'partner_id', 'active'}
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        users = super().create(vals_list)
+        self.env['nhan_vien.resolver']._bump_cache_version()
+        return users
+
+    def write(self, vals):
+        res = super().write(vals)
+        if self._RESOLVER_FIELDS.intersection(vals):
+            self.env['nhan_vien.resolver']._bump_cache_version()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env['nhan_vien.resolver']._bump_cache_version()
+        return res
+
+
+class ResPartnerResolver(models.Model):
+    _inherit = 'res.partner'
+
+    # Field partner của tài khoản người dùng ảnh hưởng tới nhan_vien.resolver
+    # (email: chỉ mục email, name: khớp theo tên)
+    _RESOLVER_FIELDS = {'email', 'name'}
+
+    def write(self, vals):
+        res = super().write(vals)
+        if self._RESOLVER_FIELDS.intersection(vals) and self.env['res.users'].sudo().with_context(
+                active_test=False).search_count([('partner_id', 'in', self.ids)]):
+            self.env['nhan_vien.resolver']._bump_cache_version()
+        return res
+
+
+class NhanVienResolver(models.AbstractModel):
+    """
+    Tra cứu res.users ↔ nhan_vien dùng chung cho các module.
+
+    Thứ tự ưu tiên: liên kết lưu sẵn (nhan_vien.user_id), sau đó email = login,
+    cuối cùng là trùng tên. Kết quả tra cứu từng user và chỉ mục email → nhân viên
+    được cache (ormcache) theo phiên bản dữ liệu: nhan_vien / res.users (kể cả email,
+    tên partner của tài khoản) thay đổi thì tăng phiên bản (bảng nhan_vien_resolver_version)
+    thay vì clear_caches() toàn registry; entry cũ không còn được dùng và tự bị đẩy khỏi LRU.
+    """
+    _name = 'nhan_vien.resolver'
+    _description = 'Tra cứu Nhân viên theo Người dùng'
+
+    def init(self):
+        cr = self.env.cr
+        if tools.table_exists(cr, 'nhan_vien_resolver_version'):
+            return
+        # Giá trị lấy từ sequence (không quay lui khi rollback) nên một phiên bản
+        # không bao giờ được dùng lại cho dữ liệu khác
+        cr.execute("""
+            CREATE SEQUENCE nhan_vien_resolver_version_seq;
+            CREATE TABLE nhan_vien_resolver_version (version BIGINT NOT NULL);
+            INSERT INTO nhan_vien_resolver_version (version) VALUES (nextval('nhan_vien_resolver_version_seq'));
+        """)
+
+    @api.model
+    def _cache_version(self):
+        """
+        Phiên bản dữ liệu tra cứu (một phần khóa ormcache). Đọc một lần mỗi transaction:
+        transaction chỉ thấy dữ liệu đã commit cùng phiên bản mà nó đọc được.
+        """
+        cr = self.env.cr
+        if RESOLVER_VERSION_KEY not in cr.cache:
+            cr.execute('SELECT version FROM nhan_vien_resolver_version')
+            self._remember_version(cr.fetchone()[0])
+        return cr.cache[RESOLVER_VERSION_KEY]
+
+    @api.model
+    def _bump_cache_version(self):
+        """Đánh dấu dữ liệu tra cứu đã đổi (có hiệu lực với process khác khi commit)"""
+        self.env.cr.execute("""
+            UPDATE nhan_vien_resolver_version
+               SET version = nextval('nhan_vien_resolver_version_seq')
+         RETURNING version
+        """)
+        self._remember_version(self.env.cr.fetchone()[0])
+
+    @api.model
+    def _remember_version(self, version):
+        cr = self.env.cr
+        if RESOLVER_VERSION_KEY not in cr.cache:
+            # Transaction sau của cùng cursor (cron commit giữa chừng) phải đọc lại
+            def forget():
+                cr.cache.pop(RESOLVER_VERSION_KEY, None)
+            cr.postcommit.add(forget)
+            cr.postrollback.add(forget)
+        cr.cache[RESOLVER_VERSION_KEY] = version
+
+    @api.model
+    def resolve(self, user):
+        """Trả về nhan_vien của `user` (recordset rỗng nếu không tìm thấy)"""
+        if not user:
+            return self.env['nhan_vien']
+        return self.env['nhan_vien'].browse(self._get_employee_id(user.id))
+
+    @api.model
+    def resolve_many(self, users):
+        """
+        Tra cứu nhân viên cho nhiều user bằng một câu SQL.
+
+        Returns:
+            dict {user_id: nhan_vien} chỉ gồm các user tìm được nhân viên
+        """
+        NhanVien = self.env['nhan_vien']
+        mapping = self._lookup_employee_ids(users.ids)
+        return {user_id: NhanVien.browse(nhan_vien_id) for user_id, nhan_vien_id in mapping.items()}
+
+    @api.model
+    def resolve_user(self, employee):
+        """Trả về res.users của nhân viên `employee` (recordset rỗng nếu không có)"""
+        if not employee:
+            return self.env['res.users']
+        return self.env['res.users'].browse(self._get_user_id(employee.id))
+
+    @api.model
+    def resolve_emails(self, emails):
+        """
+        Tra cứu nhân viên theo email (không phân biệt hoa thường), ví dụ email tác giả commit.
+
+        Returns:
+            dict {email: nhan_vien_id} chỉ gồm các email tìm được nhân viên
+        """
+        index = self._get_email_index()
+        result = {}
+        for email in emails:
+            nhan_vien_id = index.get((email or '').strip().lower())
+            if nhan_vien_id:
+                result[email] = nhan_vien_id
+        return result
+
+    @tools.ormcache('self._cache_version()')
+    def _get_email_index(self):
+        """
+        {email chữ thường: nhan_vien_id} của toàn bộ nhân viên active, dựng bằng một câu SQL.
+        Ưu tiên nhan_vien.email, rồi login và email partner của tài khoản liên kết.
+        """
+        self._flush_resolver_fields()
+        self.env['res.partner'].flush(['email'])
+        self.env.cr.execute("""
+            SELECT email, nhan_vien_id FROM (
+                SELECT lower(trim(nv.email)) AS email, nv.id AS nhan_vien_id, 0 AS priority, nv.ma_dinh_danh
+                  FROM nhan_vien nv
+                 WHERE nv.active AND nv.email IS NOT NULL
+                UNION ALL
+                SELECT lower(trim(u.login)), nv.id, 1, nv.ma_dinh_danh
+                  FROM nhan_vien nv
+                  JOIN res_users u ON u.id = nv.user_id
+                 WHERE nv.active
+                UNION ALL
+                SELECT lower(trim(p.email)), nv.id, 2, nv.ma_dinh_danh
+                  FROM nhan_vien nv
+                  JOIN res_users u ON u.id = nv.user_id
+                  JOIN res_partner p ON p.id = u.partner_id
+                 WHERE nv.active AND p.email IS NOT NULL
+            ) emails
+             WHERE email <> ''
+             ORDER BY priority, ma_dinh_danh
+        """)
+        index = {}
+        for email, nhan_vien_id in self.env.cr.fetchall():
+            index.setdefault(email, nhan_vien_id)
+        return index
+
+    @tools.ormcache('self._cache_version()', 'user_id')
+    def _get_employee_id(self, user_id):
+        return self._lookup_employee_ids([user_id]).get(user_id, False)
+
+    @tools.ormcache('self._cache_version()', 'nhan_vien_id')
+    def _get_user_id(self, nhan_vien_id):
+        self._flush_resolver_fields()
+        self.env.cr.execute("""
+            SELECT u.id
+              FROM nhan_vien nv
+              JOIN res_users u ON u.active
+              JOIN res_partner p ON p.id = u.partner_id
+             WHERE nv.id = %s
+               AND (u.id = nv.user_id
+                    OR (nv.user_id IS NULL AND (u.login = nv.email OR p.name = nv.name)))
+             ORDER BY (u.id = nv.user_id) IS NOT TRUE, u.login IS DISTINCT FROM nv.email, u.id
+             LIMIT 1
+        """, [nhan_vien_id])
+        row = self.env.cr.fetchone()
+        return row[0] if row else False
+
+    @api.model
+    def _lookup_employee_ids(self, user_ids):
+        """{user_id: nhan_vien_id} cho `user_ids` bằng một câu SQL"""
+        user_ids = [uid for uid in user_ids if isinstance(uid, int)]
+        if not user_ids:
+            return {}
+
+        self._flush_resolver_fields()
+        self.env.cr.execute("""
+            SELECT DISTINCT ON (u.id) u.id, nv.id
+              FROM res_users u
+              JOIN res_partner p ON p.id = u.partner_id
+              JOIN nhan_vien nv ON nv.active
+                   AND (nv.user_id = u.id
+                        OR (nv.user_id IS NULL AND (nv.email = u.login OR nv.name = p.name)))
+             WHERE u.id IN %s
+             ORDER BY u.id, nv.user_id IS NULL, nv.email IS DISTINCT FROM u.login, nv.ma_dinh_danh
+        """, [tuple(user_ids)])
+        return dict(self.env.cr.fetchall())
+
+    @api.model
+    def _flush_resolver_fields(self):
+        self.env['nhan_vien'].flush(['user_id', 'email', 'name', 'active', 'ma_dinh_danh'])
+        self.env['res.users'].flush(['login', 'partner_id', 'active'])
+        self.env['res.partner'].flush(['name'])